@@ -0,0 +1,337 @@
+import json
+import os
+import struct
+import zlib
+from typing import NamedTuple
+import numpy as np
+from ai.qtable import QTable
+from engine.direction import Direction
+from engine.state import ENCODER_VERSION, STATE_COUNT
+
+# Checkpoint directory of a training session
+CHECKPOINT_EXTENSION = ".ckpt"
+CHECKPOINT_BASE = "base.bin"
+CHECKPOINT_LOG = "delta.log"
+
+# Episodes between two checkpoints
+CHECKPOINT_INTERVAL = 100
+
+# Checkpoint record: magic, sequence number, meta length, row count, then
+# the JSON meta, the u16 state ids, the Q-values and visited mask of those
+# rows, and the CRC32 of everything before it
+RECORD_MAGIC = b"L2SC"
+RECORD_HEADER = struct.Struct("<4sIII")
+RECORD_CRC = struct.Struct("<I")
+
+
+class Checkpoint(NamedTuple):
+    """
+    Training state read back from a checkpoint directory.
+
+    Attributes:
+        table (QTable): The Q-table of the last checkpoint.
+        meta (dict): The training state saved with it (episode, epsilon,
+            generator states, metrics cursor).
+        seq (int): The sequence number of the last checkpoint.
+        log_size (int): The size of the valid part of the delta log.
+    """
+
+    table: QTable
+    meta: dict
+    seq: int
+    log_size: int
+
+
+def checkpoint_path(filename: str) -> str:
+    """
+    Returns the checkpoint directory of a training session.
+
+    Args:
+        filename (str): The session name, without extension.
+
+    Returns:
+        str: The path of the checkpoint directory in the data directory.
+    """
+    return f"data/{filename}{CHECKPOINT_EXTENSION}"
+
+
+def encode_record(
+    seq: int, meta: dict, rows: np.ndarray, table: QTable
+) -> bytes:
+    """
+    Encodes a checkpoint record holding some rows of a Q-table.
+
+    Args:
+        seq (int): The sequence number of the checkpoint.
+        meta (dict): The JSON-serializable training state.
+        rows (np.ndarray): The state ids of the rows to store.
+        table (QTable): The Q-table to read the rows from.
+
+    Returns:
+        bytes: The record.
+    """
+    meta_bytes = json.dumps(meta).encode()
+    data = b"".join((
+        RECORD_HEADER.pack(RECORD_MAGIC, seq, len(meta_bytes), len(rows)),
+        meta_bytes,
+        rows.astype("<u2").tobytes(),
+        np.ascontiguousarray(table.values[rows], dtype="<f8").tobytes(),
+        np.ascontiguousarray(table.visited[rows], dtype=bool).tobytes(),
+    ))
+
+    return data + RECORD_CRC.pack(zlib.crc32(data))
+
+
+def decode_record(
+    buffer: bytes, offset: int
+) -> tuple[int, dict, np.ndarray, np.ndarray, np.ndarray, int] | None:
+    """
+    Decodes the checkpoint record starting at an offset.
+
+    Args:
+        buffer (bytes): The file contents.
+        offset (int): The offset of the record.
+
+    Returns:
+        tuple | None: The sequence number, meta, state ids, Q-values and
+        visited mask of the record and the offset following it, or None if
+        the record is truncated or corrupted.
+    """
+    end = offset + RECORD_HEADER.size
+    if end > len(buffer):
+        return None
+
+    magic, seq, meta_size, n = RECORD_HEADER.unpack_from(buffer, offset)
+    actions = len(Direction)
+    size = meta_size + n * (2 + actions * 9)
+
+    if magic != RECORD_MAGIC or end + size + RECORD_CRC.size > len(buffer):
+        return None
+
+    (crc,) = RECORD_CRC.unpack_from(buffer, end + size)
+    if crc != zlib.crc32(buffer[offset:end + size]):
+        return None
+
+    meta = json.loads(buffer[end:end + meta_size])
+    end += meta_size
+    rows = np.frombuffer(buffer, "<u2", n, end).astype(np.intp)
+    end += 2 * n
+    values = np.frombuffer(buffer, "<f8", n * actions, end)
+    end += 8 * n * actions
+    visited = np.frombuffer(buffer, bool, n * actions, end)
+    end += n * actions
+
+    return (
+        seq, meta, rows, values.reshape(n, actions),
+        visited.reshape(n, actions), end + RECORD_CRC.size,
+    )
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    """
+    Loads the last complete checkpoint of a directory.
+
+    The base table is read first, then the records of the delta log that
+    are newer than it are applied in order. A truncated or corrupted record,
+    left by a crash while writing, ends the log.
+
+    Args:
+        path (str): The checkpoint directory.
+
+    Returns:
+        Checkpoint: The training state of the last checkpoint.
+
+    Raises:
+        FileNotFoundError: If the directory has no checkpoint.
+        ValueError: If the checkpoint is corrupted or was written for
+        another state encoder.
+    """
+    with open(os.path.join(path, CHECKPOINT_BASE), "rb") as file:
+        base = decode_record(file.read(), 0)
+
+    if base is None:
+        raise ValueError(f"Checkpoint {path} is corrupted")
+
+    seq, meta, rows, values, visited, _ = base
+    table = QTable()
+    table.values[rows] = values
+    table.visited[rows] = visited
+
+    log_size = 0
+    try:
+        with open(os.path.join(path, CHECKPOINT_LOG), "rb") as file:
+            log = file.read()
+    except FileNotFoundError:
+        log = b""
+
+    while (record := decode_record(log, log_size)) is not None:
+        record_seq, record_meta, rows, values, visited, log_size = record
+
+        # Records older than the base were already compacted into it
+        if record_seq > seq:
+            seq, meta = record_seq, record_meta
+            table.values[rows] = values
+            table.visited[rows] = visited
+
+    if meta.get("encoder") != ENCODER_VERSION:
+        raise ValueError(
+            f"Checkpoint {path} was written for state encoder "
+            f"v{meta.get('encoder')}, expected v{ENCODER_VERSION}"
+        )
+
+    return Checkpoint(table, meta, seq, log_size)
+
+
+class Checkpointer:
+    """
+    Writes the checkpoints of a training run.
+
+    Each checkpoint appends to the delta log only the rows of the Q-table
+    that changed since the previous one, with the training state, so its
+    cost follows the number of changed rows. When the log grows larger than
+    the base table, it is compacted: the whole table is written to a new
+    base file, renamed over the old one, and the log is emptied.
+
+    Every write is flushed to disk before returning, and a record only
+    counts once complete, so a crash at any time leaves the last complete
+    checkpoint readable.
+
+    Attributes:
+        __path (str): The checkpoint directory.
+        __saved (QTable | None): Copy of the table at the last checkpoint,
+            None before the first one.
+        __seq (int): The sequence number of the last checkpoint.
+        __log_size (int): The size of the delta log.
+        __base_size (int): The size of the base file, 0 if none.
+    """
+
+    def __init__(self, path: str, resume: Checkpoint | None = None):
+        """
+        Starts checkpointing a training run.
+
+        Args:
+            path (str): The checkpoint directory.
+            resume (Checkpoint | None, optional): The checkpoint the run
+                resumes from, None to start a new run and drop the previous
+                checkpoints. Defaults to None.
+        """
+        self.__path = path
+        self.__saved = None
+        self.__seq = 0
+        self.__log_size = 0
+        self.__base_size = 0
+
+        os.makedirs(path, exist_ok=True)
+
+        if resume is None:
+            for name in (CHECKPOINT_BASE, CHECKPOINT_LOG):
+                if os.path.exists(self.__file(name)):
+                    os.remove(self.__file(name))
+        else:
+            self.__saved = QTable(resume.table.values.copy(),
+                                  resume.table.visited.copy())
+            self.__seq = resume.seq
+            self.__log_size = resume.log_size
+            self.__base_size = os.path.getsize(self.__file(CHECKPOINT_BASE))
+
+            # Drop the partial record a crash may have left
+            if os.path.exists(self.__file(CHECKPOINT_LOG)):
+                os.truncate(self.__file(CHECKPOINT_LOG), self.__log_size)
+
+    def get_path(self) -> str:
+        """
+        Returns the checkpoint directory.
+
+        Returns:
+            str: The path of the checkpoint directory.
+        """
+        return self.__path
+
+    def __file(self, name: str) -> str:
+        """
+        Returns the path of a file of the checkpoint directory.
+
+        Args:
+            name (str): The file name.
+
+        Returns:
+            str: The path of the file.
+        """
+        return os.path.join(self.__path, name)
+
+    def save(self, table: QTable, meta: dict) -> None:
+        """
+        Writes a checkpoint of the table and of the training state.
+
+        Args:
+            table (QTable): The Q-table being trained.
+            meta (dict): The JSON-serializable training state.
+        """
+        if self.__saved is None:
+            self.compact(table, meta)
+            return
+
+        # Copy first: worker processes may update the table meanwhile
+        current = QTable(table.values.copy(), table.visited.copy())
+        changed = np.flatnonzero(
+            (current.values != self.__saved.values).any(axis=1)
+            | (current.visited != self.__saved.visited).any(axis=1)
+        )
+
+        self.__seq += 1
+        record = encode_record(self.__seq, self.__meta(meta), changed,
+                               current)
+
+        with open(self.__file(CHECKPOINT_LOG), "ab") as file:
+            file.write(record)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.__log_size += len(record)
+        self.__saved.values[changed] = current.values[changed]
+        self.__saved.visited[changed] = current.visited[changed]
+
+        if self.__log_size > self.__base_size:
+            self.compact(current, meta)
+
+    def compact(self, table: QTable, meta: dict) -> None:
+        """
+        Writes the whole table to a new base file and empties the log.
+
+        Args:
+            table (QTable): The Q-table being trained.
+            meta (dict): The JSON-serializable training state.
+        """
+        current = QTable(table.values.copy(), table.visited.copy())
+
+        self.__seq += 1
+        record = encode_record(self.__seq, self.__meta(meta),
+                               np.arange(STATE_COUNT), current)
+
+        tmp_path = self.__file(f"{CHECKPOINT_BASE}.tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(record)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.__file(CHECKPOINT_BASE))
+
+        # The log only holds older records now, skipped if left by a crash
+        with open(self.__file(CHECKPOINT_LOG), "wb"):
+            pass
+
+        self.__log_size = 0
+        self.__base_size = len(record)
+        self.__saved = current
+
+    @staticmethod
+    def __meta(meta: dict) -> dict:
+        """
+        Adds the state encoder version to the training state.
+
+        Args:
+            meta (dict): The training state.
+
+        Returns:
+            dict: The training state tagged with the encoder version.
+        """
+        return {**meta, "encoder": ENCODER_VERSION}
@@ -0,0 +1,278 @@
+import os
+from typing import NamedTuple
+import numpy as np
+from ai.qtable import QTable
+
+# Defaults of the experience replay mode
+EXPERIENCE_CAPACITY = 10_000
+EXPERIENCE_BATCH_SIZE = 32
+EXPERIENCE_UPDATE_EVERY = 4
+
+# File of the transitions saved with a checkpoint, one of two alternating
+# names so that the file of the last complete checkpoint is never
+# overwritten by the next
+EXPERIENCE_FILE = "experience{}.npz"
+
+
+class ExperienceConfig(NamedTuple):
+    """
+    Settings of the experience replay mode.
+
+    Attributes:
+        capacity (int): The number of transitions kept.
+        batch_size (int): The number of transitions per update.
+        update_every (int): The number of moves between two updates.
+    """
+
+    capacity: int = EXPERIENCE_CAPACITY
+    batch_size: int = EXPERIENCE_BATCH_SIZE
+    update_every: int = EXPERIENCE_UPDATE_EVERY
+
+    def validate(self) -> None:
+        """
+        Checks that the settings are usable.
+
+        Raises:
+            ValueError: If a setting is not positive or the batch is larger
+            than the buffer.
+        """
+        if min(self) < 1:
+            raise ValueError("Experience replay settings must be positive")
+        if self.batch_size > self.capacity:
+            raise ValueError("Experience batch size exceeds the buffer size")
+
+
+class ExperienceBuffer:
+    """
+    Ring buffer of transitions replayed in minibatches.
+
+    Transitions are stored in preallocated arrays, the oldest being
+    overwritten once the buffer is full. Every `update_every` moves, a
+    minibatch is drawn uniformly from the buffer and applied to the Q-table
+    in one vectorized update, so each transition is learned from many times.
+
+    The buffer can be saved with a checkpoint and restored, so that a
+    resumed run replays the same transitions as an uninterrupted one.
+
+    Attributes:
+        __states (np.ndarray): State id before each move.
+        __actions (np.ndarray): Action index of each move.
+        __rewards (np.ndarray): Reward of each move.
+        __next_states (np.ndarray): State id after each move.
+        __done (np.ndarray): Whether each move ended the game.
+        __capacity (int): The number of transitions kept.
+        __batch_size (int): The number of transitions per update.
+        __update_every (int): The number of moves between two updates.
+        __next (int): Index where the next transition is written.
+        __size (int): The number of transitions stored.
+        __steps (int): Moves left before the next update.
+        __generator (np.random.Generator): The generator of the
+            minibatches.
+        __saves (int): The number of times the buffer was saved.
+    """
+
+    def __init__(
+        self,
+        config: ExperienceConfig,
+        seed: int | np.random.SeedSequence | None = None,
+    ):
+        """
+        Allocates an empty buffer.
+
+        Args:
+            config (ExperienceConfig): The settings of the buffer.
+            seed (int | np.random.SeedSequence | None, optional): Seed of the
+                minibatch sampling. Defaults to None.
+
+        Raises:
+            ValueError: If a setting is not positive or the batch is larger
+            than the buffer.
+        """
+        config.validate()
+
+        self.__states = np.zeros(config.capacity, dtype=np.intp)
+        self.__actions = np.zeros(config.capacity, dtype=np.intp)
+        self.__rewards = np.zeros(config.capacity, dtype=np.float64)
+        self.__next_states = np.zeros(config.capacity, dtype=np.intp)
+        self.__done = np.zeros(config.capacity, dtype=bool)
+        self.__capacity = config.capacity
+        self.__batch_size = config.batch_size
+        self.__update_every = config.update_every
+        self.__next = 0
+        self.__size = 0
+        self.__steps = config.update_every
+        self.__generator = np.random.default_rng(seed)
+        self.__saves = 0
+
+    def get_size(self) -> int:
+        """
+        Returns the number of transitions stored.
+
+        Returns:
+            int: The number of transitions, at most the capacity.
+        """
+        return self.__size
+
+    def export_state(self, directory: str) -> dict:
+        """
+        Writes the stored transitions to a file of a checkpoint directory
+        and returns the rest of the state of the buffer.
+
+        Args:
+            directory (str): The checkpoint directory.
+
+        Returns:
+            dict: The JSON-serializable state of the buffer, with the name
+            of the file of the transitions, to pass to `import_state()`.
+        """
+        self.__saves += 1
+        name = EXPERIENCE_FILE.format(self.__saves % 2)
+        path = os.path.join(directory, name)
+        size = self.__size
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(
+                file,
+                states=self.__states[:size],
+                actions=self.__actions[:size],
+                rewards=self.__rewards[:size],
+                next_states=self.__next_states[:size],
+                done=self.__done[:size],
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+
+        return {
+            "file": name,
+            "saves": self.__saves,
+            "capacity": self.__capacity,
+            "next": self.__next,
+            "size": size,
+            "steps": self.__steps,
+            "generator": self.__generator.bit_generator.state,
+        }
+
+    def import_state(self, state: dict, directory: str) -> None:
+        """
+        Puts the buffer back in a state returned by `export_state()`.
+
+        Args:
+            state (dict): The state to restore.
+            directory (str): The checkpoint directory holding the file of
+                the transitions.
+
+        Raises:
+            ValueError: If the state is invalid, its file is missing or the
+            buffer size differs from the checkpoint.
+        """
+        path = os.path.join(directory, state["file"])
+        if not os.path.exists(path):
+            raise ValueError(f"{path} is missing")
+
+        if state["capacity"] != self.__capacity:
+            raise ValueError("Experience buffer size differs from the "
+                             "checkpoint")
+
+        size = state["size"]
+
+        with np.load(path) as data:
+            self.__states[:size] = data["states"]
+            self.__actions[:size] = data["actions"]
+            self.__rewards[:size] = data["rewards"]
+            self.__next_states[:size] = data["next_states"]
+            self.__done[:size] = data["done"]
+
+        try:
+            self.__generator.bit_generator.state = state["generator"]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid experience buffer state")
+
+        self.__saves = state["saves"]
+        self.__next = state["next"]
+        self.__size = size
+        self.__steps = state["steps"]
+
+    def add(
+        self, state_id: int, action: int, reward: float,
+        next_state_id: int, done: bool,
+    ) -> None:
+        """
+        Stores a transition, overwriting the oldest one if the buffer is
+        full.
+
+        Args:
+            state_id (int): The packed state before the move.
+            action (int): The action index taken.
+            reward (float): The reward received.
+            next_state_id (int): The packed state after the move.
+            done (bool): Whether the move ended the game.
+        """
+        i = self.__next
+
+        self.__states[i] = state_id
+        self.__actions[i] = action
+        self.__rewards[i] = reward
+        self.__next_states[i] = next_state_id
+        self.__done[i] = done
+
+        self.__next = (i + 1) % self.__capacity
+        if self.__size < self.__capacity:
+            self.__size += 1
+
+    def sample(
+        self, n: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Draws N stored transitions uniformly, with replacement.
+
+        Args:
+            n (int): The number of transitions.
+
+        Returns:
+            tuple[np.ndarray, ...]: The (n,) states, actions, rewards, next
+            states and done flags.
+        """
+        i = self.__generator.integers(0, self.__size, n)
+
+        return (
+            self.__states[i], self.__actions[i], self.__rewards[i],
+            self.__next_states[i], self.__done[i],
+        )
+
+    def step(
+        self, table: QTable, state_id: int, action: int, reward: float,
+        next_state_id: int, done: bool, alpha: float, gamma: float,
+    ) -> None:
+        """
+        Stores a transition and, every `update_every` moves, applies a
+        minibatch to the Q-table.
+
+        No update happens before the buffer holds a full batch.
+
+        Args:
+            table (QTable): The Q-table to update.
+            state_id (int): The packed state before the move.
+            action (int): The action index taken.
+            reward (float): The reward received.
+            next_state_id (int): The packed state after the move.
+            done (bool): Whether the move ended the game.
+            alpha (float): The learning rate.
+            gamma (float): The discount factor.
+        """
+        self.add(state_id, action, reward, next_state_id, done)
+
+        self.__steps -= 1
+        if self.__steps:
+            return
+
+        self.__steps = self.__update_every
+        if self.__size < self.__batch_size:
+            return
+
+        states, actions, rewards, next_states, done = self.sample(
+            self.__batch_size
+        )
+        table.update_batch(states, actions, rewards, next_states, alpha,
+                           gamma, done)
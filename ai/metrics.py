@@ -0,0 +1,162 @@
+import csv
+import os
+from typing import NamedTuple
+import numpy as np
+
+# Columns of the training metrics file, one row per episode
+METRICS_COLUMNS = (
+    "episode", "length", "size", "reward", "green", "red", "epsilon",
+    "steps_per_s",
+)
+
+# Rows kept in memory before they are written
+METRICS_FLUSH_EVERY = 1000
+
+
+class EpisodeStats(NamedTuple):
+    """
+    Summary of one training episode.
+
+    Attributes:
+        length (int): The number of moves.
+        size (int): The final size of the snake.
+        reward (int): The total reward.
+        green (int): The number of green apples eaten.
+        red (int): The number of red apples eaten.
+        seconds (float): The time the episode took.
+    """
+
+    length: int
+    size: int
+    reward: int
+    green: int
+    red: int
+    seconds: float
+
+
+class MetricsWriter:
+    """
+    Streams per-episode training metrics to a CSV file.
+
+    Rows are buffered and written METRICS_FLUSH_EVERY at a time, so memory
+    stays constant whatever the number of episodes.
+
+    Attributes:
+        __file (TextIO | None): The output file, None once closed.
+        __writer (csv.writer): The CSV writer of the file.
+        __rows (list[tuple]): The rows not written yet.
+        __flush_every (int): The number of rows written at a time.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = METRICS_FLUSH_EVERY,
+        offset: int | None = None,
+    ):
+        """
+        Creates the metrics file and writes its header, or reopens it to
+        continue a resumed run.
+
+        Args:
+            path (str): The CSV file to write.
+            flush_every (int, optional): The number of rows written at a
+                time. Defaults to METRICS_FLUSH_EVERY.
+            offset (int | None, optional): The size of the file returned by
+                `sync()` at the checkpoint the run resumes from, None to
+                start a new file. Defaults to None.
+
+        Raises:
+            ValueError: If the file is shorter than the offset.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        if offset is None:
+            self.__file = open(path, "w", newline="")
+        else:
+            self.__file = open(path, "r+", newline="")
+            if self.__file.seek(0, os.SEEK_END) < offset:
+                self.__file.close()
+                raise ValueError(f"{path} is shorter than its checkpoint")
+
+            # Drop the rows of the episodes played after the checkpoint
+            self.__file.truncate(offset)
+            self.__file.seek(offset)
+
+        self.__writer = csv.writer(self.__file)
+        self.__rows = []
+        self.__flush_every = max(1, flush_every)
+
+        if offset is None:
+            self.__writer.writerow(METRICS_COLUMNS)
+
+    def add(self, episode: int, stats: EpisodeStats, epsilon: float) -> None:
+        """
+        Adds the row of a finished episode.
+
+        Args:
+            episode (int): The episode number, starting at 1.
+            stats (EpisodeStats): The summary of the episode.
+            epsilon (float): The exploration rate of the episode.
+        """
+        steps_per_s = stats.length / stats.seconds if stats.seconds else 0.0
+
+        self.__rows.append((
+            episode,
+            stats.length,
+            stats.size,
+            stats.reward,
+            stats.green,
+            stats.red,
+            f"{epsilon:.6g}",
+            f"{steps_per_s:.0f}",
+        ))
+
+        if len(self.__rows) >= self.__flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows to the file.
+        """
+        self.__writer.writerows(self.__rows)
+        self.__file.flush()
+        self.__rows = []
+
+    def sync(self) -> int:
+        """
+        Writes the buffered rows and flushes the file to disk.
+
+        Returns:
+            int: The size of the file, to resume writing it later.
+        """
+        self.flush()
+        os.fsync(self.__file.fileno())
+
+        return self.__file.tell()
+
+    def close(self) -> None:
+        """
+        Writes the remaining rows and closes the file.
+        """
+        if self.__file is None:
+            return
+
+        self.flush()
+        self.__file.close()
+        self.__file = None
+
+
+def load_metrics(path: str) -> dict[str, np.ndarray]:
+    """
+    Loads a metrics file for plotting.
+
+    Args:
+        path (str): The CSV file written by `MetricsWriter`.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column, by column name.
+    """
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+
+    return {name: data[:, i] for i, name in enumerate(METRICS_COLUMNS)}
@@ -1,17 +1,23 @@
-import csv
 import time
-import random
-import pygame
+import multiprocessing
+import numpy as np
+from collections.abc import Iterator
 import engine.settings as settings
+from engine.config import Config
 from engine.direction import Direction
 from engine.game import Game
+from engine.rng import RandomPool, spawn_seeds
 from engine.exception.gameover import GameOver
-from engine.renderer import PygameRenderer
+from ai.qtable import QTable, load_table
 from ai.utils import action
 
 
-Q = {}
+Q = QTable()
+# Settings of the games of an evaluation worker
+worker_config: Config | None = None
 past_configs = set()
+# Upper bound of the games handed to an evaluation worker at a time
+EVAL_CHUNKSIZE = 64
 loop_threshold = 15
 loop_counter = 0
 
@@ -56,7 +62,7 @@ def detect_loop(snake, action):
     return loop_counter > loop_threshold
 
 
-def break_loop(snake, world, current_direction):
+def break_loop(snake, world, current_direction, rng):
     """
     Tries to escape a detected loop by choosing a safe direction.
 
@@ -64,6 +70,7 @@ def break_loop(snake, world, current_direction):
         snake: The current snake instance.
         world: The game world.
         current_direction: The index of the current direction.
+        rng: The generator of the agent.
 
     Returns:
         Direction: A safe direction to break the loop.
@@ -77,35 +84,52 @@ def break_loop(snake, world, current_direction):
         nx = snake.get_x() + d.value[0]
         ny = snake.get_y() + d.value[1]
 
-        if (nx, ny) in world.get_empty_locations():
+        if world.get_location(nx, ny).is_empty():
             safe_directions.append(d)
 
     if safe_directions:
-        return random.choice(safe_directions)
+        return rng.choice(safe_directions)
 
     return list(Direction)[current_direction].opposite()
 
 
 def load_Q(f):
-    with open(f, "r") as file:
-        data = csv.DictReader(file)
+    global Q
 
-        for row in data:
-            state = eval(row['State'])
-            a = Direction[row['Action']].index
+    Q = load_table(f)
 
-            Q[(state, a)] = float(row['Q_Value'])
 
+def play(
+    table: QTable,
+    visual: bool,
+    step: bool,
+    seed: int | np.random.SeedSequence | None = None,
+    config: Config | None = None,
+) -> int:
+    """
+    Plays one game greedily with a Q-table.
+
+    Args:
+        table (QTable): The Q-table driving the snake.
+        visual (bool): Whether to render the game.
+        step (bool): Whether to wait for a key press between moves.
+        seed (int | np.random.SeedSequence | None, optional): Seed of the
+            game and of the agent. Defaults to None.
+        config (Config | None, optional): The settings of the game, the
+            defaults of `engine.settings` if None. Defaults to None.
 
-def play(q_file: str, visual: bool, step: bool) -> int:
-    try:
-        load_Q(q_file)
-    except KeyError:
-        print("Q file format not recognized")
-        exit(1)
+    Returns:
+        int: The final size of the snake.
+    """
+    if visual or step:
+        # Rendering modules are only loaded by the visual mode
+        import pygame
+        from engine.renderer import PygameRenderer
 
     is_last = False
-    game = Game()
+    game_seed, agent_seed = spawn_seeds(seed, 2)
+    game = Game(game_seed, config)
+    rng = RandomPool(agent_seed)
     past_configs.clear()
 
     game.start()
@@ -113,11 +137,11 @@ def play(q_file: str, visual: bool, step: bool) -> int:
     snake = game.get_snake()
 
     while not is_last:
-        s = snake.get_state()
-        a = action(Q, s, 0.0)
+        s = snake.get_state_id()
+        a = action(table, s, 0.0, rng)
 
         if detect_loop(snake, a):
-            a = break_loop(snake, game.get_world(), a).index
+            a = break_loop(snake, game.get_world(), a, rng).index
 
         try:
             snake.move(list(Direction)[a])
@@ -149,3 +173,73 @@ def play(q_file: str, visual: bool, step: bool) -> int:
                             waiting = False
 
     return snake.get_size()
+
+
+def init_worker(table: QTable, config: Config | None = None) -> None:
+    """
+    Initializes an evaluation worker process.
+
+    The table is handed over once per worker and only read afterwards.
+
+    Args:
+        table (QTable): The Q-table to evaluate.
+        config (Config | None, optional): The settings of the games, the
+            defaults of `engine.settings` if None. Defaults to None.
+    """
+    global Q, worker_config
+
+    Q = table
+    worker_config = config
+
+
+def play_headless(seed: np.random.SeedSequence) -> int:
+    """
+    Plays one game without rendering in a worker process.
+
+    Args:
+        seed (np.random.SeedSequence): Seed of the game and of the agent.
+
+    Returns:
+        int: The final size of the snake.
+    """
+    return play(Q, False, False, seed, worker_config)
+
+
+def evaluate(
+    table: QTable,
+    n: int,
+    workers: int = 1,
+    seed: int | None = None,
+    config: Config | None = None,
+) -> Iterator[int]:
+    """
+    Plays N headless games with a Q-table, on several processes if asked.
+
+    Every game gets its own seed sequence derived from `seed`, so a seeded
+    evaluation gives the same results whatever the number of workers.
+
+    Args:
+        table (QTable): The Q-table to evaluate.
+        n (int): The number of games.
+        workers (int, optional): The number of processes. Defaults to 1.
+        seed (int | None, optional): Seed of the evaluation, None for
+            different games every time. Defaults to None.
+        config (Config | None, optional): The settings of the games, the
+            defaults of `engine.settings` if None. Defaults to None.
+
+    Yields:
+        int: The final size of each game, in order.
+    """
+    seeds = spawn_seeds(seed, n)
+
+    if workers <= 1 or n == 1:
+        for game_seed in seeds:
+            yield play(table, False, False, game_seed, config)
+        return
+
+    chunksize = max(1, min(EVAL_CHUNKSIZE, n // (workers * 4)))
+
+    with multiprocessing.Pool(
+        workers, initializer=init_worker, initargs=(table, config)
+    ) as pool:
+        yield from pool.imap(play_headless, seeds, chunksize=chunksize)
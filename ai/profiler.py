@@ -0,0 +1,307 @@
+import json
+import os
+import time
+from collections import deque
+
+# Phases of the training loop, in the order they happen
+PHASES = (
+    "start", "action", "move", "replay", "state", "update", "progress",
+    "stopping", "checkpoint",
+)
+
+# Episodes whose phase times are kept for the per-episode CSV, the most
+# recent ones
+PROFILE_EPISODES = 10_000
+
+# Episodes traced by default: the last ones played, however the run ends
+TRACE_EPISODES = 5
+
+
+class NullProfiler:
+    """
+    Profiler doing nothing, used when profiling is disabled.
+    """
+
+    def is_enabled(self) -> bool:
+        """
+        Checks whether the phases are timed.
+
+        Returns:
+            bool: Always False, so that hot loops can skip their marks.
+        """
+        return False
+
+    def begin_episode(self, episode: int) -> None:
+        """
+        Does nothing, see `Profiler.begin_episode()`.
+        """
+
+    def mark(self, phase: str) -> None:
+        """
+        Does nothing, see `Profiler.mark()`.
+        """
+
+    def end_episode(self, steps: int) -> None:
+        """
+        Does nothing, see `Profiler.end_episode()`.
+        """
+
+
+class Profiler:
+    """
+    Measures the time spent in each phase of the training loop.
+
+    `mark(phase)` charges the time elapsed since the previous mark to a
+    phase, so consecutive marks split the wall time of the loop without gap.
+    Times are read from the monotonic nanosecond clock. The marks of the
+    episodes inside the trace window are also kept, to be exported as trace
+    events. Without a window, the marks of the last TRACE_EPISODES episodes
+    are kept on a rolling basis, so the trace holds the end of the run even
+    when it stops early.
+
+    Memory stays bounded whatever the length of the run: the report is
+    computed from running totals and maxima, and only the phase times of
+    the last PROFILE_EPISODES episodes are kept for the per-episode file.
+
+    Attributes:
+        __totals (dict[str, int]): Cumulative nanoseconds of each phase.
+        __slowest (dict[str, int]): Largest nanoseconds of each phase in a
+            single episode.
+        __count (int): The number of finished episodes.
+        __episode (dict[str, int]): Nanoseconds of each phase in the
+            current episode.
+        __episodes (deque[tuple[int, int, list[int]]]): The episode number,
+            steps and per-phase nanoseconds of the last PROFILE_EPISODES
+            finished episodes.
+        __window (range | None): The episode numbers to trace, None for
+            the last TRACE_EPISODES.
+        __traced (deque[tuple[int, int, int, int, list[tuple]]]): The
+            episode number, steps, beginning and end clock values and
+            `(phase, start, nanoseconds)` marks of each traced episode.
+        __marks (list[tuple[str, int, int]]): The marks of the current
+            episode, if traced.
+        __tracing (bool): Whether the current episode is traced.
+        __number (int): The current episode number.
+        __steps (int): The total number of moves.
+        __origin (int): Clock value when the profiler was created.
+        __begin (int): Clock value at the beginning of the episode.
+        __last (int): Clock value of the last mark, or of the beginning of
+            the episode.
+    """
+
+    def __init__(self, window: range | None = None):
+        """
+        Initializes a profiler.
+
+        Args:
+            window (range | None, optional): The episode numbers, starting
+                at 1, whose phases are exported as trace events, None for
+                the last TRACE_EPISODES episodes played. Defaults to None.
+        """
+        self.__totals = dict.fromkeys(PHASES, 0)
+        self.__slowest = dict.fromkeys(PHASES, 0)
+        self.__count = 0
+        self.__episode = dict.fromkeys(PHASES, 0)
+        self.__episodes = deque(maxlen=PROFILE_EPISODES)
+        self.__window = window
+        self.__traced = deque(maxlen=TRACE_EPISODES if window is None
+                              else None)
+        self.__marks = []
+        self.__tracing = False
+        self.__number = 0
+        self.__steps = 0
+        self.__origin = time.perf_counter_ns()
+        self.__begin = self.__origin
+        self.__last = self.__origin
+
+    def is_enabled(self) -> bool:
+        """
+        Checks whether the phases are timed.
+
+        Returns:
+            bool: Always True.
+        """
+        return True
+
+    def begin_episode(self, episode: int) -> None:
+        """
+        Starts measuring an episode.
+
+        Args:
+            episode (int): The episode number, starting at 1.
+        """
+        self.__number = episode
+        self.__tracing = self.__window is None or episode in self.__window
+        self.__marks = []
+        self.__episode = dict.fromkeys(PHASES, 0)
+        self.__begin = time.perf_counter_ns()
+        self.__last = self.__begin
+
+    def mark(self, phase: str) -> None:
+        """
+        Charges the time elapsed since the previous mark to a phase.
+
+        Args:
+            phase (str): The phase that just ended, one of PHASES.
+        """
+        now = time.perf_counter_ns()
+        elapsed = now - self.__last
+
+        self.__episode[phase] += elapsed
+
+        if self.__tracing:
+            self.__marks.append((phase, self.__last, elapsed))
+
+        self.__last = now
+
+    def end_episode(self, steps: int) -> None:
+        """
+        Finishes measuring an episode.
+
+        Args:
+            steps (int): The number of moves of the episode.
+        """
+        for phase, elapsed in self.__episode.items():
+            self.__totals[phase] += elapsed
+            self.__slowest[phase] = max(self.__slowest[phase], elapsed)
+
+        self.__count += 1
+        self.__steps += steps
+        self.__episodes.append(
+            (self.__number, steps, [self.__episode[p] for p in PHASES])
+        )
+
+        if self.__tracing:
+            self.__traced.append((self.__number, steps, self.__begin,
+                                  self.__last, self.__marks))
+
+    def get_totals(self) -> dict[str, int]:
+        """
+        Returns the cumulative time of each phase.
+
+        Returns:
+            dict[str, int]: Nanoseconds spent in each phase.
+        """
+        return dict(self.__totals)
+
+    def get_steps_per_second(self) -> float:
+        """
+        Returns the training speed over the measured episodes.
+
+        Returns:
+            float: The number of moves per second.
+        """
+        total = sum(self.__totals.values())
+
+        return self.__steps * 1e9 / total if total else 0.0
+
+    def report(self) -> str:
+        """
+        Formats the cumulative and per-episode time of each phase.
+
+        Returns:
+            str: The report, one line per phase.
+        """
+        total = sum(self.__totals.values()) or 1
+        episodes = self.__count or 1
+        lines = [
+            f"{'phase':<10}{'total (s)':>12}{'share':>8}"
+            f"{'mean/ep (us)':>15}{'max/ep (us)':>14}"
+        ]
+
+        for phase in PHASES:
+            elapsed = self.__totals[phase]
+            slowest = self.__slowest[phase]
+            lines.append(
+                f"{phase:<10}{elapsed / 1e9:>12.3f}{elapsed / total:>8.1%}"
+                f"{elapsed / episodes / 1000:>15.1f}{slowest / 1000:>14.1f}"
+            )
+
+        lines.append(
+            f"{self.__count} episodes, {self.__steps} steps, "
+            f"{self.get_steps_per_second():,.0f} steps/s"
+        )
+
+        return "\n".join(lines)
+
+    def write_episodes(self, path: str) -> None:
+        """
+        Writes the time of each phase of the last PROFILE_EPISODES
+        episodes to a CSV file.
+
+        Args:
+            path (str): The CSV file to write.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with open(path, "w") as file:
+            file.write(",".join(("episode", "steps", *PHASES)) + "\n")
+
+            for episode, steps, times in self.__episodes:
+                file.write(",".join(map(str, (episode, steps, *times))))
+                file.write("\n")
+
+    def write_trace(self, path: str) -> None:
+        """
+        Writes the traced episodes in the Chrome trace event format, which
+        chrome://tracing and Perfetto can open.
+
+        Args:
+            path (str): The JSON file to write.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        events = []
+
+        for episode, steps, begin, end, marks in self.__traced:
+            events.append({
+                "name": f"episode {episode}",
+                "ph": "X",
+                "ts": (begin - self.__origin) / 1000,
+                "dur": (end - begin) / 1000,
+                "pid": 1,
+                "tid": 0,
+                "args": {"steps": steps},
+            })
+            events.extend({
+                "name": phase,
+                "ph": "X",
+                "ts": (start - self.__origin) / 1000,
+                "dur": elapsed / 1000,
+                "pid": 1,
+                "tid": 1,
+                "args": {"episode": episode},
+            } for phase, start, elapsed in marks)
+
+        with open(path, "w") as file:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ns",
+            }, file)
+
+
+def parse_window(window: str | None) -> range | None:
+    """
+    Parses a trace window written as START:COUNT.
+
+    Args:
+        window (str | None): The window, e.g. "100:5", or None for the last
+            TRACE_EPISODES episodes of the run.
+
+    Returns:
+        range | None: The episode numbers to trace, starting at 1, or None
+        for the last episodes.
+
+    Raises:
+        ValueError: If the window is not recognized.
+    """
+    if window is None:
+        return None
+
+    start, _, count = window.partition(":")
+
+    if not start.isdigit() or not count.isdigit() or int(start) < 1:
+        raise ValueError(
+            f"Invalid trace window '{window}' (expected START:COUNT)"
+        )
+
+    return range(int(start), int(start) + int(count))
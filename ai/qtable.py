@@ -0,0 +1,437 @@
+import csv
+import os
+import struct
+import numpy as np
+from engine.direction import Direction
+from engine.state import (
+    ENCODER_VERSION, STATE_COUNT, STATE_SIZE, pack_state, unpack_state
+)
+
+# Q-value of the (state, action) pairs never updated yet
+DEFAULT_Q_VALUE = 10.0
+
+# Binary Q-table file format
+BINARY_EXTENSION = ".qtable"
+BINARY_MAGIC = b"L2SQ"
+BINARY_VERSION = 1
+BINARY_DATA_OFFSET = 64
+# magic, format version, encoder version, states, actions, 4 action names
+BINARY_HEADER = struct.Struct("<4sHHII8s8s8s8s")
+
+
+class QTable:
+    """
+    Dense Q-table indexed by packed state id and action index.
+
+    Attributes:
+        values (np.ndarray): (4096, 4) float Q-values.
+        visited (np.ndarray): (4096, 4) bool mask of the pairs that were set
+            at least once, the ones written back when saving.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray | None = None,
+        visited: np.ndarray | None = None,
+    ):
+        """
+        Initializes a Q-table, filled with the default value if no arrays are
+        given.
+
+        Args:
+            values (np.ndarray | None, optional): (4096, 4) float array to use
+                as storage. Defaults to None.
+            visited (np.ndarray | None, optional): (4096, 4) bool array to use
+                as storage. Defaults to None.
+        """
+        shape = (STATE_COUNT, len(Direction))
+
+        if values is None:
+            values = np.full(shape, DEFAULT_Q_VALUE, dtype=np.float64)
+        if visited is None:
+            visited = np.zeros(shape, dtype=bool)
+
+        if values.shape != shape or visited.shape != shape:
+            raise ValueError(f"Q-table arrays must have shape {shape}")
+
+        self.values = values
+        self.visited = visited
+
+    @classmethod
+    def from_dict(cls, q: dict) -> "QTable":
+        """
+        Builds a Q-table from a `{(state tuple, action): value}` dict.
+
+        Args:
+            q (dict): The dict mapping (state, action) pairs to Q-values.
+
+        Returns:
+            QTable: The equivalent Q-table.
+        """
+        table = cls()
+
+        for (state, a), value in q.items():
+            table.set(pack_state(state), a, value)
+
+        return table
+
+    def to_dict(self) -> dict:
+        """
+        Converts the visited pairs to a `{(state tuple, action): value}` dict.
+
+        Returns:
+            dict: The dict mapping (state, action) pairs to Q-values.
+        """
+        return {
+            (tuple(unpack_state(int(s))), int(a)): float(self.values[s, a])
+            for s, a in zip(*np.nonzero(self.visited))
+        }
+
+    def get(self, state_id: int, action: int) -> float:
+        """
+        Retrieves the Q-value of a (state, action) pair.
+
+        Args:
+            state_id (int): The packed state id.
+            action (int): The action index.
+
+        Returns:
+            float: The Q-value, or DEFAULT_Q_VALUE if never set.
+        """
+        return float(self.values[state_id, action])
+
+    def set(self, state_id: int, action: int, value: float) -> None:
+        """
+        Sets the Q-value of a (state, action) pair.
+
+        Args:
+            state_id (int): The packed state id.
+            action (int): The action index.
+            value (float): The new Q-value.
+        """
+        self.values[state_id, action] = value
+        self.visited[state_id, action] = True
+
+    def best_action(self, state_id: int) -> int:
+        """
+        Returns the action with the highest Q-value in a state.
+
+        Ties go to the lowest action index.
+
+        Args:
+            state_id (int): The packed state id.
+
+        Returns:
+            int: The best action index.
+        """
+        return int(self.values[state_id].argmax())
+
+    def best_value(self, state_id: int) -> float:
+        """
+        Returns the highest Q-value of a state.
+
+        Args:
+            state_id (int): The packed state id.
+
+        Returns:
+            float: The highest Q-value.
+        """
+        return float(self.values[state_id].max())
+
+    def best_actions(self, state_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the best action of each state of a batch.
+
+        Args:
+            state_ids (np.ndarray): (n,) packed state ids.
+
+        Returns:
+            np.ndarray: (n,) best action indexes.
+        """
+        return self.values[state_ids].argmax(axis=1)
+
+    def update(
+        self,
+        state_id: int,
+        action: int,
+        reward: float,
+        next_state_id: int,
+        alpha: float,
+        gamma: float,
+    ) -> float:
+        """
+        Applies the Q-learning update rule to one transition.
+
+        Args:
+            state_id (int): The packed state before the move.
+            action (int): The action index taken.
+            reward (float): The reward received.
+            next_state_id (int): The packed state after the move.
+            alpha (float): The learning rate.
+            gamma (float): The discount factor.
+
+        Returns:
+            float: The new Q-value.
+        """
+        row = self.values[state_id]
+        target = reward + gamma * self.values[next_state_id].max()
+        value = (1 - alpha) * row[action] + alpha * target
+
+        row[action] = value
+        self.visited[state_id, action] = True
+
+        return float(value)
+
+    def update_batch(
+        self,
+        state_ids: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        next_state_ids: np.ndarray,
+        alpha: float,
+        gamma: float,
+        done: np.ndarray | None = None,
+    ) -> None:
+        """
+        Applies the Q-learning update rule to a batch of transitions at once.
+
+        Targets are computed from the table before the update; when a pair
+        appears several times in the batch, the last transition wins.
+
+        Args:
+            state_ids (np.ndarray): (n,) packed states before the moves.
+            actions (np.ndarray): (n,) action indexes taken.
+            rewards (np.ndarray): (n,) rewards received.
+            next_state_ids (np.ndarray): (n,) packed states after the moves.
+            alpha (float): The learning rate.
+            gamma (float): The discount factor.
+            done (np.ndarray | None, optional): (n,) flags of the moves that
+                ended the game, whose target is the reward alone. Defaults
+                to None, bootstrapping every transition.
+        """
+        future = self.values[next_state_ids].max(axis=1)
+        if done is not None:
+            future[done] = 0.0
+
+        targets = rewards + gamma * future
+        current = self.values[state_ids, actions]
+
+        self.values[state_ids, actions] = (
+            (1 - alpha) * current + alpha * targets
+        )
+        self.visited[state_ids, actions] = True
+
+
+def parse_state(text: str) -> tuple[bool, ...]:
+    """
+    Parses a state written as a tuple of booleans, e.g. "(True, False)".
+
+    Args:
+        text (str): The state as written in the CSV files.
+
+    Returns:
+        tuple[bool, ...]: The parsed state.
+
+    Raises:
+        ValueError: If the text is not a tuple of booleans.
+    """
+    values = {"True": True, "False": False}
+    items = text.strip().removeprefix("(").removesuffix(")").split(",")
+
+    try:
+        return tuple(values[item.strip()] for item in items if item.strip())
+    except KeyError:
+        raise ValueError(f"Invalid state: {text}")
+
+
+def load_csv(path: str) -> QTable:
+    """
+    Loads a Q-table from a CSV file with State, Action and Q_Value columns.
+
+    Args:
+        path (str): The CSV file to read.
+
+    Returns:
+        QTable: The loaded Q-table.
+
+    Raises:
+        ValueError: If the file format is not recognized.
+    """
+    table = QTable()
+
+    with open(path, "r", newline="") as file:
+        try:
+            for row in csv.DictReader(file):
+                state = parse_state(row['State'])
+                a = Direction[row['Action']].index
+
+                if len(state) != STATE_SIZE:
+                    raise ValueError(f"Invalid state: {row['State']}")
+
+                table.set(pack_state(state), a, float(row['Q_Value']))
+        except KeyError:
+            raise ValueError("Q file format not recognized")
+
+    return table
+
+
+def save_csv(table: QTable, path: str) -> None:
+    """
+    Saves the visited pairs of a Q-table to a CSV file.
+
+    The file is written next to its destination and renamed over it, so an
+    interrupted save never leaves a truncated table.
+
+    Args:
+        table (QTable): The Q-table to save.
+        path (str): The CSV file to write.
+    """
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["State", "Action", "Q_Value"])
+
+        for (state, a), q_value in table.to_dict().items():
+            writer.writerow([state, list(Direction)[a].name, q_value])
+
+    os.replace(tmp_path, path)
+
+
+def is_binary(path: str) -> bool:
+    """
+    Checks whether a file is a binary Q-table.
+
+    Args:
+        path (str): The file to check.
+
+    Returns:
+        bool: True if the file starts with the binary Q-table magic.
+    """
+    with open(path, "rb") as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def load_binary(path: str) -> QTable:
+    """
+    Loads a binary Q-table by memory-mapping its arrays.
+
+    The mapping is copy-on-write: the table can be updated in memory without
+    touching the file.
+
+    Args:
+        path (str): The binary Q-table file.
+
+    Returns:
+        QTable: The loaded Q-table.
+
+    Raises:
+        ValueError: If the file is not a binary Q-table, or was written for
+        another state encoder.
+    """
+    with open(path, "rb") as file:
+        header = file.read(BINARY_HEADER.size)
+
+    if len(header) < BINARY_HEADER.size:
+        raise ValueError("Q file format not recognized")
+
+    magic, version, encoder, states, actions, *names = (
+        BINARY_HEADER.unpack(header)
+    )
+
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Q file format not recognized")
+    if encoder != ENCODER_VERSION:
+        raise ValueError(
+            f"Q file was written for state encoder v{encoder}, "
+            f"expected v{ENCODER_VERSION}"
+        )
+    if states != STATE_COUNT or actions != len(Direction):
+        raise ValueError("Q file format not recognized")
+
+    shape = (STATE_COUNT, len(Direction))
+    values = np.memmap(path, dtype="<f8", mode="c",
+                       offset=BINARY_DATA_OFFSET, shape=shape)
+    visited = np.memmap(path, dtype=np.bool_, mode="c",
+                        offset=BINARY_DATA_OFFSET + values.nbytes,
+                        shape=shape)
+
+    # Reorder the columns if the file lists the actions in another order
+    try:
+        order = [
+            Direction[name.rstrip(b"\0").decode()].index for name in names
+        ]
+    except (KeyError, UnicodeDecodeError):
+        raise ValueError("Q file format not recognized")
+
+    if order != list(range(len(Direction))):
+        columns = np.argsort(order)
+        values = np.ascontiguousarray(values[:, columns])
+        visited = np.ascontiguousarray(visited[:, columns])
+
+    return QTable(values, visited)
+
+
+def save_binary(table: QTable, path: str) -> None:
+    """
+    Saves a Q-table in the binary format.
+
+    The file is written next to its destination and renamed over it, so a
+    table still memory-mapped from the same path is never truncated.
+
+    Layout: a fixed header (magic, format version, encoder version, table
+    shape, action names in column order), padded to BINARY_DATA_OFFSET, then
+    the little-endian float64 values and the visited mask, row-major.
+
+    Args:
+        table (QTable): The Q-table to save.
+        path (str): The file to write.
+    """
+    header = BINARY_HEADER.pack(
+        BINARY_MAGIC,
+        BINARY_VERSION,
+        ENCODER_VERSION,
+        STATE_COUNT,
+        len(Direction),
+        *(d.name.encode() for d in Direction),
+    )
+
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "wb") as file:
+        file.write(header.ljust(BINARY_DATA_OFFSET, b"\0"))
+        file.write(np.ascontiguousarray(table.values, dtype="<f8").tobytes())
+        file.write(np.ascontiguousarray(table.visited, dtype=bool).tobytes())
+
+    os.replace(tmp_path, path)
+
+
+def load_table(path: str) -> QTable:
+    """
+    Loads a Q-table, detecting whether the file is binary or CSV.
+
+    Args:
+        path (str): The Q-table file.
+
+    Returns:
+        QTable: The loaded Q-table.
+    """
+    if is_binary(path):
+        return load_binary(path)
+
+    return load_csv(path)
+
+
+def save_table(table: QTable, path: str) -> None:
+    """
+    Saves a Q-table, in the binary format if the path ends with
+    BINARY_EXTENSION and in CSV otherwise.
+
+    Args:
+        table (QTable): The Q-table to save.
+        path (str): The file to write.
+    """
+    if path.endswith(BINARY_EXTENSION):
+        save_binary(table, path)
+    else:
+        save_csv(table, path)
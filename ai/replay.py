@@ -1,52 +1,52 @@
+from engine.config import Config
 from engine.game import Game
 from engine.entity.apple import Apple
 from engine.entity.snake import Snake
 from engine.direction import Direction
-from engine.renderer import PygameRenderer
+from engine.exception.gameover import GameOver
 import engine.settings as settings
+from ai.replay_file import ReplayReader, ReplayWriter, is_replay_file
+from collections.abc import Iterator
+import heapq
 import json
-import time
 import os
-import pygame
+from collections import deque
+import time
 
-# Global storage for recorded gameplay
-replay_storage = []
-replay_data = []
+# Sampling policies of the replay recorder
+POLICIES = ("off", "every", "last", "top")
 
+# Frames between two keyframes of the replay player
+KEYFRAME_INTERVAL = 64
 
-def reset_replay():
-    """
-    Saves the current replay data to the replay storage and resets the current
-    replay buffer.
+# Frames skipped by the page up and page down keys of the replay player
+SEEK_JUMP = 100
 
-    This is typically called at the end of a game episode to archive the
-    episode's data.
-    """
-    global replay_data
 
-    if len(replay_data) > 0:
-        replay_storage.append(replay_data)
-    replay_data = []
-
-
-def save_game_state(game: Game, direction: Direction):
+def capture_state(game: Game, direction: Direction) -> dict:
     """
-    Save the current game state along with the snake's direction.
+    Captures the current game state along with the snake's direction.
 
-    Captures the snake's head position, body, and all apples on the map,
-    including their color, and appends this data to the global replay log.
+    Records the snake's head position, body, and all apples on the map,
+    including their color.
 
     Args:
         game (Game): The current game instance to record.
         direction (Direction): The current direction of the snake.
+
+    Returns:
+        dict: The recorded step.
     """
 
+    world = game.get_world()
     data = {
         "direction": direction.name,
         "apples": [],
+        "width": world.get_width(),
+        "height": world.get_height(),
     }
 
-    for entity in game.get_world().get_entities():
+    for entity in world.get_entities():
         if isinstance(entity, Apple):
             apple = (entity.get_x(), entity.get_y(), entity.is_green())
 
@@ -55,79 +55,800 @@ def save_game_state(game: Game, direction: Direction):
             data["head"] = entity.get_position()
             data["body"] = list(entity.get_body())
 
-    replay_data.append(data)
+    return data
+
+
+def apple_positions(game: Game) -> list[tuple[int, int]]:
+    """
+    Returns the positions of the apples of a game, in entity order.
+
+    Args:
+        game (Game): The game.
+
+    Returns:
+        list[tuple[int, int]]: The (x, y) position of each apple.
+    """
+    return [
+        entity.get_position()
+        for entity in game.get_world().get_entities()
+        if isinstance(entity, Apple)
+    ]
+
+
+def restore_state(state: dict) -> Game:
+    """
+    Builds a game from a state recorded by `capture_state()`.
+
+    States recorded before the grid size was saved use the size of the
+    settings.
+
+    Args:
+        state (dict): The recorded state.
+
+    Returns:
+        Game: A game in that state.
+    """
+    config = Config()
+    if "height" in state:
+        config = config._replace(height=state["height"], width=state["width"])
+
+    game = Game(config=config)
+
+    game.set_snake(tuple(state["head"]), [tuple(b) for b in state["body"]])
+    game.set_apples(state["apples"])
+    game.get_snake().set_last_direction(Direction[state["direction"]])
+
+    return game
 
 
-def create_replay(filename: str):
+def apply_action(
+    game: Game, action: int, spawn: tuple[int, int] | None = None
+) -> tuple[int, bool]:
     """
-    Save the full replay data to a JSON file for future playback.
+    Moves the snake of a game, optionally forcing where the apple it eats
+    respawns.
+
+    Args:
+        game (Game): The game to advance.
+        action (int): The direction index of the move.
+        spawn (tuple[int, int] | None, optional): Position given to the eaten
+            apple instead of a random one. Defaults to None.
+
+    Returns:
+        tuple[int, bool]: The reward of the move and whether the game ended.
+    """
+    snake = game.get_snake()
+    world = game.get_world()
+    direction = list(Direction)[action]
+    dx, dy = direction.value
+    eaten = world.get_entity_at(snake.get_x() + dx, snake.get_y() + dy)
+
+    try:
+        reward = snake.move(direction)
+    except GameOver:
+        return game.get_config().gameover_reward, True
+
+    if spawn is not None and isinstance(eaten, Apple):
+        world.remove_entity(eaten)
+        eaten.teleport(*spawn)
+        world.add_entity(eaten)
+
+    return reward, False
+
+
+class EpisodeLog:
+    """
+    Records one episode as its seed, initial state and action sequence.
+
+    The positions where eaten apples respawn are kept too (a few per
+    episode), so that the replay does not depend on the random generator
+    of the engine: re-simulating the actions from the initial state rebuilds
+    every frame.
+
+    Attributes:
+        __seed (int | None): The seed the game was started with, None if
+            unknown.
+        __init (dict | None): The initial state, see `capture_state()`.
+        __actions (list[str]): The direction index of each move.
+        __spawns (list[list[int]]): `[move, x, y]` of each apple respawn.
+        __apples (list[tuple[int, int]]): The apple positions after the last
+            move.
+        __reward (int): The total reward of the episode.
+        __max_size (int): The largest size reached by the snake.
+    """
+
+    def __init__(self, seed: int | None = None):
+        """
+        Initializes an empty episode log.
+
+        Args:
+            seed (int | None, optional): The seed the game is started with.
+                Defaults to None.
+        """
+        self.__seed = seed
+        self.__init = None
+        self.__actions = []
+        self.__spawns = []
+        self.__apples = []
+        self.__reward = 0
+        self.__max_size = 0
+
+    def get_seed(self) -> int | None:
+        """
+        Returns the seed the game has to be started with.
+
+        Returns:
+            int | None: The seed of the episode.
+        """
+        return self.__seed
+
+    def start(self, game: Game) -> None:
+        """
+        Records the initial state of the game.
+
+        Args:
+            game (Game): The freshly started game.
+        """
+        snake = game.get_snake()
+
+        self.__init = capture_state(game, snake.get_last_direction())
+        self.__apples = apple_positions(game)
+        self.__max_size = snake.get_size()
+
+    def step(self, game: Game, action: int, reward: int) -> None:
+        """
+        Records one move.
+
+        Args:
+            game (Game): The game, after the move.
+            action (int): The direction index of the move.
+            reward (int): The reward of the move.
+        """
+        self.__actions.append(str(action))
+        self.__reward += reward
+        self.__max_size = max(self.__max_size, game.get_snake().get_size())
+
+        # Apples only move when eaten
+        if reward == game.get_config().eat_nothing_reward:
+            return
+
+        apples = apple_positions(game)
+
+        for position in apples:
+            if position not in self.__apples:
+                self.__spawns.append([len(self.__actions) - 1, *position])
+
+        self.__apples = apples
+
+    def to_dict(self, episode: int) -> dict:
+        """
+        Returns the record of the episode, as stored in replay files.
+
+        Args:
+            episode (int): The episode number, starting at 1.
+
+        Returns:
+            dict: The episode record.
+        """
+        return {
+            "episode": episode,
+            "seed": self.__seed,
+            "init": self.__init,
+            "actions": "".join(self.__actions),
+            "spawns": self.__spawns,
+            "length": len(self.__actions),
+            "max_size": self.__max_size,
+            "reward": self.__reward,
+        }
+
+
+def convert_episode(steps: list[dict], episode: int) -> dict:
+    """
+    Converts the frames of a legacy replay episode into a record.
+
+    The first frame becomes the initial state. Each following frame must be
+    reached by re-simulating its direction, otherwise the conversion fails.
+
+    Args:
+        steps (list[dict]): The frames of the episode, see `capture_state()`.
+        episode (int): The episode number, starting at 1.
+
+    Returns:
+        dict: The episode record. Legacy episodes have no seed.
+
+    Raises:
+        ValueError: If a frame cannot be reproduced.
+    """
+    game = restore_state(steps[0])
+    log = EpisodeLog()
+    log.start(game)
+
+    for i, frame in enumerate(steps[1:], start=1):
+        before = set(apple_positions(game))
+        spawn = [tuple(a[:2]) for a in frame["apples"]
+                 if tuple(a[:2]) not in before]
+        a = Direction[frame["direction"]].index
+
+        reward, done = apply_action(game, a, spawn[0] if spawn else None)
+        log.step(game, a, reward)
+
+        snake = game.get_snake()
+        body = [tuple(b) for b in frame["body"]]
+        apples = {tuple(a[:2]) for a in frame["apples"]}
+
+        if snake.get_position() != tuple(frame["head"]) \
+                or list(snake.get_body()) != body \
+                or set(apple_positions(game)) != apples:
+            raise ValueError(
+                f"Episode {episode}: frame {i} does not follow the rules"
+            )
+
+        if done:
+            break
+
+    return log.to_dict(episode)
 
-    The file is stored in the "replay" directory using the given filename.
+
+def convert_replay(src: str, dst: str) -> int:
+    """
+    Converts a legacy JSON (or JSON Lines) replay into a compact replay file.
 
     Args:
-        filename (str): Name of the output JSON file (without extension).
+        src (str): The legacy replay file.
+        dst (str): The compact replay file to write.
+
+    Returns:
+        int: The number of converted episodes.
     """
+    writer = ReplayWriter(dst)
+    episodes = 0
 
-    if not os.path.exists("replay"):
-        os.makedirs("replay")
+    try:
+        for number, steps in load_legacy(src):
+            if steps:
+                writer.write(convert_episode(steps, number))
+                episodes += 1
+    finally:
+        writer.close()
 
-    with open(f"replay/{filename}.json", "w") as f:
-        json.dump(replay_storage, f)
+    return episodes
 
 
-def play_replay(replay_file: str, ep: int = 0, step: bool = False) -> None:
+class ReplayPolicy:
     """
-    Loads and replays the recorded gameplay from the JSON file.
+    Sampling policy deciding which training episodes end up in the replay.
+
+    Written as "off", "every:K" (every K-th episode), "last:N" (the last N
+    episodes played, however the run ends) or "top:K" (the K episodes
+    reaching the largest snake).
 
-    Renders each step of each episode with a short delay to simulate playback.
+    Attributes:
+        name (str): The policy name, one of POLICIES.
+        value (int): The policy parameter (K or N), 0 for "off".
+    """
+
+    def __init__(self, policy: str):
+        """
+        Parses a sampling policy.
+
+        Args:
+            policy (str): The policy, e.g. "every:10".
+
+        Raises:
+            ValueError: If the policy is not recognized.
+        """
+        name, _, value = policy.partition(":")
+
+        if name == "off" and not value:
+            value = "0"
+        elif name not in POLICIES or not value.isdigit() or int(value) < 1:
+            raise ValueError(
+                f"Invalid replay policy '{policy}' "
+                "(expected off, every:K, last:N or top:K)"
+            )
+
+        self.name = name
+        self.value = int(value)
+
+    def wants(self, episode: int) -> bool:
+        """
+        Tells whether the steps of an episode need to be recorded.
+
+        Args:
+            episode (int): The episode number, starting at 1.
+
+        Returns:
+            bool: True if the episode may be kept by the policy.
+        """
+        if self.name == "every":
+            return (episode - 1) % self.value == 0
+
+        # Any episode may turn out to be among the last or the best ones
+        return self.name in ("last", "top")
+
+
+class ReplayRecorder:
+    """
+    Streams the recorded training episodes to a compact replay file.
+
+    Each episode is stored as the record returned by `EpisodeLog.to_dict()`.
+    Only the episodes selected by the sampling policy are kept. "every:K"
+    episodes are written as soon as they end; the "last" and "top" policies
+    keep at most N (or K) episodes in memory, the last N on a rolling basis,
+    and write them when the recorder is closed, whether the training ran
+    all its episodes or stopped early.
+
+    For a resumed run, the held-back episodes are saved by `export_state()`
+    to a side file next to the replay file, rewritten only when they
+    changed since the previous checkpoint. The side files alternate between
+    two names, so the one of the last completed checkpoint is never
+    overwritten by the next.
+
+    Attributes:
+        __path (str): The replay file.
+        __policy (ReplayPolicy): The sampling policy.
+        __writer (ReplayWriter | None): The output file, None once closed or
+            with the "off" policy.
+        __last (deque[dict]): The episodes held back by the "last" policy.
+        __top (list[tuple[int, int, dict]]): Min-heap of the episodes held
+            back by the "top" policy, as (max size, episode, record).
+        __held (int): The number of the side file holding the episodes held
+            back, 0 before the first one is written.
+        __changed (bool): Whether the episodes held back changed since the
+            side file was written.
+    """
+
+    def __init__(
+        self, path: str, policy: ReplayPolicy, resume: dict | None = None
+    ):
+        """
+        Initializes a recorder and creates its output file, or continues
+        the file of a resumed run.
+
+        Args:
+            path (str): The replay file to write.
+            policy (ReplayPolicy): The sampling policy.
+            resume (dict | None, optional): The state returned by
+                `export_state()` at the checkpoint the run resumes from, None
+                to start a new file. Defaults to None.
+
+        Raises:
+            ValueError: If the replay file or the side file of the resumed
+            run is missing or shorter than its checkpoint.
+        """
+        self.__path = path
+        self.__policy = policy
+        self.__last = deque(maxlen=policy.value or None)
+        self.__top = []
+        self.__writer = None
+        self.__held = 0
+        self.__changed = False
+
+        if policy.name == "off":
+            return
+
+        if resume is None:
+            self.__writer = ReplayWriter(path)
+            return
+
+        self.__writer = ReplayWriter(path, resume["offset"])
+        self.__held = resume["held"]
+        if not self.__held:
+            return
+
+        held = self.__held_path(self.__held)
+        if not os.path.exists(held):
+            raise ValueError(f"{held} is missing")
+
+        with ReplayReader(held) as reader:
+            for record in reader:
+                if policy.name == "last":
+                    self.__last.append(record)
+                else:
+                    self.__top.append(
+                        (record["max_size"], record["episode"], record)
+                    )
+        heapq.heapify(self.__top)
+
+    def get_policy(self) -> ReplayPolicy:
+        """
+        Returns the sampling policy of the recorder.
+
+        Returns:
+            ReplayPolicy: The sampling policy.
+        """
+        return self.__policy
+
+    def add_episode(self, episode: int, record: dict | None) -> None:
+        """
+        Hands a finished episode to the recorder.
+
+        Args:
+            episode (int): The episode number, starting at 1.
+            record (dict | None): The episode record, or None if the episode
+                was not recorded.
+        """
+        if record is None or not self.__policy.wants(episode):
+            return
+
+        kept = (record["max_size"], episode, record)
+
+        if self.__policy.name == "every":
+            self.__writer.write(record)
+        elif self.__policy.name == "last":
+            self.__last.append(record)
+            self.__changed = True
+        elif len(self.__top) < self.__policy.value:
+            # Min-heap on (score, episode): the root is the first to drop
+            heapq.heappush(self.__top, kept)
+            self.__changed = True
+        elif heapq.heappushpop(self.__top, kept) is not kept:
+            self.__changed = True
+
+    def export_state(self) -> dict | None:
+        """
+        Flushes the replay file and returns what a resumed run needs to
+        continue it: its size and the number of the side file holding the
+        episodes held back by the policy.
+
+        Returns:
+            dict | None: The JSON-serializable state of the recorder, None
+            with the "off" policy.
+        """
+        if self.__writer is None:
+            return None
+
+        if self.__changed:
+            self.__held += 1
+            self.__write_held(self.__held_path(self.__held))
+            self.__changed = False
+
+        return {"offset": self.__writer.sync(), "held": self.__held}
+
+    def __held_path(self, number: int) -> str:
+        """
+        Returns the side file of the episodes held back.
+
+        Args:
+            number (int): The number of the side file.
+
+        Returns:
+            str: The path of the side file, one of two alternating names.
+        """
+        return f"{self.__path}.held{number % 2}"
+
+    def __write_held(self, path: str) -> None:
+        """
+        Writes the episodes held back by the policy to a side file, in the
+        format of the replay file, replacing it atomically.
+
+        Args:
+            path (str): The side file.
+        """
+        tmp = path + ".tmp"
+        writer = ReplayWriter(tmp)
+
+        for record in self.__held_records():
+            writer.write(record)
+        writer.sync()
+        writer.close()
+
+        os.replace(tmp, path)
+
+    def __held_records(self) -> list[dict]:
+        """
+        Returns the episodes held back by the policy, in episode order for
+        the "top" policy.
+
+        Returns:
+            list[dict]: The episode records.
+        """
+        top = sorted(self.__top, key=lambda kept: kept[1])
+
+        return [*self.__last, *(record for _, _, record in top)]
+
+    def close(self) -> None:
+        """
+        Writes the episodes held back by the policy and closes the file.
+        """
+        if self.__writer is None:
+            return
+
+        for record in self.__held_records():
+            self.__writer.write(record)
+
+        self.__last.clear()
+        self.__top = []
+        self.__writer.close()
+        self.__writer = None
+
+
+def load_legacy(replay_file: str) -> Iterator[tuple[int, list[dict]]]:
+    """
+    Reads the frames of the episodes of a legacy replay file.
+
+    Supports the JSON files holding a list of episodes as well as the JSON
+    Lines files with one `{"episode", "steps"}` object per line.
+
+    Args:
+        replay_file (str): The legacy replay file.
+
+    Yields:
+        tuple[int, list[dict]]: The episode number, starting at 1, and its
+        frames.
     """
     with open(replay_file, "r") as f:
-        all_replay = json.load(f)
-
-    if ep - 1 > len(all_replay):
-        print("Episode {} out of {}".format(ep, len(all_replay)))
-        return
-
-    if ep > 0:
-        all_replay = [all_replay[ep - 2]]
-
-    for i, episode in enumerate(all_replay):
-        for replay in episode:
-            game = Game()
-
-            body = [tuple(b) for b in replay["body"]]
-
-            game.set_snake(replay["head"], body)
-            game.set_apples(replay["apples"])
-
-            game.get_snake().set_last_direction(Direction[replay["direction"]])
-
-            title = f"Episode {str(ep == 0 if i else ep)}"
-
-            game.get_world().render(title)
-
-            if step:
-                waiting = True
-                while waiting:
-                    for event in pygame.event.get():
-                        if event.type == pygame.QUIT:
-                            PygameRenderer.quit()
-                            return
-                        if event.type == pygame.KEYDOWN:
-                            if event.key == pygame.K_q:
-                                PygameRenderer.quit()
-                                return
-                            waiting = False
-            else:
-                pygame.event.pump()
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        PygameRenderer.quit()
-                        return
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_q:
-                            PygameRenderer.quit()
-                            return
-
-                time.sleep(settings.SPEED)
+        first = f.read(1)
+        f.seek(0)
+
+        if first == "[":
+            yield from enumerate(json.load(f), start=1)
+            return
+
+        for line in f:
+            record = json.loads(line)
+            yield record["episode"], record["steps"]
+
+
+def load_records(replay_file: str, ep: int = 0) -> list[dict]:
+    """
+    Loads episode records from a replay file.
+
+    A compact replay file is read through its index, so that a single
+    episode is read without going through the others. Legacy JSON replays
+    are converted on the fly.
+
+    Args:
+        replay_file (str): The replay file.
+        ep (int, optional): The episode number to load, starting at 1, or 0
+            for all of them. Defaults to 0.
+
+    Returns:
+        list[dict]: The records of the selected episodes.
+
+    Raises:
+        ValueError: If the episode is not in the file.
+    """
+    if is_replay_file(replay_file):
+        with ReplayReader(replay_file) as reader:
+            return list(reader) if ep == 0 else [reader.read(ep)]
+
+    records = [
+        convert_episode(steps, number)
+        for number, steps in load_legacy(replay_file)
+        if steps and ep in (0, number)
+    ]
+
+    if ep > 0 and not records:
+        raise ValueError("Episode {} not recorded".format(ep))
+
+    return records
+
+
+class ReplayPlayer:
+    """
+    Plays an episode record back on a single game.
+
+    Moving forward applies one recorded action per frame. Keyframes of the
+    game state are taken every `keyframe_interval` frames when the player
+    is created, so seeking to any frame restores the closest keyframe and
+    re-applies at most `keyframe_interval - 1` actions.
+
+    Attributes:
+        __record (dict): The episode record.
+        __actions (list[int]): The direction index of each move.
+        __spawns (dict[int, tuple[int, int]]): The forced apple respawns, by
+            move.
+        __interval (int): The number of frames between two keyframes.
+        __keyframes (list[GameSnapshot]): The game state every
+            `__interval` frames.
+        __game (Game): The game the frames are played on.
+        __frame (int): The current frame, 0 being the initial state.
+    """
+
+    def __init__(
+        self, record: dict, keyframe_interval: int = KEYFRAME_INTERVAL
+    ):
+        """
+        Initializes a player on the first frame of an episode.
+
+        Args:
+            record (dict): The episode record, see `EpisodeLog.to_dict()`.
+            keyframe_interval (int, optional): The number of frames between
+                two keyframes. Defaults to KEYFRAME_INTERVAL.
+        """
+        if keyframe_interval < 1:
+            raise ValueError("Keyframe interval must be greater than 0")
+
+        self.__record = record
+        self.__actions = [int(a) for a in record["actions"]]
+        self.__spawns = {move: (x, y) for move, x, y in record["spawns"]}
+        self.__interval = keyframe_interval
+        self.__keyframes = []
+
+        self.__game = restore_state(record["init"])
+        self.__frame = 0
+
+        for frame in range(self.get_frame_count()):
+            if frame % keyframe_interval == 0:
+                self.__keyframes.append(self.__game.snapshot())
+            if frame < len(self.__actions):
+                self.__advance()
+
+        self.__game.restore(self.__keyframes[0])
+        self.__frame = 0
+
+    def get_record(self) -> dict:
+        """
+        Returns the episode record being played.
+
+        Returns:
+            dict: The episode record.
+        """
+        return self.__record
+
+    def get_game(self) -> Game:
+        """
+        Returns the game showing the current frame.
+
+        Returns:
+            Game: The game, updated in place by the player.
+        """
+        return self.__game
+
+    def get_frame(self) -> int:
+        """
+        Returns the current frame.
+
+        Returns:
+            int: The current frame, 0 being the initial state.
+        """
+        return self.__frame
+
+    def get_frame_count(self) -> int:
+        """
+        Returns the number of frames of the episode.
+
+        Returns:
+            int: The number of frames, initial state included.
+        """
+        return len(self.__actions) + 1
+
+    def seek(self, frame: int) -> None:
+        """
+        Moves to a frame of the episode.
+
+        Args:
+            frame (int): The frame to show, clamped to the episode.
+        """
+        frame = max(0, min(frame, self.get_frame_count() - 1))
+
+        # Going back, or far ahead, starts over from the closest keyframe
+        if frame < self.__frame or frame - self.__frame >= self.__interval:
+            self.__game.restore(self.__keyframes[frame // self.__interval])
+            self.__frame = frame - frame % self.__interval
+
+        while self.__frame < frame:
+            self.__advance()
+
+    def step(self, frames: int = 1) -> None:
+        """
+        Moves a number of frames forward, or backward if negative.
+
+        Args:
+            frames (int, optional): The number of frames. Defaults to 1.
+        """
+        self.seek(self.__frame + frames)
+
+    def __advance(self) -> None:
+        """
+        Applies the action of the current frame.
+        """
+        action = self.__actions[self.__frame]
+        _, done = apply_action(
+            self.__game, action, self.__spawns.get(self.__frame)
+        )
+
+        if done:
+            snake = self.__game.get_snake()
+            snake.set_last_direction(list(Direction)[action])
+
+        self.__frame += 1
+
+
+def play_replay(
+    replay_file: str,
+    ep: int = 0,
+    step: bool = False,
+    speed: float = 1.0,
+    skip: int = 1,
+) -> None:
+    """
+    Loads and replays the recorded gameplay from a replay file.
+
+    Keys: space pauses, left and right arrows move one frame (or `skip`
+    frames), page up and page down move SEEK_JUMP frames, home and end go
+    to the first and last frames, up and down arrows double or halve the
+    speed, n goes to the next episode and q quits. In step mode the replay
+    starts paused and any other key shows the next frame.
+
+    Args:
+        replay_file (str): The replay file.
+        ep (int, optional): The episode number to play, starting at 1, or 0
+            for all of them. Defaults to 0.
+        step (bool, optional): Whether to wait for a key between frames.
+            Defaults to False.
+        speed (float, optional): The playback speed, 1 being one frame
+            every `settings.SPEED` seconds. Defaults to 1.0.
+        skip (int, optional): The number of frames to move at a time.
+            Defaults to 1.
+    """
+    # Rendering modules are only loaded by the visual commands
+    import pygame
+    from engine.renderer import PygameRenderer
+
+    if speed <= 0:
+        raise ValueError("Speed must be greater than 0")
+    if skip < 1:
+        raise ValueError("Frame skip must be greater than 0")
+
+    seek_keys = {
+        pygame.K_LEFT: -skip,
+        pygame.K_RIGHT: skip,
+        pygame.K_PAGEUP: -SEEK_JUMP,
+        pygame.K_PAGEDOWN: SEEK_JUMP,
+    }
+
+    for record in load_records(replay_file, ep):
+        player = ReplayPlayer(record)
+        last = player.get_frame_count() - 1
+        paused = step
+        shown = None
+
+        while True:
+            if player.get_frame() != shown:
+                shown = player.get_frame()
+                title = f"Episode {record['episode']} - {shown}/{last}"
+                player.get_game().get_world().render(title)
+
+            if not paused:
+                if shown == last:
+                    break
+                time.sleep(settings.SPEED / speed)
+
+            events = [pygame.event.wait()] if paused else pygame.event.get()
+            next_episode = False
+
+            for event in events:
+                if event.type == pygame.QUIT:
+                    PygameRenderer.quit()
+                    return
+                if event.type != pygame.KEYDOWN:
+                    continue
+
+                if event.key == pygame.K_q:
+                    PygameRenderer.quit()
+                    return
+                elif event.key == pygame.K_n:
+                    next_episode = True
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key in seek_keys:
+                    player.step(seek_keys[event.key])
+                elif event.key == pygame.K_HOME:
+                    player.seek(0)
+                elif event.key == pygame.K_END:
+                    player.seek(last)
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+                elif step:
+                    next_episode = shown == last
+                    player.step(skip)
+
+            if next_episode:
+                break
+
+            if not paused:
+                player.step(skip)
@@ -0,0 +1,314 @@
+import json
+import os
+import struct
+from collections.abc import Iterator
+from typing import BinaryIO
+
+# Compact replay file format
+REPLAY_EXTENSION = ".replay"
+REPLAY_MAGIC = b"L2SR"
+INDEX_MAGIC = b"L2SI"
+REPLAY_VERSION = 1
+# magic, format version, reserved
+HEADER = struct.Struct("<4sHH")
+# payload length, followed by the JSON payload
+FRAME = struct.Struct("<I")
+# offset of the index frame, index magic
+TRAILER = struct.Struct("<Q4s")
+
+
+def is_replay_file(path: str) -> bool:
+    """
+    Checks whether a file is a compact replay file.
+
+    Args:
+        path (str): The file to check.
+
+    Returns:
+        bool: True if the file starts with the replay magic.
+    """
+    with open(path, "rb") as file:
+        return file.read(len(REPLAY_MAGIC)) == REPLAY_MAGIC
+
+
+def scan_index(file: BinaryIO, end: int) -> Iterator[list[int]]:
+    """
+    Rebuilds the index entries of a replay file by reading its episode
+    frames in order.
+
+    The scan stops at the index frame, at a frame cut short or at a frame
+    that cannot be decoded, so a file cut short by a crash yields its whole
+    episodes.
+
+    Args:
+        file (BinaryIO): The replay file, opened for reading.
+        end (int): The offset where the scan stops.
+
+    Yields:
+        list[int]: The `[episode, offset, length, max_size, reward]` entry
+        of each episode.
+    """
+    offset = HEADER.size
+
+    while offset + FRAME.size <= end:
+        file.seek(offset)
+        (length,) = FRAME.unpack(file.read(FRAME.size))
+        if offset + FRAME.size + length > end:
+            break
+
+        try:
+            record = json.loads(file.read(length))
+        except ValueError:
+            break
+
+        if "index" in record:
+            break
+
+        yield [
+            record["episode"],
+            offset,
+            record["length"],
+            record["max_size"],
+            record["reward"],
+        ]
+        offset += FRAME.size + length
+
+
+class ReplayWriter:
+    """
+    Writes episodes to a compact replay file.
+
+    Layout: a header, then one frame per episode (a little-endian u32 length
+    followed by the JSON record), then a frame holding the index and a
+    trailer pointing to it. Each index entry is
+    `[episode, offset, length, max_size, reward]`, so a single episode can be
+    read with one seek. Episodes are flushed as they are written: a file cut
+    short by a crash has no index but can still be read sequentially, and a
+    resumed run truncates it to the offset returned by `sync()` at its
+    checkpoint and appends to it.
+
+    The index is not kept in memory while writing, so memory stays flat
+    however many episodes are recorded: `close()` rebuilds it by scanning the
+    episode frames and streams it to the index frame.
+
+    Attributes:
+        __path (str): The file written.
+        __file (BinaryIO | None): The output file, None once closed.
+    """
+
+    def __init__(self, path: str, offset: int | None = None):
+        """
+        Creates a replay file and writes its header, or reopens it to
+        continue a resumed run.
+
+        Args:
+            path (str): The file to write.
+            offset (int | None, optional): The size of the file returned by
+                `sync()` at the checkpoint the run resumes from, None to
+                start a new file. Defaults to None.
+
+        Raises:
+            ValueError: If the file to continue is missing, not a replay
+            file or shorter than the offset.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.__path = path
+
+        if offset is None:
+            self.__file = open(path, "wb")
+            self.__file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, 0))
+            return
+
+        if not os.path.exists(path) or os.path.getsize(path) < offset:
+            raise ValueError(f"{path} is shorter than its checkpoint")
+        if not is_replay_file(path):
+            raise ValueError("Replay file format not recognized")
+
+        # Drop the episodes written after the checkpoint and the index
+        os.truncate(path, offset)
+
+        self.__file = open(path, "r+b")
+        self.__file.seek(offset)
+
+    def write(self, record: dict) -> None:
+        """
+        Appends one episode to the file.
+
+        Args:
+            record (dict): The episode record, see
+                `ai.replay.EpisodeLog.to_dict()`.
+        """
+        self.__write_frame(record)
+        self.__file.flush()
+
+    def sync(self) -> int:
+        """
+        Flushes the episodes written so far to disk.
+
+        Returns:
+            int: The size of the file, to resume writing it later.
+        """
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+        return self.__file.tell()
+
+    def close(self) -> None:
+        """
+        Writes the index and the trailer, then closes the file.
+        """
+        if self.__file is None:
+            return
+
+        self.__file.flush()
+        offset = self.__file.tell()
+
+        # The frame length is only known once the entries are written
+        self.__file.write(FRAME.pack(0))
+        length = self.__file.write(b'{"index":[')
+
+        with open(self.__path, "rb") as file:
+            for i, entry in enumerate(scan_index(file, offset)):
+                text = json.dumps(entry, separators=(",", ":"))
+                length += self.__file.write((("," if i else "") + text)
+                                            .encode())
+
+        length += self.__file.write(b"]}")
+        self.__file.write(TRAILER.pack(offset, INDEX_MAGIC))
+        self.__file.seek(offset)
+        self.__file.write(FRAME.pack(length))
+
+        self.__file.close()
+        self.__file = None
+
+    def __write_frame(self, data: dict) -> None:
+        """
+        Writes one length-prefixed JSON frame.
+
+        Args:
+            data (dict): The data to write.
+        """
+        payload = json.dumps(data, separators=(",", ":")).encode()
+
+        self.__file.write(FRAME.pack(len(payload)))
+        self.__file.write(payload)
+
+
+class ReplayReader:
+    """
+    Reads episodes from a compact replay file.
+
+    Attributes:
+        __file (BinaryIO): The replay file.
+        __index (list[list[int]]): The index entries, rebuilt by scanning the
+            file if it has no index.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens a replay file and loads its index.
+
+        Args:
+            path (str): The replay file.
+
+        Raises:
+            ValueError: If the file is not a replay file.
+        """
+        self.__file = open(path, "rb")
+
+        header = self.__file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            self.close()
+            raise ValueError("Replay file format not recognized")
+
+        magic, version, _ = HEADER.unpack(header)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            self.close()
+            raise ValueError("Replay file format not recognized")
+
+        self.__index = self.__read_index()
+
+    def __enter__(self) -> "ReplayReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the replay file.
+        """
+        self.__file.close()
+
+    def get_index(self) -> list[list[int]]:
+        """
+        Returns the episode index of the file.
+
+        Returns:
+            list[list[int]]: One `[episode, offset, length, max_size, reward]`
+            entry per episode, in file order.
+        """
+        return self.__index
+
+    def read(self, episode: int) -> dict:
+        """
+        Reads one episode, seeking straight to it.
+
+        Args:
+            episode (int): The episode number.
+
+        Returns:
+            dict: The episode record.
+
+        Raises:
+            ValueError: If the episode is not in the file.
+        """
+        for entry in self.__index:
+            if entry[0] == episode:
+                return self.__read_frame(entry[1])
+
+        raise ValueError("Episode {} not recorded".format(episode))
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterates over the episode records in file order.
+
+        Yields:
+            dict: Each episode record.
+        """
+        for entry in self.__index:
+            yield self.__read_frame(entry[1])
+
+    def __read_frame(self, offset: int) -> dict:
+        """
+        Reads the JSON frame starting at an offset.
+
+        Args:
+            offset (int): The offset of the frame.
+
+        Returns:
+            dict: The decoded frame.
+        """
+        self.__file.seek(offset)
+        (length,) = FRAME.unpack(self.__file.read(FRAME.size))
+
+        return json.loads(self.__file.read(length))
+
+    def __read_index(self) -> list[list[int]]:
+        """
+        Loads the index from the trailer, or rebuilds it by scanning the
+        episode frames if the file was not closed properly.
+
+        Returns:
+            list[list[int]]: The index entries.
+        """
+        size = self.__file.seek(0, os.SEEK_END)
+
+        if size >= HEADER.size + TRAILER.size:
+            self.__file.seek(size - TRAILER.size)
+            offset, magic = TRAILER.unpack(self.__file.read(TRAILER.size))
+
+            if magic == INDEX_MAGIC and offset < size:
+                return self.__read_frame(offset)["index"]
+
+        return list(scan_index(self.__file, size))
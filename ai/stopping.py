@@ -0,0 +1,245 @@
+import numpy as np
+from ai.metrics import EpisodeStats
+from ai.play import evaluate
+from ai.qtable import QTable
+from engine.config import Config
+from engine.rng import seed_sequence
+
+# Episodes between two checks of the stopping criteria
+STOP_INTERVAL = 100
+
+# Checks without improvement of the moving average before a plateau stops
+STOP_PATIENCE = 3
+
+# Greedy games played by each evaluation check
+STOP_EVAL_GAMES = 20
+
+
+class EarlyStopping:
+    """
+    Decides when to stop training before the last episode.
+
+    The criteria are checked every `every` episodes, at the cost of one pass
+    over the Q-table and, for the evaluation target, a few greedy games:
+
+    - delta: the largest change of a Q-value since the previous check is
+      below a threshold.
+    - plateau: the mean reward of the last `every` episodes has not beaten
+      the best mean by more than a tolerance for STOP_PATIENCE checks.
+    - target: the mean final size of STOP_EVAL_GAMES greedy games reaches
+      a target. The games are the same at every check.
+
+    Attributes:
+        __delta (float | None): The Q-value change threshold.
+        __plateau (float | None): The reward improvement tolerance.
+        __target (float | None): The greedy evaluation size target.
+        __every (int): The number of episodes between two checks.
+        __eval_seed (int): Seed of the evaluation games.
+        __config (Config | None): The settings of the evaluation games.
+        __previous (np.ndarray | None): Q-values at the previous check.
+        __rewards (float): Total reward of the episodes since the check.
+        __episodes (int): Number of episodes since the check.
+        __best (float | None): Best mean reward of a window so far.
+        __stale (int): Checks since the best mean reward.
+        __last (dict): The values measured by the last check.
+    """
+
+    def __init__(
+        self,
+        delta: float | None = None,
+        plateau: float | None = None,
+        target: float | None = None,
+        every: int = STOP_INTERVAL,
+        seed: int | None = None,
+        config: Config | None = None,
+    ):
+        """
+        Initializes the stopping criteria; the ones left to None are off.
+
+        Args:
+            delta (float | None, optional): Stop when no Q-value changed by
+                more than this between two checks. Defaults to None.
+            plateau (float | None, optional): Stop when the mean reward
+                stopped improving by more than this. Defaults to None.
+            target (float | None, optional): Stop when greedy games reach
+                this mean size. Defaults to None.
+            every (int, optional): The number of episodes between two
+                checks. Defaults to STOP_INTERVAL.
+            seed (int | None, optional): Seed of the training run, from
+                which the evaluation games are derived. Defaults to None.
+            config (Config | None, optional): The settings of the
+                evaluation games, those of the training. Defaults to None.
+
+        Raises:
+            ValueError: If a threshold is negative or the interval is not
+            positive.
+        """
+        if every < 1:
+            raise ValueError("Stopping check interval must be greater than 0")
+        if any(x is not None and x < 0 for x in (delta, plateau, target)):
+            raise ValueError("Stopping thresholds must not be negative")
+
+        self.__delta = delta
+        self.__plateau = plateau
+        self.__target = target
+        self.__every = every
+        self.__eval_seed = int(seed_sequence(seed).generate_state(1)[0])
+        self.__config = config
+        self.__previous = None
+        self.__rewards = 0.0
+        self.__episodes = 0
+        self.__best = None
+        self.__stale = 0
+        self.__last = {}
+
+    def is_enabled(self) -> bool:
+        """
+        Checks whether any criterion is on.
+
+        Returns:
+            bool: True if at least one criterion is set.
+        """
+        criteria = (self.__delta, self.__plateau, self.__target)
+
+        return any(x is not None for x in criteria)
+
+    def get_criteria(self) -> dict:
+        """
+        Returns the settings of the criteria, for the run summary.
+
+        Returns:
+            dict: The thresholds, None when off, and the check interval.
+        """
+        return {
+            "delta": self.__delta,
+            "plateau": self.__plateau,
+            "target": self.__target,
+            "every": self.__every,
+        }
+
+    def get_last(self) -> dict:
+        """
+        Returns the values measured by the last check.
+
+        Returns:
+            dict: The measured values of the enabled criteria.
+        """
+        return dict(self.__last)
+
+    def export_state(self, table: QTable) -> dict:
+        """
+        Returns the progress of the criteria, to resume a run.
+
+        The Q-values of the previous check are stored as the rows that
+        differ from the table, which the checkpoint saves anyway.
+
+        Args:
+            table (QTable): The Q-table being trained.
+
+        Returns:
+            dict: The JSON-serializable state of the criteria.
+        """
+        previous = None
+        if self.__previous is not None:
+            rows = np.flatnonzero(
+                (self.__previous != table.values).any(axis=1)
+            )
+            previous = {
+                "rows": rows.tolist(),
+                "values": self.__previous[rows].tolist(),
+            }
+
+        return {
+            "previous": previous,
+            "rewards": self.__rewards,
+            "episodes": self.__episodes,
+            "best": self.__best,
+            "stale": self.__stale,
+            "last": dict(self.__last),
+        }
+
+    def import_state(self, state: dict, table: QTable) -> None:
+        """
+        Restores the progress of the criteria saved by `export_state()`.
+
+        Args:
+            state (dict): The state of the criteria.
+            table (QTable): The Q-table saved with the state.
+        """
+        self.__previous = None
+        if state["previous"] is not None:
+            self.__previous = table.values.copy()
+            rows = np.array(state["previous"]["rows"], dtype=np.intp)
+            if len(rows):
+                self.__previous[rows] = state["previous"]["values"]
+
+        self.__rewards = state["rewards"]
+        self.__episodes = state["episodes"]
+        self.__best = state["best"]
+        self.__stale = state["stale"]
+        self.__last = dict(state["last"])
+
+    def add(self, stats: EpisodeStats) -> None:
+        """
+        Accounts for a finished episode.
+
+        Args:
+            stats (EpisodeStats): The summary of the episode.
+        """
+        self.__rewards += stats.reward
+        self.__episodes += 1
+
+    def check(self, episode: int, table: QTable) -> str | None:
+        """
+        Checks the criteria if the episode ends a check interval.
+
+        Args:
+            episode (int): The number of episodes played.
+            table (QTable): The Q-table being trained.
+
+        Returns:
+            str | None: The reason to stop, or None to go on.
+        """
+        if episode % self.__every or not self.is_enabled():
+            return None
+
+        reasons = []
+
+        if self.__delta is not None:
+            values = table.values.copy()
+
+            if self.__previous is not None:
+                change = float(np.abs(values - self.__previous).max())
+                self.__last["max_delta_q"] = change
+                if change < self.__delta:
+                    reasons.append(f"max |dQ| {change:.6g} < {self.__delta}")
+
+            self.__previous = values
+
+        if self.__plateau is not None and self.__episodes:
+            mean = self.__rewards / self.__episodes
+            self.__last["mean_reward"] = mean
+
+            if self.__best is None or mean > self.__best + self.__plateau:
+                self.__best = mean
+                self.__stale = 0
+            else:
+                self.__stale += 1
+                if self.__stale >= STOP_PATIENCE:
+                    reasons.append(
+                        f"mean reward {mean:.2f} on a plateau for "
+                        f"{self.__stale} checks"
+                    )
+
+        if self.__target is not None:
+            sizes = evaluate(table, STOP_EVAL_GAMES, 1, self.__eval_seed,
+                             self.__config)
+            score = sum(sizes) / STOP_EVAL_GAMES
+            self.__last["eval_size"] = score
+            if score >= self.__target:
+                reasons.append(f"greedy size {score:.2f} >= {self.__target}")
+
+        self.__rewards = 0.0
+        self.__episodes = 0
+
+        return "; ".join(reasons) or None
@@ -0,0 +1,433 @@
+import csv
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import Iterator
+from typing import NamedTuple
+import numpy as np
+
+import ai.train as train
+from ai.experience import ExperienceConfig
+from ai.metrics import load_metrics
+from ai.play import evaluate
+from ai.qtable import BINARY_EXTENSION, load_table
+from ai.stopping import EarlyStopping
+from engine.config import Config
+from engine.rng import seed_sequence
+
+# Configurations drawn by a random search
+SWEEP_TRIALS = 20
+
+# Mean size of the training episodes counted as reaching the threshold
+SWEEP_THRESHOLD = 10.0
+
+# Training episodes averaged by the threshold
+SWEEP_WINDOW = 100
+
+# Greedy games scoring each trained configuration, the same for every trial
+SWEEP_EVAL_GAMES = 20
+
+# Parameter setting both the width and the height, as WIDTHxHEIGHT
+SIZE_PARAM = "size"
+
+# Columns of the results table, after the parameters of the sweep
+RESULT_COLUMNS = [
+    "score", "max_size", "train_size", "episodes", "episodes_to_threshold",
+    "seconds",
+]
+
+
+class Range(NamedTuple):
+    """
+    Interval a random search draws a parameter from.
+
+    Attributes:
+        low (float): The lowest value.
+        high (float): The highest value.
+    """
+
+    low: float
+    high: float
+
+
+class Trial(NamedTuple):
+    """
+    One configuration of a sweep.
+
+    Attributes:
+        name (str): The session name of the training, without extension.
+        number (int): The number of the trial, starting at 1.
+        params (dict): The values of the swept parameters.
+        config (Config): The settings of the training.
+        seed (int): Seed of the games and of the agent.
+        eval_seed (int): Seed of the evaluation games.
+        threshold (float): The mean size the training has to reach.
+        stopping (dict | None): The early stopping criteria, as returned by
+            `EarlyStopping.get_criteria()`, None to play every episode.
+        experience (ExperienceConfig | None): The settings of the experience
+            buffer, None to learn online.
+    """
+
+    name: str
+    number: int
+    params: dict
+    config: Config
+    seed: int
+    eval_seed: int
+    threshold: float
+    stopping: dict | None = None
+    experience: ExperienceConfig | None = None
+
+
+def parse_value(name: str, text: str) -> object:
+    """
+    Converts a parameter value to the type of its configuration field.
+
+    Args:
+        name (str): The parameter name.
+        text (str): The value.
+
+    Returns:
+        object: The value, a (width, height) tuple for the size.
+
+    Raises:
+        ValueError: If the value does not fit the parameter.
+    """
+    if name == SIZE_PARAM:
+        width, height = (int(side) for side in text.lower().split("x"))
+        return width, height
+
+    return type(Config._field_defaults[name])(text)
+
+
+def parse_param(text: str) -> tuple[str, list | Range]:
+    """
+    Parses a swept parameter given as NAME=V1,V2,... or NAME=LOW:HIGH.
+
+    Args:
+        text (str): The parameter, e.g. "alpha=0.1,0.2" or "gamma=0.8:0.99".
+
+    Returns:
+        tuple[str, list | Range]: The parameter name and its values, or the
+        interval of a random search.
+
+    Raises:
+        ValueError: If the parameter is unknown or its values are malformed.
+    """
+    name, _, values = text.partition("=")
+    name = name.strip().replace("-", "_")
+
+    if name != SIZE_PARAM and name not in Config._fields:
+        known = ", ".join((SIZE_PARAM, *Config._fields))
+        raise ValueError(f"Unknown sweep parameter {name!r} ({known})")
+
+    try:
+        if ":" in values and name != SIZE_PARAM:
+            low, high = (parse_value(name, v) for v in values.split(":"))
+            if low > high:
+                raise ValueError
+            return name, Range(low, high)
+
+        return name, [parse_value(name, v) for v in values.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid values for sweep parameter {text!r}")
+
+
+def apply_param(config: Config, name: str, value: object) -> Config:
+    """
+    Sets a swept parameter in a configuration.
+
+    Args:
+        config (Config): The configuration.
+        name (str): The parameter name.
+        value (object): The value.
+
+    Returns:
+        Config: A copy of the configuration with the parameter set.
+    """
+    if name == SIZE_PARAM:
+        return config._replace(width=value[0], height=value[1])
+
+    return config._replace(**{name: value})
+
+
+def expand_grid(params: dict[str, list | Range]) -> list[dict]:
+    """
+    Lists every combination of the parameter values.
+
+    Args:
+        params (dict[str, list | Range]): The values of each parameter.
+
+    Returns:
+        list[dict]: The parameter values of each trial.
+
+    Raises:
+        ValueError: If a parameter is given as an interval.
+    """
+    if any(isinstance(values, Range) for values in params.values()):
+        raise ValueError("Grid search needs lists of values, not LOW:HIGH")
+
+    return [
+        dict(zip(params, values))
+        for values in itertools.product(*params.values())
+    ]
+
+
+def sample_random(
+    params: dict[str, list | Range], n: int,
+    seed: int | np.random.SeedSequence | None = None,
+) -> list[dict]:
+    """
+    Draws parameter values at random.
+
+    Values given as a list are chosen uniformly among them; intervals are
+    sampled uniformly, integers for integer fields.
+
+    Args:
+        params (dict[str, list | Range]): The values of each parameter.
+        n (int): The number of trials.
+        seed (int | np.random.SeedSequence | None, optional): Seed of the
+            draws. Defaults to None.
+
+    Returns:
+        list[dict]: The parameter values of each trial.
+    """
+    generator = np.random.default_rng(seed)
+    trials = []
+
+    for _ in range(n):
+        trial = {}
+
+        for name, values in params.items():
+            if not isinstance(values, Range):
+                trial[name] = values[generator.integers(len(values))]
+            elif isinstance(values.low, int):
+                trial[name] = int(generator.integers(values.low,
+                                                     values.high + 1))
+            else:
+                trial[name] = float(generator.uniform(values.low,
+                                                      values.high))
+
+        trials.append(trial)
+
+    return trials
+
+
+def run_trial(trial: Trial) -> dict:
+    """
+    Trains a Q-table from scratch with the configuration of a trial and
+    scores it.
+
+    The training is a regular single-process `train()` run named
+    `<sweep>_trial<number>`, without replay nor checkpoints, so its table,
+    metrics and summary are left in the data directory.
+
+    Args:
+        trial (Trial): The trial to run.
+
+    Returns:
+        dict: The row of the trial in the results table.
+    """
+    config = trial.config
+
+    # A trial starts from an empty table, not from a previous sweep's
+    for extension in (".csv", BINARY_EXTENSION):
+        if os.path.exists(f"data/{trial.name}{extension}"):
+            os.remove(f"data/{trial.name}{extension}")
+
+    stopping = None
+    if trial.stopping is not None:
+        stopping = EarlyStopping(**trial.stopping, seed=trial.seed,
+                                 config=config)
+
+    summary = train.train(
+        trial.name, replay_policy="off", seed=trial.seed,
+        checkpoint_every=0, stopping=stopping,
+        experience_config=trial.experience, config=config, verbose=False,
+    )
+
+    window = deque(maxlen=SWEEP_WINDOW)
+    reached = None
+
+    sizes = load_metrics(f"data/{trial.name}_rewards.csv")["size"]
+    for episode, size in enumerate(sizes, 1):
+        window.append(int(size))
+
+        if reached is None and len(window) == window.maxlen:
+            if sum(window) / len(window) >= trial.threshold:
+                reached = episode
+
+    table = load_table(train.table_path(trial.name))
+    scores = list(evaluate(table, SWEEP_EVAL_GAMES, 1, trial.eval_seed,
+                           config))
+
+    return {
+        "trial": trial.number,
+        **{
+            name: "x".join(map(str, value)) if name == SIZE_PARAM else value
+            for name, value in trial.params.items()
+        },
+        "score": sum(scores) / len(scores),
+        "max_size": max(scores),
+        "train_size": sum(window) / len(window),
+        "episodes": summary["episodes"],
+        "episodes_to_threshold": reached,
+        "seconds": summary["seconds"],
+    }
+
+
+def run_trials(trials: list[Trial], workers: int = 1) -> Iterator[dict]:
+    """
+    Runs trials, each on a single process.
+
+    Args:
+        trials (list[Trial]): The trials to run.
+        workers (int, optional): The number of processes. Defaults to 1.
+
+    Yields:
+        dict: The row of each trial, in the order they finish.
+    """
+    if workers <= 1 or len(trials) == 1:
+        for trial in trials:
+            yield run_trial(trial)
+        return
+
+    with multiprocessing.Pool(min(workers, len(trials))) as pool:
+        yield from pool.imap_unordered(run_trial, trials)
+
+
+def write_results(path: str, columns: list[str], rows: list[dict]) -> None:
+    """
+    Writes the results table of a sweep.
+
+    Args:
+        path (str): The CSV file to write.
+        columns (list[str]): The columns of the table.
+        rows (list[dict]): One row per trial.
+    """
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    os.replace(tmp_path, path)
+
+
+def sweep(
+    name: str,
+    params: list[str],
+    search: str = "grid",
+    trials: int = SWEEP_TRIALS,
+    workers: int = 1,
+    seed: int | None = None,
+    threshold: float = SWEEP_THRESHOLD,
+    base: Config | None = None,
+    stopping: EarlyStopping | None = None,
+    experience_config: ExperienceConfig | None = None,
+) -> list[dict]:
+    """
+    Trains one Q-table per configuration of a grid or random search and
+    collects their scores in `data/<name>_sweep.csv`.
+
+    Each trial trains from an empty table on its own process with `train()`,
+    then plays SWEEP_EVAL_GAMES greedy games. The table holds the swept
+    parameters, the mean and best size of those games (score, max_size),
+    the mean size of the last SWEEP_WINDOW training episodes (train_size),
+    the number of episodes played, fewer than planned if training stopped
+    early (episodes), the first episode where that mean reached the
+    threshold (episodes_to_threshold, empty if never) and the training
+    time.
+
+    Args:
+        name (str): The name of the results table.
+        params (list[str]): The swept parameters, see `parse_param()`.
+        search (str, optional): "grid" to try every combination, "random"
+            to draw `trials` of them. Defaults to "grid".
+        trials (int, optional): The number of configurations of a random
+            search. Defaults to SWEEP_TRIALS.
+        workers (int, optional): The number of processes running trials.
+            Defaults to 1.
+        seed (int | None, optional): Seed of the random search, the games
+            and the agents, None for a different sweep every time.
+            Defaults to None.
+        threshold (float, optional): The mean training size counted by
+            episodes_to_threshold. Defaults to SWEEP_THRESHOLD.
+        base (Config | None, optional): The settings of the parameters that
+            are not swept, the defaults of `engine.settings` if None.
+            Defaults to None.
+        stopping (EarlyStopping | None, optional): The criteria to stop each
+            training before its last episode, None to play them all.
+            Defaults to None.
+        experience_config (ExperienceConfig | None, optional): The settings
+            of the experience buffer of each training, None to learn
+            online. Defaults to None.
+
+    Returns:
+        list[dict]: The rows of the results table, by trial number.
+
+    Raises:
+        ValueError: If the parameters, the search or a configuration are
+        invalid.
+    """
+    if workers < 1:
+        raise ValueError("Number of workers must be greater than 0")
+    if trials < 1:
+        raise ValueError("Number of trials must be greater than 0")
+
+    base = Config() if base is None else base
+    if experience_config is not None:
+        experience_config.validate()
+
+    criteria = None
+    if stopping is not None and stopping.is_enabled():
+        criteria = stopping.get_criteria()
+
+    parsed = dict(parse_param(param) for param in params)
+    search_seed, eval_seed, games_seed = seed_sequence(seed).spawn(3)
+
+    if search == "grid":
+        combinations = expand_grid(parsed)
+    elif search == "random":
+        combinations = sample_random(parsed, trials, search_seed)
+    else:
+        raise ValueError(f"Unknown search {search!r}, expected grid or random")
+
+    eval_seed = int(eval_seed.generate_state(1)[0])
+    runs = []
+
+    for i, (values, trial_seed) in enumerate(
+        zip(combinations, games_seed.spawn(len(combinations))), 1
+    ):
+        config = base
+        for param, value in values.items():
+            config = apply_param(config, param, value)
+        config.validate()
+
+        runs.append(Trial(
+            f"{name}_trial{i}", i, values, config,
+            int(trial_seed.generate_state(1)[0]), eval_seed, threshold,
+            criteria, experience_config,
+        ))
+
+    os.makedirs("data", exist_ok=True)
+    print(f"Sweep {name}: {len(runs)} trials on {workers} process(es)")
+
+    rows = []
+    for row in run_trials(runs, workers):
+        rows.append(row)
+        print(f"[{len(rows)}/{len(runs)}] trial {row['trial']}: "
+              f"score {row['score']:.2f}, "
+              f"threshold at {row['episodes_to_threshold']}")
+
+    rows.sort(key=lambda row: row["trial"])
+    write_results(f"data/{name}_sweep.csv",
+                  ["trial", *parsed, *RESULT_COLUMNS], rows)
+
+    best = max(rows, key=lambda row: row["score"])
+    values = " ".join(f"{param}={best[param]}" for param in parsed)
+    print(f"Best trial {best['trial']}: score {best['score']:.2f} {values}")
+
+    return rows
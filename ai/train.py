@@ -1,118 +1,727 @@
+import ctypes
+import json
+import multiprocessing
 import os
+import time
+from typing import NamedTuple
+import numpy as np
 
+from engine.config import Config
 from engine.game import Game
+from engine.rng import RandomPool, spawn_seeds
 from engine.direction import Direction
-import csv
-import engine.settings as settings
 from engine.exception.gameover import GameOver
-import ai.replay as replay
-from ai.utils import get_Q, action
+from ai.checkpoint import (
+    CHECKPOINT_INTERVAL, Checkpointer, checkpoint_path, load_checkpoint
+)
+from ai.experience import ExperienceBuffer, ExperienceConfig
+from ai.metrics import EpisodeStats, MetricsWriter
+from ai.profiler import NullProfiler, Profiler, parse_window
+from ai.stopping import EarlyStopping
+from ai.replay import EpisodeLog, ReplayPolicy, ReplayRecorder
+from ai.replay_file import REPLAY_EXTENSION
+from ai.qtable import BINARY_EXTENSION, QTable, load_table, save_table
+from ai.utils import action
+from engine.state import STATE_COUNT
 
-# Exploration rate
-EPSILON = settings.EPSILON
+# Episodes handed to a worker process at a time
+WORKER_CHUNKSIZE = 8
 
-# Q-table: maps (state, action) pairs to Q-values
-Q = {}
+# Recorded training episodes
+REPLAY_FILE = f"replay/train_replay{REPLAY_EXTENSION}"
 
 
-def progress_bar(i: int) -> None:
+class TrainerState(NamedTuple):
+    """
+    State of the agent of a training run, handed to every episode.
+
+    Each run, and each worker process of a parallel run, has its own state,
+    so that runs sharing a process do not leak into each other.
+
+    Attributes:
+        table (QTable): The Q-table, mapping (state id, action) pairs to
+            Q-values.
+        rng (RandomPool): The generator of the agent: exploration and seeds
+            of the recorded episodes.
+        experience (ExperienceBuffer | None): The transitions replayed by
+            the learner, None to learn online at every move.
+        profiler (Profiler | NullProfiler): The phase timer of the training
+            loop, see `train --profile`.
+    """
+
+    table: QTable
+    rng: RandomPool
+    experience: ExperienceBuffer | None = None
+    profiler: Profiler | NullProfiler = NullProfiler()
+
+
+# Trainer state, game and replay policy of a worker process (see init_worker)
+worker_state: TrainerState | None = None
+worker_env: Game | None = None
+worker_policy: ReplayPolicy | None = None
+
+
+def progress_bar(i: int, total: int) -> None:
     """
     Displays a progress bar in the console during training.
 
     Args:
         i (int): The current episode number.
+        total (int): The number of episodes of the training.
     """
     progress_blocks = 20
-    progress_ratio = i / settings.EPISODES
+    progress_ratio = i / total
     filled_blocks = int(progress_ratio * progress_blocks)
 
     load_bar = "#" * filled_blocks + " " * (progress_blocks - filled_blocks)
-    print(f"\r[{load_bar}] {i}/{settings.EPISODES}", end="")
+    print(f"\r[{load_bar}] {i}/{total}", end="")
 
-    if i == settings.EPISODES:
+    if i == total:
         print("")
 
 
-def load_Q(file):
-    data = csv.DictReader(file)
+def table_path(filename: str) -> str:
+    """
+    Resolves the Q-table file of a training session.
+
+    An existing binary table takes precedence over the CSV one.
+
+    Args:
+        filename (str): The session name, without extension.
+
+    Returns:
+        str: The path of the Q-table file in the data directory.
+    """
+    binary = f"data/{filename}{BINARY_EXTENSION}"
+
+    if os.path.exists(binary):
+        return binary
+
+    return f"data/{filename}.csv"
+
+
+def epsilon_at(episode: int, config: Config) -> float:
+    """
+    Returns the exploration rate used for a given episode.
+
+    Matches the per-episode decay of the single-process training loop, so
+    that workers can compute it from the episode number alone.
+
+    Args:
+        episode (int): The episode number, starting at 0.
+        config (Config): The settings of the training.
+
+    Returns:
+        float: The exploration rate of the episode.
+    """
+    epsilon = config.epsilon * config.epsilon_decay ** episode
+
+    return max(epsilon, config.epsilon_min)
+
+
+def init_state(
+    table: QTable,
+    seed: np.random.SeedSequence,
+    experience_config: ExperienceConfig | None = None,
+    config: Config | None = None,
+    profiler: Profiler | NullProfiler | None = None,
+) -> tuple[Game, TrainerState]:
+    """
+    Creates the game and the trainer state of a process of a run.
+
+    The seed is split in the same streams for a single-process run and for
+    each worker of a parallel run: the games, the agent and the experience
+    buffer.
+
+    Args:
+        table (QTable): The Q-table to train.
+        seed (np.random.SeedSequence): The seed sequence of the process.
+        experience_config (ExperienceConfig | None, optional): The settings
+            of the experience buffer, None to learn online. Defaults to None.
+        config (Config | None, optional): The settings of the game, the
+            defaults of `engine.settings` if None. Defaults to None.
+        profiler (Profiler | NullProfiler | None, optional): The phase
+            timer, None not to profile. Defaults to None.
+
+    Returns:
+        tuple[Game, TrainerState]: The game to play and the trainer state.
+    """
+    game_seed, agent_seed, buffer_seed = seed.spawn(3)
+
+    experience = None
+    if experience_config is not None:
+        experience = ExperienceBuffer(experience_config, buffer_seed)
+
+    state = TrainerState(
+        table, RandomPool(agent_seed), experience,
+        NullProfiler() if profiler is None else profiler,
+    )
+
+    return Game(game_seed, config), state
+
+
+def new_log(
+    episode: int, policy: ReplayPolicy, rng: RandomPool
+) -> EpisodeLog | None:
+    """
+    Creates the replay log of an episode if the policy may keep it.
+
+    Args:
+        episode (int): The episode number, starting at 1.
+        policy (ReplayPolicy): The replay policy.
+        rng (RandomPool): The generator of the agent, drawing the seed.
+
+    Returns:
+        EpisodeLog | None: A log with a fresh seed, or None.
+    """
+    if not policy.wants(episode):
+        return None
+
+    return EpisodeLog(rng.randrange(1 << 32))
+
+
+def run_episode(
+    state: TrainerState,
+    env: Game,
+    epsilon: float,
+    log: EpisodeLog | None = None,
+) -> EpisodeStats:
+    """
+    Plays one training episode, updating the Q-table of the trainer at
+    every step, or from its experience buffer when it is enabled. The
+    rewards and the learning parameters are those of the game's
+    configuration. When profiling is off, the loop makes no call to the
+    profiler.
+
+    Args:
+        state (TrainerState): The trainer state of the run.
+        env (Game): The game to (re)start and play.
+        epsilon (float): The exploration rate of the episode.
+        log (EpisodeLog | None, optional): Log recording the episode for the
+            replay, or None not to record it. Defaults to None.
+
+    Returns:
+        EpisodeStats: The summary of the episode.
+    """
+    length = reward = green = red = 0
+    is_last = False
+    mark = state.profiler.mark
+    profiling = state.profiler.is_enabled()
+    buffer = state.experience
+    table, rng = state.table, state.rng
+    config = env.get_config()
+    alpha, gamma = config.alpha, config.gamma
+    nothing_reward = config.eat_nothing_reward
+    begin = time.perf_counter()
+
+    if log is not None:
+        env.start(log.get_seed())
+        log.start(env)
+    else:
+        env.start()
+
+    snake = env.get_snake()
+    size = snake.get_size()
+    s = snake.get_state_id()
+    if profiling:
+        mark("start")
+
+    while not is_last:
+        a = action(table, s, epsilon, rng)
+        if profiling:
+            mark("action")
+        try:
+            r = snake.move(list(Direction)[a])
+        except GameOver:
+            is_last = True
+            r = config.gameover_reward  # Penalty for dying
+        if profiling:
+            mark("move")
+
+        if r != nothing_reward and not is_last:
+            new_size = snake.get_size()
+            green += new_size > size
+            red += new_size < size
+            size = new_size
+        if log is not None:
+            log.step(env, a, r)
+            if profiling:
+                mark("replay")
+        s_next = snake.get_state_id()
+        if profiling:
+            mark("state")
+
+        # Q-learning update rule
+        if buffer is None:
+            table.update(s, a, r, s_next, alpha, gamma)
+        else:
+            buffer.step(table, s, a, r, s_next, is_last, alpha, gamma)
+        if profiling:
+            mark("update")
+
+        s = s_next
+        length += 1
+        reward += r
+
+    return EpisodeStats(length, size, reward, green, red,
+                        time.perf_counter() - begin)
+
+
+def save_checkpoint(
+    checkpointer: Checkpointer | None,
+    state: TrainerState,
+    episode: int,
+    epsilon: float,
+    metrics: MetricsWriter,
+    recorder: ReplayRecorder,
+    stopping: EarlyStopping | None = None,
+    env: Game | None = None,
+) -> None:
+    """
+    Writes a checkpoint of the training run.
+
+    Besides the table and the exploration rate, the checkpoint holds where
+    the metrics and the replay files end, the progress of the stopping
+    criteria and, on a single process, the experience buffer, so that a
+    resumed run continues them.
+
+    Args:
+        checkpointer (Checkpointer | None): The checkpoint writer, None when
+            checkpoints are disabled.
+        state (TrainerState): The trainer state of the run.
+        episode (int): The number of episodes played.
+        epsilon (float): The exploration rate of the next episode.
+        metrics (MetricsWriter): The writer of the training metrics.
+        recorder (ReplayRecorder): The recorder of the replay file.
+        stopping (EarlyStopping | None, optional): The stopping criteria,
+            None when off. Defaults to None.
+        env (Game | None, optional): The game of a single-process run, whose
+            generator is saved with the agent's so that the run resumes
+            exactly. None on several processes. Defaults to None.
+    """
+    if checkpointer is None:
+        return
+
+    checkpointer.save(state.table, {
+        "episode": episode,
+        "epsilon": epsilon,
+        "metrics": metrics.sync(),
+        "replay": recorder.export_state(),
+        "stopping": (
+            None if stopping is None else stopping.export_state(state.table)
+        ),
+        "game_rng": None if env is None else env.get_rng().export_state(),
+        "agent_rng": None if env is None else state.rng.export_state(),
+        "experience": (
+            None if env is None or state.experience is None
+            else state.experience.export_state(checkpointer.get_path())
+        ),
+    })
+
 
-    for row in data:
-        state = eval(row['State'])
-        a = Direction[row['Action']].index
+def init_worker(
+    values: ctypes.Array,
+    visited: ctypes.Array,
+    policy: ReplayPolicy,
+    seeds: multiprocessing.SimpleQueue,
+    experience_config: ExperienceConfig | None = None,
+    config: Config | None = None,
+) -> None:
+    """
+    Initializes a training worker process.
+
+    The Q-table of the worker is backed by the shared arrays, so the
+    updates of every worker land in the same table (lock-free, Hogwild
+    style). Each worker takes its own seed sequence, so that the games and
+    the exploration of the workers are independent streams.
+
+    Args:
+        values (ctypes.Array): Shared storage of the Q-values.
+        visited (ctypes.Array): Shared storage of the visited mask.
+        policy (ReplayPolicy): The replay policy, telling which episodes to
+            record.
+        seeds (multiprocessing.SimpleQueue): Queue holding one seed sequence
+            per worker.
+        experience_config (ExperienceConfig | None, optional): The settings
+            of the experience buffer of the worker, None to learn online.
+            Defaults to None.
+        config (Config | None, optional): The settings of the game and of
+            the training, the defaults of `engine.settings` if None.
+            Defaults to None.
+    """
+    global worker_state, worker_env, worker_policy
+
+    worker_env, worker_state = init_state(
+        shared_table(values, visited), seeds.get(), experience_config, config
+    )
+    worker_policy = policy
+
+
+def train_episode(episode: int) -> tuple[EpisodeStats, dict | None]:
+    """
+    Runs one training episode in a worker process.
 
-        Q[(state, a)] = float(row['Q_Value'])
+    Args:
+        episode (int): The episode number, starting at 0, used for the
+            epsilon schedule.
+
+    Returns:
+        tuple[EpisodeStats, dict | None]: The summary of the episode and its
+        replay record, or None if the replay recorder does not want it.
+    """
+    log = new_log(episode + 1, worker_policy, worker_state.rng)
+    epsilon = epsilon_at(episode, worker_env.get_config())
+    stats = run_episode(worker_state, worker_env, epsilon, log)
 
+    return stats, None if log is None else log.to_dict(episode + 1)
 
-def train(filename: str) -> None:
+
+def shared_table(values: ctypes.Array, visited: ctypes.Array) -> QTable:
+    """
+    Wraps shared memory arrays into a Q-table.
+
+    Args:
+        values (ctypes.Array): Shared storage of the Q-values.
+        visited (ctypes.Array): Shared storage of the visited mask.
+
+    Returns:
+        QTable: A Q-table reading and writing the shared arrays.
+    """
+    shape = (STATE_COUNT, len(Direction))
+
+    return QTable(
+        np.frombuffer(values, dtype=np.float64).reshape(shape),
+        np.frombuffer(visited, dtype=np.bool_).reshape(shape),
+    )
+
+
+def train_parallel(
+    table: QTable,
+    workers: int,
+    recorder: ReplayRecorder,
+    metrics: MetricsWriter,
+    seeds: list[np.random.SeedSequence],
+    start: int = 0,
+    checkpointer: Checkpointer | None = None,
+    checkpoint_every: int = CHECKPOINT_INTERVAL,
+    stopping: EarlyStopping | None = None,
+    experience_config: ExperienceConfig | None = None,
+    config: Config | None = None,
+    verbose: bool = True,
+) -> tuple[int, str | None]:
+    """
+    Runs the training episodes on several processes sharing one Q-table.
+
+    Episodes are handed out in order and keep the epsilon of their number,
+    so the exploration schedule and the recorded replay match the
+    single-process training. Checkpoints hold the table and the episode
+    counter but not the generators of the workers, which a resumed run
+    draws again.
+
+    Args:
+        table (QTable): The Q-table to train, updated in place.
+        workers (int): The number of worker processes.
+        recorder (ReplayRecorder): The recorder of the replay file.
+        metrics (MetricsWriter): The writer of the training metrics.
+        seeds (list[np.random.SeedSequence]): One seed sequence per worker.
+        start (int, optional): The number of episodes already played.
+            Defaults to 0.
+        checkpointer (Checkpointer | None, optional): The checkpoint writer,
+            None to disable checkpoints. Defaults to None.
+        checkpoint_every (int, optional): The number of episodes between two
+            checkpoints. Defaults to CHECKPOINT_INTERVAL.
+        stopping (EarlyStopping | None, optional): The criteria to stop
+            before the last episode, None to play them all. Defaults to None.
+        experience_config (ExperienceConfig | None, optional): The settings
+            of the experience buffer of each worker, None to learn online.
+            Defaults to None.
+        config (Config | None, optional): The settings of the games and of
+            the training, the defaults of `engine.settings` if None.
+            Defaults to None.
+        verbose (bool, optional): Whether to print the progress bar.
+            Defaults to True.
+
+    Returns:
+        tuple[int, str | None]: The number of episodes played and the reason
+        training stopped early, or None.
+    """
+    config = Config() if config is None else config
+    played, reason = start, None
+
+    size = STATE_COUNT * len(Direction)
+    values = multiprocessing.RawArray(ctypes.c_double, size)
+    visited = multiprocessing.RawArray(ctypes.c_bool, size)
+
+    shared = shared_table(values, visited)
+    shared.values[:] = table.values
+    shared.visited[:] = table.visited
+    state = TrainerState(shared, RandomPool())
+
+    worker_seeds = multiprocessing.SimpleQueue()
+    for seed in seeds:
+        worker_seeds.put(seed)
+
+    with multiprocessing.Pool(
+        workers, initializer=init_worker,
+        initargs=(values, visited, recorder.get_policy(), worker_seeds,
+                  experience_config, config)
+    ) as pool:
+        episodes = pool.imap(train_episode, range(start, config.episodes),
+                             chunksize=WORKER_CHUNKSIZE)
+
+        for i, (stats, record) in enumerate(episodes, start):
+            played = i + 1
+            recorder.add_episode(played, record)
+            metrics.add(played, stats, epsilon_at(i, config))
+            if verbose:
+                progress_bar(played, config.episodes)
+
+            if stopping is not None:
+                stopping.add(stats)
+                reason = stopping.check(played, shared)
+
+            if (
+                reason or played % checkpoint_every == 0
+                or played == config.episodes
+            ):
+                save_checkpoint(checkpointer, state, played,
+                                epsilon_at(played, config), metrics,
+                                recorder, stopping)
+            if reason:
+                break
+
+    table.values[:] = shared.values
+    table.visited[:] = shared.visited
+
+    return played, reason
+
+
+def write_summary(path: str, summary: dict) -> None:
+    """
+    Writes the summary of a training run.
+
+    Args:
+        path (str): The JSON file to write.
+        summary (dict): The summary of the run.
+    """
+    with open(path, "w") as file:
+        json.dump(summary, file, indent=4)
+        file.write("\n")
+
+
+def train(
+    filename: str,
+    workers: int = 1,
+    replay_policy: str = "every:1",
+    seed: int | None = None,
+    profile: bool = False,
+    trace_window: str | None = None,
+    resume: bool = False,
+    checkpoint_every: int = CHECKPOINT_INTERVAL,
+    stopping: EarlyStopping | None = None,
+    experience_config: ExperienceConfig | None = None,
+    config: Config | None = None,
+    verbose: bool = True,
+) -> dict:
     """
     Trains the snake agent using Q-learning.
 
     - Initializes a new game environment for each episode.
-    - Updates the Q-table based on the rewards received.
-    - Saves rewards and the Q-table to CSV files after training.
+    - Updates the Q-table based on the rewards received, online or from
+      minibatches of an experience buffer.
+    - Streams the metrics of each episode to `data/<filename>_rewards.csv`.
+    - Checkpoints the run to `data/<filename>.ckpt` every few episodes.
+    - Stops early once the stopping criteria are met, if any.
+    - Saves the Q-table and a run summary after training.
+
+    Args:
+        filename (str): The session name, without extension.
+        workers (int, optional): The number of processes running episodes.
+            Defaults to 1.
+        replay_policy (str, optional): Which episodes to keep in the replay
+            file, see `ReplayPolicy`. Defaults to every episode.
+        seed (int | None, optional): Seed of the games and of the agent,
+            None for a different run every time. Defaults to None.
+        profile (bool, optional): Whether to time the phases of the training
+            loop, see `ai.profiler`. Defaults to False.
+        trace_window (str | None, optional): The episodes exported to the
+            trace file when profiling, as START:COUNT. Defaults to the last
+            five episodes.
+        resume (bool, optional): Whether to continue the run from its last
+            checkpoint instead of starting a new one. The replay file and
+            the stopping criteria continue from the checkpoint, and a
+            single-process run, experience buffer included, resumes exactly
+            where it stopped. Defaults to False.
+        checkpoint_every (int, optional): The number of episodes between two
+            checkpoints, 0 to disable them. Defaults to CHECKPOINT_INTERVAL.
+        stopping (EarlyStopping | None, optional): The criteria to stop
+            before the last episode, None to play them all. Defaults to None.
+        experience_config (ExperienceConfig | None, optional): The settings
+            of the experience buffer, None to update the Q-table online at
+            every move. Defaults to None.
+        config (Config | None, optional): The settings of the games and of
+            the training (grid size, rewards, episodes, learning and
+            exploration rates), the defaults of `engine.settings` if None.
+            Defaults to None.
+        verbose (bool, optional): Whether to print the progress bar and the
+            messages of the run. Defaults to True.
+
+    Returns:
+        dict: The summary of the run, as written to
+        `data/<filename>_summary.json`.
+
+    Raises:
+        FileNotFoundError: If resuming a run that has no checkpoint.
+        ValueError: If the options are invalid or the checkpoint is
+        corrupted.
     """
-    global EPSILON
+    config = Config() if config is None else config
+    config.validate()
 
-    env = Game()
-    all_action: list[list] = list()
-    filepath = f"data/{filename}.csv"
+    if workers < 1:
+        raise ValueError("Number of workers must be greater than 0")
+    if profile and workers > 1:
+        raise ValueError("Profiling runs on a single process (--workers 1)")
+    if checkpoint_every < 0:
+        raise ValueError("Checkpoint interval must not be negative")
+    if experience_config is not None:
+        experience_config.validate()
+
+    profiler = None
+    if profile:
+        profiler = Profiler(parse_window(trace_window))
+
+    if stopping is not None and not stopping.is_enabled():
+        stopping = None
+
+    begin = time.perf_counter()
+    seeds = spawn_seeds(seed, workers)
+    policy = ReplayPolicy(replay_policy)
 
     os.makedirs("data", exist_ok=True)
+    filepath = table_path(filename)
+    metrics_path = f"data/{filename}_rewards.csv"
+    checkpoint = None
+    table = QTable()
+    start = 0
+    epsilon = config.epsilon
+
+    if resume:
+        checkpoint = load_checkpoint(checkpoint_path(filename))
+        table = checkpoint.table
+        start = checkpoint.meta["episode"]
+        epsilon = checkpoint.meta["epsilon"]
+        metrics = MetricsWriter(metrics_path,
+                                offset=checkpoint.meta["metrics"])
+        if verbose:
+            print(f"Resuming {filename} after episode {start}")
+    else:
+        if os.path.exists(filepath):
+            table = load_table(filepath)
+        metrics = MetricsWriter(metrics_path)
+
+    recorder = ReplayRecorder(
+        REPLAY_FILE, policy,
+        None if checkpoint is None else checkpoint.meta.get("replay"),
+    )
+    if stopping is not None and checkpoint is not None:
+        if checkpoint.meta.get("stopping"):
+            stopping.import_state(checkpoint.meta["stopping"], table)
+
+    checkpointer = None
+    if checkpoint_every:
+        checkpointer = Checkpointer(checkpoint_path(filename), checkpoint)
+    else:
+        checkpoint_every = config.episodes
+
+    played, reason = start, None
 
-    if not os.path.exists(filepath):
-        with open(filepath, "w", newline="") as f:
-            pass
+    if workers > 1:
+        played, reason = train_parallel(
+            table, workers, recorder, metrics, seeds, start, checkpointer,
+            checkpoint_every, stopping, experience_config, config, verbose,
+        )
+        epsilon = epsilon_at(played, config)
     else:
-        with open(filepath, "r", newline="") as f:
-            load_Q(f)
-
-    # Create rewards log file
-    with open(f"data/{filename}.csv", "w+", newline="") as f:
-        for i in range(settings.EPISODES):
-            is_last = False
-            env.start()
-            snake = env.get_snake()
-            s = snake.get_state()
-            all_action.append(list())
-            replay.reset_replay()
-
-            while not is_last:
-                a = action(Q, s, EPSILON)
-                try:
-                    r = snake.move(list(Direction)[a])
-                except GameOver:
-                    is_last = True
-                    r = settings.GAMEOVER_REWARD  # Penalty for dying
-
-                replay.save_game_state(env, list(Direction)[a])
-                s_next = snake.get_state()
-
-                # Q-learning update rule
-                next_action = max(
-                    range(4),
-                    key=lambda a: get_Q(Q, s_next, a)
-                )
-                next_q = get_Q(Q, s_next, next_action)
-                invAlpha = 1 - settings.ALPHA
-                q = get_Q(Q, s, a)
-                tmp = (r + settings.GAMMA * next_q)
-                Q[(tuple(s), a)] = invAlpha * q + settings.ALPHA * tmp
-
-                s = s_next
-                all_action[i].append(tuple(s))
-
-            progress_bar(i + 1)
-
-            EPSILON *= settings.EPSILON_DECAY
-            EPSILON = max(EPSILON, settings.EPSILON_MIN)
-
-        replay.create_replay("train_replay")
-
-        writer = csv.writer(f)
-        writer.writerow(["State", "Action", "Q_Value"])
-
-        for (state, a), q_value in Q.items():
-            writer.writerow([state, list(Direction)[a].name, q_value])
+        # Same streams as the first worker of a parallel run
+        env, state = init_state(table, seeds[0], experience_config, config,
+                                profiler)
+        profiler = state.profiler
+
+        if checkpoint is not None and checkpoint.meta["game_rng"]:
+            env.get_rng().import_state(checkpoint.meta["game_rng"])
+            state.rng.import_state(checkpoint.meta["agent_rng"])
+        if checkpoint is not None and state.experience is not None:
+            if checkpoint.meta.get("experience"):
+                state.experience.import_state(checkpoint.meta["experience"],
+                                              checkpointer.get_path())
+
+        for i in range(start, config.episodes):
+            played = i + 1
+            profiler.begin_episode(played)
+            log = new_log(played, policy, state.rng)
+            stats = run_episode(state, env, epsilon, log)
+            metrics.add(played, stats, epsilon)
+            recorder.add_episode(
+                played, None if log is None else log.to_dict(played)
+            )
+            profiler.mark("replay")
+
+            if verbose:
+                progress_bar(played, config.episodes)
+            profiler.mark("progress")
+
+            epsilon *= config.epsilon_decay
+            epsilon = max(epsilon, config.epsilon_min)
+
+            if stopping is not None:
+                stopping.add(stats)
+                reason = stopping.check(played, table)
+            profiler.mark("stopping")
+
+            if (
+                reason or played % checkpoint_every == 0
+                or played == config.episodes
+            ):
+                save_checkpoint(checkpointer, state, played, epsilon, metrics,
+                                recorder, stopping, env)
+            profiler.mark("checkpoint")
+            profiler.end_episode(stats.length)
+
+            if reason:
+                break
+
+    if reason and verbose:
+        print(f"\nStopped after episode {played}: {reason}")
+
+    recorder.close()
+    metrics.close()
+
+    save_table(table, filepath)
+    summary = {
+        "episodes": played,
+        "planned": config.episodes,
+        "resumed_from": start if resume else None,
+        "stopped": reason,
+        "criteria": None if stopping is None else stopping.get_criteria(),
+        "last_check": None if stopping is None else stopping.get_last(),
+        "epsilon": epsilon,
+        "experience": (
+            None if experience_config is None else experience_config._asdict()
+        ),
+        "seed": seed,
+        "workers": workers,
+        "config": config._asdict(),
+        "seconds": round(time.perf_counter() - begin, 3),
+    }
+    write_summary(f"data/{filename}_summary.json", summary)
+
+    if profile:
+        print(profiler.report())
+        profiler.write_episodes(f"data/{filename}_profile.csv")
+        profiler.write_trace(f"data/{filename}_trace.json")
+
+    return summary
 
 
 if __name__ == "__main__":
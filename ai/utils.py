@@ -1,23 +1,24 @@
-import numpy as np
 from engine.direction import Direction
+from engine.rng import RandomPool
+from ai.qtable import QTable
 
 
-def get_Q(Q: dict, state: list[bool], action: int) -> float:
+def get_Q(Q: QTable, state_id: int, action: int) -> float:
     """
     Retrieves the Q-value for a given (state, action) pair.
 
     Args:
-        Q (dict): The Q-table mapping (state, action) pairs to Q-values.
-        state (list[bool]): The current state of the agent (snake).
+        Q (QTable): The Q-table mapping (state, action) pairs to Q-values.
+        state_id (int): The packed state of the agent (snake).
         action (int): The action index (0 to 3, representing directions).
 
     Returns:
         float: The Q-value for the given pair, or 10.0 if not yet defined.
     """
-    return Q.get((tuple(state), action), 10.0)
+    return Q.get(state_id, action)
 
 
-def action(Q: dict, state: list[bool], explo: float) -> int:
+def action(Q: QTable, state_id: int, explo: float, rng: RandomPool) -> int:
     """
     Chooses an action using the epsilon-greedy strategy.
 
@@ -28,16 +29,17 @@ def action(Q: dict, state: list[bool], explo: float) -> int:
     given state (exploitation).
 
     Args:
-        Q (dict): The Q-table mapping (state, action) pairs to Q-values.
-        state (list[bool]): The current perception/state of the agent
+        Q (QTable): The Q-table mapping (state, action) pairs to Q-values.
+        state_id (int): The packed perception/state of the agent
         (e.g., snake vision).
         explo (float): The exploration rate (epsilon), between 0 and 1.
+        rng (RandomPool): The generator of the agent.
 
     Returns:
         int: The index of the selected action
         (e.g., 0 to 3 corresponding to directions).
     """
-    if np.random.uniform() < explo:
-        return np.random.randint(0, len(Direction))  # Exploration
+    if rng.random() < explo:
+        return rng.randrange(len(Direction))  # Exploration
     else:
-        return max(range(4), key=lambda a: get_Q(Q, state, a))  # Exploitation
+        return Q.best_action(state_id)  # Exploitation
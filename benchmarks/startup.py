@@ -0,0 +1,174 @@
+"""
+Checks the start-up cost of the headless `snake` commands.
+
+Runs `python -X importtime snake --help`, which performs every module-level
+import of the entry script, and fails if a rendering or plotting module gets
+imported or if the imports take longer than the budget. The time checked is
+the median of several runs, so that a single slow run on a busy machine does
+not fail it.
+
+Usage:
+    python benchmarks/startup.py [--budget MS] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time allowed for the headless commands, in milliseconds
+STARTUP_BUDGET_MS = 200
+
+# Runs whose median import time is checked against the budget
+STARTUP_RUNS = 5
+
+# Modules that the headless commands must not load: the renderer, and the
+# heavy plotting libraries
+FORBIDDEN_MODULES = ("pygame", "engine.renderer", "pandas", "plotly")
+
+
+def measure_imports(root: str = ROOT) -> dict[str, int]:
+    """
+    Runs the entry script under `-X importtime` and parses its report.
+
+    Args:
+        root (str, optional): The directory of the entry script. Defaults to
+            the repository root.
+
+    Returns:
+        dict[str, int]: The cumulative import time in microseconds of every
+        imported module, by name. Nested imports keep their indentation.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "snake", "--help"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imports = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _, cumulative, name = line.split("|")
+        if cumulative.strip() == "cumulative":
+            continue
+
+        imports[name.rstrip()[1:]] = int(cumulative)
+
+    return imports
+
+
+def top_level(imports: dict[str, int]) -> dict[str, int]:
+    """
+    Keeps the modules imported by the entry script itself.
+
+    Args:
+        imports (dict[str, int]): The report of `measure_imports()`.
+
+    Returns:
+        dict[str, int]: The cumulative import time in microseconds of each
+        top-level module, by name.
+    """
+    # Nested imports are indented below the module importing them
+    return {
+        name: us for name, us in imports.items() if not name.startswith(" ")
+    }
+
+
+def forbidden_imports(imports: dict[str, int]) -> list[str]:
+    """
+    Lists the imported modules that the headless commands must not load.
+
+    Args:
+        imports (dict[str, int]): The report of `measure_imports()`.
+
+    Returns:
+        list[str]: The names of the forbidden modules, nested or not.
+    """
+    forbidden = []
+
+    for name in imports:
+        name = name.strip()
+        package = name.split(".")[0]
+        if name in FORBIDDEN_MODULES or package in FORBIDDEN_MODULES:
+            forbidden.append(name)
+
+    return forbidden
+
+
+def measure_startup(root: str = ROOT,
+                    runs: int = STARTUP_RUNS) -> tuple[float, dict[str, int]]:
+    """
+    Measures the import time of the entry script over several runs.
+
+    Args:
+        root (str, optional): The directory of the entry script. Defaults to
+            the repository root.
+        runs (int, optional): The number of runs. Defaults to STARTUP_RUNS.
+
+    Returns:
+        tuple[float, dict[str, int]]: The median total import time in
+        milliseconds, and the report of the median run.
+
+    Raises:
+        ValueError: If runs is lower than 1.
+    """
+    if runs < 1:
+        raise ValueError("Number of runs must be greater than 0")
+
+    measures = []
+    for _ in range(runs):
+        imports = measure_imports(root)
+        measures.append((sum(top_level(imports).values()) / 1000, imports))
+
+    measures.sort(key=lambda measure: measure[0])
+    total_ms = statistics.median(total for total, _ in measures)
+
+    return total_ms, measures[len(measures) // 2][1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS,
+                        help="Import time budget in milliseconds")
+    parser.add_argument("--runs", type=int, default=STARTUP_RUNS,
+                        help="Number of runs whose median is checked")
+    parser.add_argument("--root", default=ROOT,
+                        help="Directory of the snake entry script")
+    args = parser.parse_args()
+
+    try:
+        total_ms, imports = measure_startup(args.root, args.runs)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    failed = False
+
+    forbidden = forbidden_imports(imports)
+    if forbidden:
+        print(f"FAIL: headless start-up imports {forbidden[0]}")
+        failed = True
+
+    modules = top_level(imports)
+    for name, us in sorted(modules.items(), key=lambda i: -i[1])[:5]:
+        print(f"{us / 1000:8.1f} ms  {name}")
+
+    print(f"{total_ms:8.1f} ms  median total of {args.runs} runs "
+          f"(budget {args.budget:.0f} ms)")
+
+    if total_ms > args.budget:
+        print("FAIL: start-up import time over budget")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+"""
+Times the engine and the agent and compares the results with a baseline.
+
+Micro benchmarks time `Snake.move`, `Snake.get_state`, `World.get_location`,
+`World.spawn_entity`, `Game.start` and the Q-learning update for several
+grid sizes and snake lengths. Macro benchmarks time whole training and
+evaluation episodes. The per-call cost is expected to stay flat from the
+smallest grid to the largest. Results are written to JSON; `compare` flags the
+benchmarks that got slower than the baseline by more than a threshold.
+
+Timings depend on the machine, so the baseline is not part of the
+repository: record it with `run --out benchmarks/baseline.json` before
+changing the code.
+
+Usage:
+    python benchmarks/suite.py run [--out FILE] [--sizes 10x10,20x20]
+                                   [--lengths 3,20] [--quick]
+    python benchmarks/suite.py compare [BASELINE] [CURRENT] [--threshold R]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+from collections.abc import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import ai.play as play  # noqa: E402
+import ai.train as train  # noqa: E402
+from ai.qtable import QTable  # noqa: E402
+from engine.config import Config  # noqa: E402
+from engine.direction import Direction  # noqa: E402
+from engine.entity.apple import Apple, AppleType  # noqa: E402
+from engine.game import Game  # noqa: E402
+from engine.rng import RandomPool  # noqa: E402
+
+DEFAULT_SIZES = ((10, 10), (64, 64), (512, 512))
+DEFAULT_LENGTHS = (3, 20, 60)
+
+# Files used by `run --out` and `compare` by default
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.json")
+
+# Slowdown ratio over which `compare` reports a regression
+REGRESSION_THRESHOLD = 0.20
+
+# Seed of every game and agent of the suite
+SEED = 42
+
+
+def hamiltonian_cycle(width: int, height: int) -> list[tuple[int, int]]:
+    """
+    Builds a cycle going through every cell of the grid once.
+
+    A snake following it never bites itself, whatever its length.
+
+    Args:
+        width (int): The width of the grid, without walls.
+        height (int): The height of the grid, without walls.
+
+    Returns:
+        list[tuple[int, int]]: The cells of the cycle, in order.
+
+    Raises:
+        ValueError: If both dimensions are odd (no such cycle exists).
+    """
+    if height % 2:
+        if width % 2:
+            raise ValueError("Grid needs an even width or height")
+        return [(x, y) for y, x in hamiltonian_cycle(height, width)]
+
+    cycle = [(x, 1) for x in range(1, width + 1)]
+
+    for y in range(2, height + 1):
+        columns = range(width, 1, -1) if y % 2 == 0 else range(2, width + 1)
+        cycle.extend((x, y) for x in columns)
+
+    cycle.extend((1, y) for y in range(height, 1, -1))
+
+    return cycle
+
+
+def snake_game(
+    width: int, height: int, length: int, apples: bool
+) -> tuple[Game, list[tuple[int, int]]]:
+    """
+    Builds a game whose snake lies on the Hamiltonian cycle of the grid.
+
+    Args:
+        width (int): The width of the grid, without walls.
+        height (int): The height of the grid, without walls.
+        length (int): The size of the snake, head included.
+        apples (bool): Whether to add the three apples of a game.
+
+    Returns:
+        tuple[Game, list[tuple[int, int]]]: The game and the cycle, the head
+        being on its cell `length - 1`.
+    """
+    cycle = hamiltonian_cycle(width, height)
+    game = Game(SEED, Config(width=width, height=height))
+
+    body = [cycle[i] for i in range(length - 2, -1, -1)]
+    game.set_snake(cycle[length - 1], body)
+
+    if apples:
+        world = game.get_world()
+        for apple_type in (AppleType.GREEN, AppleType.GREEN, AppleType.RED):
+            world.spawn_entity(Apple(world, apple_type))
+
+    return game, cycle
+
+
+def measure(fn: Callable[[], object], number: int, repeat: int) -> float:
+    """
+    Times a function.
+
+    Args:
+        fn (Callable[[], object]): The function to time.
+        number (int): The number of calls per round.
+        repeat (int): The number of rounds.
+
+    Returns:
+        float: The time per call of the fastest round, in nanoseconds.
+    """
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter_ns() - start)
+
+    return best / number
+
+
+def bench_move(width: int, height: int, length: int, number: int,
+               repeat: int) -> float:
+    """
+    Times `Snake.move` along the Hamiltonian cycle, without apples.
+    """
+    game, cycle = snake_game(width, height, length, apples=False)
+    snake = game.get_snake()
+    n = len(cycle)
+    position = {cell: i for i, cell in enumerate(cycle)}
+    directions = {d.value: d for d in Direction}
+
+    def move():
+        x, y = snake.get_position()
+        nx, ny = cycle[(position[(x, y)] + 1) % n]
+        snake.move(directions[(nx - x, ny - y)])
+
+    return measure(move, number, repeat)
+
+
+def bench_get_state(width: int, height: int, length: int, number: int,
+                    repeat: int) -> float:
+    """
+    Times `Snake.get_state` with the three apples on the grid.
+    """
+    game, _ = snake_game(width, height, length, apples=True)
+
+    return measure(game.get_snake().get_state, number, repeat)
+
+
+def bench_get_location(width: int, height: int, number: int,
+                       repeat: int) -> float:
+    """
+    Times `World.get_location` on cells spread over the grid.
+    """
+    game, _ = snake_game(width, height, 3, apples=True)
+    world = game.get_world()
+    rng = RandomPool(SEED)
+    cells = [
+        (rng.randrange(width + 2), rng.randrange(height + 2))
+        for _ in range(256)
+    ]
+    i = 0
+
+    def get_location():
+        nonlocal i
+        i = (i + 1) & 255
+        world.get_location(*cells[i])
+
+    return measure(get_location, number, repeat)
+
+
+def bench_spawn_entity(width: int, height: int, length: int, number: int,
+                       repeat: int) -> float:
+    """
+    Times `World.spawn_entity` followed by `World.remove_entity`, the way
+    an eaten apple respawns.
+    """
+    game, _ = snake_game(width, height, length, apples=True)
+    world = game.get_world()
+    apple = Apple(world, AppleType.GREEN)
+
+    def spawn():
+        world.spawn_entity(apple)
+        world.remove_entity(apple)
+
+    return measure(spawn, number, repeat)
+
+
+def bench_start(width: int, height: int, number: int, repeat: int) -> float:
+    """
+    Times `Game.start`.
+    """
+    game = Game(SEED, Config(width=width, height=height))
+
+    return measure(game.start, number, repeat)
+
+
+def bench_q_update(number: int, repeat: int) -> float:
+    """
+    Times the Q-learning update of one transition, as done in training.
+    """
+    table = QTable()
+    config = Config()
+    rng = RandomPool(SEED)
+    transitions = [
+        (rng.randrange(4096), rng.randrange(4), rng.randrange(4096))
+        for _ in range(256)
+    ]
+    i = 0
+
+    def update():
+        nonlocal i
+        i = (i + 1) & 255
+        s, a, s_next = transitions[i]
+        table.update(s, a, -1, s_next, config.alpha, config.gamma)
+
+    return measure(update, number, repeat)
+
+
+def bench_training(
+    width: int, height: int, episodes: int
+) -> tuple[float, QTable]:
+    """
+    Times training episodes from an empty Q-table.
+
+    Args:
+        width (int): The width of the grid, without walls.
+        height (int): The height of the grid, without walls.
+        episodes (int): The number of episodes.
+
+    Returns:
+        tuple[float, QTable]: The time per move in nanoseconds, and the
+        trained Q-table.
+    """
+    state = train.TrainerState(QTable(), RandomPool(SEED))
+    env = Game(SEED, Config(width=width, height=height))
+    config = env.get_config()
+    steps = 0
+
+    start = time.perf_counter_ns()
+    for i in range(episodes):
+        epsilon = train.epsilon_at(i, config)
+        steps += train.run_episode(state, env, epsilon).length
+    elapsed = time.perf_counter_ns() - start
+
+    return elapsed / steps, state.table
+
+
+def bench_evaluation(
+    width: int, height: int, table: QTable, games: int
+) -> float:
+    """
+    Times greedy evaluation games.
+
+    Args:
+        width (int): The width of the grid, without walls.
+        height (int): The height of the grid, without walls.
+        table (QTable): The Q-table playing the games.
+        games (int): The number of games.
+
+    Returns:
+        float: The time per game in nanoseconds.
+    """
+    config = Config(width=width, height=height)
+
+    start = time.perf_counter_ns()
+    for i in range(games):
+        play.play(table, False, False, SEED + i, config)
+
+    return (time.perf_counter_ns() - start) / games
+
+
+def run(
+    sizes: list[tuple[int, int]], lengths: list[int], quick: bool
+) -> dict:
+    """
+    Runs the whole suite.
+
+    Args:
+        sizes (list[tuple[int, int]]): The (width, height) grid sizes.
+        lengths (list[int]): The snake lengths.
+        quick (bool): Whether to run fewer iterations.
+
+    Returns:
+        dict: The results, keyed by benchmark name, in nanoseconds per
+        operation.
+    """
+    number = 2_000 if quick else 20_000
+    repeat = 3 if quick else 5
+    episodes = 100 if quick else 1_000
+    games = 10 if quick else 100
+    results = {}
+
+    def record(name: str, unit: str, ns: float) -> None:
+        results[name] = {"ns": round(ns, 1), "unit": unit}
+        print(f"{name:<40} {ns:>14,.0f} ns/{unit}")
+
+    record("q_update", "update", bench_q_update(number, repeat))
+
+    for width, height in sizes:
+        grid = f"{width}x{height}"
+
+        record(f"game.start[{grid}]", "call",
+               bench_start(width, height, number // 10, repeat))
+        record(f"world.get_location[{grid}]", "call",
+               bench_get_location(width, height, number, repeat))
+
+        for length in lengths:
+            if length > width * height - 4:
+                continue
+
+            case = f"{grid},len={length}"
+            record(f"snake.move[{case}]", "call",
+                   bench_move(width, height, length, number, repeat))
+            record(f"snake.get_state[{case}]", "call",
+                   bench_get_state(width, height, length, number, repeat))
+            record(f"world.spawn_entity[{case}]", "call",
+                   bench_spawn_entity(width, height, length, number,
+                                      repeat))
+
+        ns, table = bench_training(width, height, episodes)
+        record(f"train.episode[{grid}]", "move", ns)
+        record(f"play.episode[{grid}]", "game",
+               bench_evaluation(width, height, table, games))
+
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """
+    Prints the change of every benchmark found in both result sets.
+
+    Args:
+        baseline (dict): The baseline results file content.
+        current (dict): The current results file content.
+        threshold (float): The slowdown ratio flagged as a regression.
+
+    Returns:
+        bool: True if no benchmark regressed.
+    """
+    regressions = 0
+
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<40} {'(new)':>10}")
+            continue
+
+        change = result["ns"] / reference["ns"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+
+        print(f"{name:<40} {change:>+10.1%}{flag}")
+
+    print(f"\n{regressions} regression(s) over {threshold:.0%}")
+
+    return regressions == 0
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    """
+    Parses a grid size written as WIDTHxHEIGHT.
+
+    Args:
+        text (str): The grid size, e.g. "10x10".
+
+    Returns:
+        tuple[int, int]: The width and height.
+    """
+    try:
+        width, height = (int(n) for n in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid grid size '{text}'")
+
+    if width < 3 or height < 3 or (width % 2 and height % 2):
+        raise argparse.ArgumentTypeError(
+            f"Grid size '{text}' must be at least 3x3 with an even side"
+        )
+
+    return width, height
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--out", default=RESULTS_FILE,
+                            help="JSON file receiving the results")
+    run_parser.add_argument("--sizes", default=None,
+                            help="Comma-separated grid sizes, e.g. 10x10")
+    run_parser.add_argument("--lengths", default=None,
+                            help="Comma-separated snake lengths")
+    run_parser.add_argument("--quick", action="store_true",
+                            help="Run fewer iterations")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare results with a baseline"
+    )
+    compare_parser.add_argument("baseline", nargs="?", default=BASELINE_FILE,
+                                help="Baseline results")
+    compare_parser.add_argument("current", nargs="?", default=RESULTS_FILE,
+                                help="Results to check")
+    compare_parser.add_argument("--threshold", type=float,
+                                default=REGRESSION_THRESHOLD,
+                                help="Slowdown ratio flagged as a regression")
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        # Timings depend on the machine, so no baseline is committed
+        missing = {
+            args.baseline: "No baseline at {0}, record one on this machine "
+                           "with:\n  python benchmarks/suite.py run "
+                           "--out {0}",
+            args.current: "No results at {0}, run the benchmarks first "
+                          "with:\n  python benchmarks/suite.py run "
+                          "--out {0}",
+        }
+        for path, message in missing.items():
+            if not os.path.exists(path):
+                shown = os.path.relpath(path)
+                if shown.startswith(".."):
+                    shown = path
+                print(message.format(shown), file=sys.stderr)
+                return 2
+
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+
+        return 0 if compare(baseline, current, args.threshold) else 1
+
+    try:
+        sizes = DEFAULT_SIZES
+        if args.sizes:
+            sizes = [parse_size(size) for size in args.sizes.split(",")]
+        lengths = DEFAULT_LENGTHS
+        if args.lengths:
+            lengths = [int(length) for length in args.lengths.split(",")]
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    results = run(sizes, lengths, args.quick)
+
+    with open(args.out, "w") as file:
+        json.dump({
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "quick": args.quick,
+            "results": results,
+        }, file, indent=2)
+
+    print(f"\nResults written to {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+from typing import NamedTuple
+import engine.settings as settings
+
+
+class Config(NamedTuple):
+    """
+    Settings of a game and of its training.
+
+    Each game carries its own configuration, so that games with different
+    settings can run in the same process. The defaults are the values of
+    `engine.settings`.
+
+    Attributes:
+        width (int): The number of columns of the world, without walls.
+        height (int): The number of rows of the world, without walls.
+        red_apple_reward (int): The reward for eating a red apple.
+        green_apple_reward (int): The reward for eating a green apple.
+        gameover_reward (int): The reward of the move that ends the game.
+        eat_nothing_reward (int): The reward of any other move.
+        episodes (int): The number of training episodes.
+        alpha (float): The learning rate.
+        gamma (float): The discount factor.
+        epsilon (float): The exploration rate of the first episode.
+        epsilon_decay (float): The factor applied to epsilon after each
+            episode.
+        epsilon_min (float): The lowest exploration rate.
+    """
+
+    width: int = settings.WIDTH
+    height: int = settings.HEIGHT
+    red_apple_reward: int = settings.RED_APPLE_REWARD
+    green_apple_reward: int = settings.GREEN_APPLE_REWARD
+    gameover_reward: int = settings.GAMEOVER_REWARD
+    eat_nothing_reward: int = settings.EAT_NOTHING_REWARD
+    episodes: int = settings.EPISODES
+    alpha: float = settings.ALPHA
+    gamma: float = settings.GAMMA
+    epsilon: float = settings.EPSILON
+    epsilon_decay: float = settings.EPSILON_DECAY
+    epsilon_min: float = settings.EPSILON_MIN
+
+    def validate(self) -> None:
+        """
+        Checks that the settings are usable.
+
+        Raises:
+            ValueError: If the world is smaller than 3x3, there is no
+            episode, or a rate is out of [0, 1].
+        """
+        if self.height < 3 or self.width < 3:
+            raise ValueError("Height and width must be >= 3")
+        if self.episodes < 1:
+            raise ValueError("Number of episodes must be greater than 0")
+
+        rates = ("alpha", "gamma", "epsilon", "epsilon_decay", "epsilon_min")
+        for name in rates:
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
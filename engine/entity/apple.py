@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, auto
 from engine.entity.entity import Entity
 from engine.world import World
 import engine.settings as settings
@@ -8,11 +8,11 @@ class AppleType(Enum):
     """
     Enumeration representing the type of an apple in the game.
 
-    The value of each enum corresponds to the reward value associated
-    with that type of apple.
+    The reward of each type comes from the configuration of the game, see
+    `Apple.get_reward()`.
     """
-    RED = settings.RED_APPLE_REWARD
-    GREEN = settings.GREEN_APPLE_REWARD
+    RED = auto()
+    GREEN = auto()
 
 
 class Apple(Entity):
@@ -83,9 +83,15 @@ class Apple(Entity):
 
     def get_reward(self) -> int:
         """
-        Retrieves the reward value associated with the apple type.
+        Retrieves the reward value associated with the apple type in the
+        configuration of the world.
 
         Returns:
             int: The numeric reward value of the apple.
         """
-        return self.__apple_type.value
+        config = self.__world.get_config()
+
+        if self.is_green():
+            return config.green_apple_reward
+
+        return config.red_apple_reward
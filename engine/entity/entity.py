@@ -91,6 +91,15 @@ class Entity(ABC):
         """
         return (x, y) == self.get_position()
 
+    def get_cells(self) -> list[tuple[int, int]]:
+        """
+        Returns every cell of the world covered by the entity.
+
+        Returns:
+            list[tuple[int, int]]: The (x, y) coordinates of the covered cells.
+        """
+        return [self.get_position()]
+
     @abstractmethod
     def get_char(self) -> str:
         """
@@ -3,7 +3,7 @@ from engine.exception.gameover import GameOver
 from engine.entity.apple import Apple
 from engine.world import World
 from engine.entity.entity import Entity
-import random
+import engine.state as state
 import engine.settings as settings
 from collections import deque
 
@@ -16,10 +16,16 @@ class Snake(Entity):
     Attributes:
         __body (deque[tuple[int, int]]):
             Deque of tuples representing the snake's body segments.
+        __body_cells (dict[tuple[int, int], int]):
+            How many body segments cover each cell, kept in sync with
+            `__body` for O(1) collision checks.
         __world (World):
             The game world where the snake exists.
         __last_direction (Direction):
             The last movement direction of the snake.
+        __nothing_reward (int):
+            The reward of a move that eats nothing, from the world's
+            configuration.
     """
 
     def __init__(self, world: World):
@@ -36,9 +42,13 @@ class Snake(Entity):
         super().__init__()
 
         self.__body: deque[tuple[int, int]] = deque()
+        self.__body_cells: dict[tuple[int, int], int] = {}
         self.__world: World = world
-        self.__last_direction: Direction = random.choice(list(Direction))
+        self.__last_direction: Direction = world.get_rng().choice(
+            list(Direction)
+        )
         self.__is_dead: bool = False
+        self.__nothing_reward: int = world.get_config().eat_nothing_reward
 
         dir_x, dir_y = self.__last_direction.value
         x, y = self.get_position()
@@ -49,6 +59,40 @@ class Snake(Entity):
             y += dir_y
             self.__body.append((x, y))
 
+        self.__index_body()
+
+    def __index_body(self) -> None:
+        """
+        Rebuilds the body membership index from the body deque.
+        """
+        self.__body_cells = {}
+
+        for segment in self.__body:
+            self.__add_body_cell(segment)
+
+    def __add_body_cell(self, segment: tuple[int, int]) -> None:
+        """
+        Records a body segment in the membership index.
+
+        Args:
+            segment (tuple[int, int]): The (x, y) position of the segment.
+        """
+        self.__body_cells[segment] = self.__body_cells.get(segment, 0) + 1
+
+    def __remove_body_cell(self, segment: tuple[int, int]) -> None:
+        """
+        Forgets a body segment from the membership index.
+
+        Args:
+            segment (tuple[int, int]): The (x, y) position of the segment.
+        """
+        count = self.__body_cells[segment] - 1
+
+        if count:
+            self.__body_cells[segment] = count
+        else:
+            del self.__body_cells[segment]
+
     def teleport(self, x: int, y: int) -> None:
         """
         Teleports the snake to a new position and resets its body direction.
@@ -68,7 +112,7 @@ class Snake(Entity):
             is_empty = False
 
             while not is_empty and len(all_dir) > 0:
-                self.__last_direction = random.choice(all_dir)
+                self.__last_direction = self.__world.get_rng().choice(all_dir)
                 dir_x, dir_y = self.__last_direction.value
 
                 x += dir_x
@@ -88,6 +132,7 @@ class Snake(Entity):
                 break
 
         self.__body = new_body
+        self.__index_body()
 
     def move(self, direction: Direction) -> int:
         """
@@ -101,13 +146,13 @@ class Snake(Entity):
         Raises:
             GameOver: If the snake collides with an obstacle or itself.
         """
-        reward = settings.EAT_NOTHING_REWARD
+        reward = self.__nothing_reward
         x, y = direction.value
         new_x = self.get_x() + x
         new_y = self.get_y() + y
         info = self.__world.get_location(new_x, new_y)
 
-        if info.is_wall() or (new_x, new_y) in self.__body:
+        if info.is_wall() or (new_x, new_y) in self.__body_cells:
             self.__is_dead = True
             raise GameOver("End game")
 
@@ -116,8 +161,14 @@ class Snake(Entity):
         self.__last_direction = direction
 
         # Move the body segments following the head
-        self.__body.appendleft((self.get_x() - x, self.get_y() - y))
-        self.__body.pop()
+        neck = (self.get_x() - x, self.get_y() - y)
+        self.__body.appendleft(neck)
+        self.__add_body_cell(neck)
+        tail_x, tail_y = self.__body.pop()
+        self.__remove_body_cell((tail_x, tail_y))
+
+        self.__world.occupy_cell(new_x, new_y, self)
+        self.__world.release_cell(tail_x, tail_y, self)
 
         if isinstance(info.get_entity(), Apple):
             reward = self.eat(info.get_entity())
@@ -144,13 +195,18 @@ class Snake(Entity):
                 last_body = self.get_position()
 
             # Grow the snake by adding a new body segment
-            self.__body.append((last_body[0] + x, last_body[1] + y))
+            segment = (last_body[0] + x, last_body[1] + y)
+            self.__body.append(segment)
+            self.__add_body_cell(segment)
+            self.__world.occupy_cell(segment[0], segment[1], self)
         else:
             if not self.__body:
                 raise GameOver("End game")
 
             # Remove the last body segment
-            self.__body.pop()
+            tail_x, tail_y = self.__body.pop()
+            self.__remove_body_cell((tail_x, tail_y))
+            self.__world.release_cell(tail_x, tail_y, self)
 
         apple.consume()
         r = apple.get_reward()
@@ -195,7 +251,7 @@ class Snake(Entity):
         if x == self.get_x() and y == self.get_y():
             return settings.SNAKE_HEAD_CHAR
 
-        if (x, y) in self.__body:
+        if (x, y) in self.__body_cells:
             return settings.SNAKE_SEGMENT_CHAR
 
         return None
@@ -235,36 +291,66 @@ class Snake(Entity):
             - 6-7: Red apple on the top/bottom
             - 8-11: Wall or body on left, right, top, bottom
 
+        Only the left and top rays are scanned for apples, so the right and
+        bottom flags are always False (saved Q-tables rely on this layout).
+
         Returns:
             list[bool]: The encoded state of the environment.
         """
-        state = [False] * 12
-        see = self.see()
+        return state.unpack_state(self.get_state_id())
+
+    def get_state_id(self) -> int:
+        """
+        Returns the state from `get_state()` packed into a single integer.
 
-        for x in range(self.get_x()):
-            if see[self.get_y()][x] == settings.GREEN_APPLE_CHAR:
-                state[0 + int(x > self.get_x())] = True
-            elif see[self.get_y()][x] == settings.RED_APPLE_CHAR:
-                state[4 + int(x > self.get_x())] = True
+        Instead of casting the left and top rays cell by cell, each apple of
+        the world is projected on them, so the cost does not depend on the
+        size of the world. An apple only counts if it is the entity seen on
+        its cell, as the rays would find it.
 
-        for y in range(self.get_y()):
-            if see[y][self.get_x()] == settings.GREEN_APPLE_CHAR:
-                state[2 + int(y > self.get_y())] = True
-            elif see[y][self.get_x()] == settings.RED_APPLE_CHAR:
-                state[6 + int(y > self.get_y())] = True
+        Returns:
+            int: The state id, between 0 and 4095.
+        """
+        world = self.__world
+        head_x, head_y = self.get_position()
+        state_id = 0
 
-        not_passable = [settings.WALL_CHAR, settings.SNAKE_SEGMENT_CHAR]
+        for entity in world.get_entities():
+            if not isinstance(entity, Apple):
+                continue
 
-        if see[self.get_y()][self.get_x() - 1] in not_passable:
-            state[8] = True
-        if see[self.get_y()][self.get_x() + 1] in not_passable:
-            state[9] = True
-        if see[self.get_y() - 1][self.get_x()] in not_passable:
-            state[10] = True
-        if see[self.get_y() + 1][self.get_x()] in not_passable:
-            state[11] = True
+            x, y = entity.get_position()
 
-        return state
+            if y == head_y and x < head_x:
+                bit = state.GREEN_APPLE_LEFT
+            elif x == head_x and y < head_y:
+                bit = state.GREEN_APPLE_UP
+            else:
+                continue
+
+            if world.get_entity_at(x, y) is not entity:
+                continue
+            if not entity.is_green():
+                bit += state.RED_APPLE_LEFT - state.GREEN_APPLE_LEFT
+
+            state_id |= 1 << bit
+
+        neighbours = (
+            (head_x - 1, head_y, state.DANGER_LEFT),
+            (head_x + 1, head_y, state.DANGER_RIGHT),
+            (head_x, head_y - 1, state.DANGER_UP),
+            (head_x, head_y + 1, state.DANGER_DOWN),
+        )
+
+        for x, y, bit in neighbours:
+            if world.is_wall(x, y):
+                state_id |= 1 << bit
+            elif (x, y) in self.__body_cells and not isinstance(
+                world.get_entity_at(x, y), Apple
+            ):
+                state_id |= 1 << bit
+
+        return state_id
 
     def get_body(self) -> deque[tuple[int, int]]:
         """
@@ -285,6 +371,7 @@ class Snake(Entity):
             element is the head.
         """
         self.__body = deque(body)
+        self.__index_body()
 
     def get_size(self) -> int:
         """
@@ -299,6 +386,16 @@ class Snake(Entity):
         """
         return 1 + len(self.__body)
 
+    def get_cells(self) -> list[tuple[int, int]]:
+        """
+        Returns every cell covered by the snake, head first.
+
+        Returns:
+            list[tuple[int, int]]: The (x, y) coordinates of the head followed
+            by the body segments.
+        """
+        return [self.get_position(), *self.__body]
+
     def contains_point(self, x: int, y: int) -> bool:
         """
         Checks whether the point (x, y) is within the entity's position.
@@ -311,7 +408,7 @@ class Snake(Entity):
             bool: True if the point (x, y) is within the entity's position,
             False otherwise.
         """
-        return super().contains_point(x, y) or (x, y) in self.get_body()
+        return super().contains_point(x, y) or (x, y) in self.__body_cells
 
     def get_char(self) -> str:
         """
@@ -341,6 +438,15 @@ class Snake(Entity):
         """
         return self.__is_dead
 
+    def set_dead(self, dead: bool) -> None:
+        """
+        Sets whether the snake is dead.
+
+        Args:
+            dead (bool): True if the snake is dead.
+        """
+        self.__is_dead = dead
+
     def set_last_direction(self, direction: Direction) -> None:
         """
         Sets the last direction of the snake.
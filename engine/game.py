@@ -1,8 +1,38 @@
+from typing import NamedTuple
+import numpy as np
+from engine.config import Config
+from engine.direction import Direction
+from engine.rng import RandomPool
 from engine.world import World
 from engine.entity.snake import Snake
 from engine.entity.apple import Apple, AppleType
 
 
+class GameSnapshot(NamedTuple):
+    """
+    Immutable copy of the state of a game, see `Game.snapshot()`.
+
+    Attributes:
+        head (tuple[int, int]): The position of the snake's head.
+        body (tuple[tuple[int, int], ...]): The body segments of the snake.
+        apples (tuple[tuple[int, int, bool], ...]): Each apple as
+            (x, y, is_green), in world order.
+        direction (Direction): The last direction of the snake.
+        dead (bool): Whether the snake is dead.
+        free (tuple): The order of the free-cell set of the world, which
+            decides where apples respawn.
+        rng (tuple): The state of the random generator of the game.
+    """
+
+    head: tuple[int, int]
+    body: tuple[tuple[int, int], ...]
+    apples: tuple[tuple[int, int, bool], ...]
+    direction: Direction
+    dead: bool
+    free: tuple
+    rng: tuple
+
+
 class Game:
     """
     Manages the setup, state, and entities of the Snake game.
@@ -13,25 +43,51 @@ class Game:
     Attributes:
         __world (World): The game world that contains all entities.
         __snake (Snake): The snake instance controlled by the game logic.
+        __rng (RandomPool): The generator of every random event of the game.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        seed: int | np.random.SeedSequence | None = None,
+        config: Config | None = None,
+    ):
         """
         Initializes a Game instance without starting the game.
 
         The world is initialized, and the snake is set to None.
+
+        Args:
+            seed (int | np.random.SeedSequence | None, optional): Seed of
+                the random generator of the game, None to draw one from the
+                operating system. Defaults to None.
+            config (Config | None, optional): The settings of the game (grid
+                size, rewards, training parameters), the defaults of
+                `engine.settings` if None. Defaults to None.
+
+        Raises:
+            ValueError: If the height or the width is lower than 3.
         """
-        self.__world: World = World()
+        self.__rng: RandomPool = RandomPool(seed)
+        self.__world: World = World(self.__rng, config)
         self.__snake: Snake = None
 
-    def start(self) -> None:
+    def start(self, seed: int | None = None) -> None:
         """
         Starts or resets the game.
 
-        Initializes the world and places the snake and two apples
-        (one green and one red) at the starting position (0, 0).
+        Empties the world and places the snake and three apples (two green
+        and one red) at random. The world is reused, so restarting costs the
+        same whatever its size.
+
+        Args:
+            seed (int | None, optional): Seed to restart the random generator
+                of the game with, to start the same game again. Defaults to
+                None, which keeps drawing from the current stream.
         """
-        self.__world = World()
+        if seed is not None:
+            self.__rng.seed(seed)
+
+        self.__world.reset()
         self.__snake = Snake(self.__world)
 
         self.__world.spawn_entity(self.__snake)
@@ -39,6 +95,71 @@ class Game:
         self.__world.spawn_entity(Apple(self.__world, AppleType.GREEN))
         self.__world.spawn_entity(Apple(self.__world, AppleType.RED))
 
+    def snapshot(self) -> GameSnapshot:
+        """
+        Copies the state of the started game.
+
+        Only values are copied (positions, direction, free cells, generator
+        state), so a snapshot costs a few microseconds and can be restored
+        any number of times.
+
+        Returns:
+            GameSnapshot: The state of the game.
+        """
+        snake = self.__snake
+
+        return GameSnapshot(
+            snake.get_position(),
+            tuple(snake.get_body()),
+            tuple(
+                (entity.get_x(), entity.get_y(), entity.is_green())
+                for entity in self.__world.get_entities()
+                if isinstance(entity, Apple)
+            ),
+            snake.get_last_direction(),
+            snake.is_dead(),
+            self.__world.get_free_order(),
+            self.__rng.get_state(),
+        )
+
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """
+        Puts the game back in the state of a snapshot.
+
+        The world, the snake and the apples are updated in place: nothing is
+        reallocated. The snapshot must come from a game with the same number
+        of apples of each color.
+
+        Args:
+            snapshot (GameSnapshot): The state to restore.
+        """
+        world = self.__world
+        snake = self.__snake
+        green = []
+        red = []
+
+        for entity in list(world.get_entities()):
+            world.remove_entity(entity)
+
+            if isinstance(entity, Apple):
+                (green if entity.is_green() else red).append(entity)
+
+        snake.set_x(snapshot.head[0])
+        snake.set_y(snapshot.head[1])
+        snake.set_body(snapshot.body)
+        snake.set_last_direction(snapshot.direction)
+        snake.set_dead(snapshot.dead)
+        world.add_entity(snake)
+
+        # The snake comes first, as in `start()`
+        for x, y, is_green in snapshot.apples:
+            apple = (green if is_green else red).pop()
+            apple.teleport(x, y)
+            world.add_entity(apple)
+
+        world.set_free_order(snapshot.free)
+        self.__rng.set_state(snapshot.rng)
+
     def get_snake(self) -> Snake:
         """
         Retrieves the snake instance currently used in the game.
@@ -48,6 +169,24 @@ class Game:
         """
         return self.__snake
 
+    def get_config(self) -> Config:
+        """
+        Retrieves the settings of the game.
+
+        Returns:
+            Config: The configuration shared by the world and its entities.
+        """
+        return self.__world.get_config()
+
+    def get_rng(self) -> RandomPool:
+        """
+        Retrieves the random generator of the game.
+
+        Returns:
+            RandomPool: The generator shared by the world and its entities.
+        """
+        return self.__rng
+
     def get_world(self) -> World:
         """
         Retrieves the world instance used in the game.
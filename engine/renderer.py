@@ -1,14 +1,24 @@
+from collections import OrderedDict
 import pygame
 import engine.settings as settings
 from engine.entity.snake import Snake
 from engine.entity.apple import Apple
 
+# Text surfaces kept by the renderer, the least recently drawn go first
+TEXT_CACHE_SIZE = 64
+
 
 class PygameRenderer:
     """
     A singleton renderer that draws the game world using pygame.
 
     Replaces the terminal-based rendering with a graphical window.
+
+    The walls and the background are drawn once into a cached surface.
+    Each frame only redraws the cells whose content changed since the
+    previous frame and the text lines that changed, then updates those
+    rectangles of the window, so a frame costs the same whatever the size
+    of the board.
     """
 
     _instance = None
@@ -29,17 +39,30 @@ class PygameRenderer:
         self._title_h = 40
         self._grid_w = 0
         self._gap = 20
-
-    def _init(self):
-        if self._initialized:
+        self._background = None
+        self._texts = OrderedDict()
+        # Color drawn on each non-background cell, and text drawn on each
+        # line, by the previous frame
+        self._drawn = {}
+        self._lines = {}
+        self._full = True
+
+    def _init(self, world):
+        cols = world.get_width() + 2
+        rows = world.get_height() + 2
+
+        if self._initialized and (cols, rows) == (self._cols, self._rows):
             return
 
-        pygame.init()
-        pygame.display.set_caption("Learn2Slither")
+        if not self._initialized:
+            pygame.init()
+            pygame.display.set_caption("Learn2Slither")
 
-        self._cell = settings.CELL_SIZE
-        self._cols = settings.WIDTH + 2
-        self._rows = settings.HEIGHT + 2
+        # Large grids shrink the cells to fit in the window
+        fit = settings.GRID_MAX_SIZE // max(cols, rows)
+        self._cell = max(1, min(settings.CELL_SIZE, fit))
+        self._cols = cols
+        self._rows = rows
 
         self._grid_w = self._cols * self._cell
         grid_h = self._rows * self._cell
@@ -50,77 +73,118 @@ class PygameRenderer:
 
         self.screen = pygame.display.set_mode((total_w, total_h))
         self.font = pygame.font.Font(None, 24)
+        self._background = self._draw_background()
+        self._drawn = {}
+        self._lines = {}
+        self._full = True
         self._initialized = True
 
-    def _draw_cell(self, x, y, color, offset_x=0, offset_y=0):
-        margin = 1
+    def _draw_background(self):
+        background = pygame.Surface(self.screen.get_size())
+        background.fill(settings.COLOR_BG)
+
+        for x in range(self._cols):
+            self._draw_cell(background, x, 0, settings.COLOR_WALL)
+            self._draw_cell(background, x, self._rows - 1, settings.COLOR_WALL)
+        for y in range(1, self._rows - 1):
+            self._draw_cell(background, 0, y, settings.COLOR_WALL)
+            self._draw_cell(background, self._cols - 1, y,
+                            settings.COLOR_WALL)
+
+        return background.convert()
+
+    def _cell_rect(self, x, y):
+        return pygame.Rect(
+            x * self._cell, self._title_h + y * self._cell,
+            self._cell, self._cell,
+        )
+
+    def _draw_cell(self, surface, x, y, color):
+        margin = 1 if self._cell > 2 else 0
         pygame.draw.rect(
-            self.screen,
-            color,
-            (
-                offset_x + x * self._cell + margin,
-                offset_y + y * self._cell + margin,
-                self._cell - 2 * margin,
-                self._cell - 2 * margin,
-            ),
+            surface, color, self._cell_rect(x, y).inflate(-2 * margin,
+                                                          -2 * margin)
         )
 
-    def render(self, world, title=None):
-        self._init()
+    def _text(self, text):
+        surface = self._texts.get(text)
 
-        self.screen.fill(settings.COLOR_BG)
+        if surface is None:
+            surface = self.font.render(text, True, settings.COLOR_TEXT)
+            self._texts[text] = surface
+            if len(self._texts) > TEXT_CACHE_SIZE:
+                self._texts.popitem(last=False)
+        else:
+            self._texts.move_to_end(text)
 
-        snake = None
-        for entity in world.get_entities():
-            if isinstance(entity, Snake):
-                snake = entity
-                break
+        return surface
 
-        grid_offset_y = self._title_h
+    def _draw_line(self, position, text, dirty):
+        # Only a changed line is redrawn, over the background of the old one
+        previous = self._lines.get(position)
+        if previous is not None and previous[0] == text:
+            return
 
-        if title:
-            text_surf = self.font.render(title, True, settings.COLOR_TEXT)
-            self.screen.blit(text_surf, (10, 4))
+        if previous is not None:
+            self.screen.blit(self._background, previous[1], previous[1])
+            dirty.append(previous[1])
 
-        if snake:
-            dir_surf = self.font.render(
-                f"Direction: {snake.get_last_direction().name}",
-                True,
-                settings.COLOR_TEXT,
-            )
-            self.screen.blit(dir_surf, (10, 22))
+        rect = None
+        if text:
+            surface = self._text(text)
+            rect = self.screen.blit(surface, position)
+            dirty.append(rect)
 
-        for x in range(self._cols):
-            self._draw_cell(x, 0, settings.COLOR_WALL, 0, grid_offset_y)
-            self._draw_cell(
-                x, self._rows - 1, settings.COLOR_WALL, 0, grid_offset_y
-            )
-        for y in range(1, self._rows - 1):
-            self._draw_cell(0, y, settings.COLOR_WALL, 0, grid_offset_y)
-            self._draw_cell(
-                self._cols - 1, y, settings.COLOR_WALL, 0, grid_offset_y
-            )
+        self._lines[position] = (text, rect) if rect else None
+
+    def render(self, world, title=None):
+        self._init(world)
+
+        cells = {}
+        snake = None
 
         for entity in world.get_entities():
             if isinstance(entity, Snake):
-                hx, hy = entity.get_position()
-                self._draw_cell(
-                    hx, hy, settings.COLOR_SNAKE_HEAD, 0, grid_offset_y
-                )
-                for bx, by in entity.get_body():
-                    self._draw_cell(
-                        bx, by, settings.COLOR_SNAKE_BODY, 0, grid_offset_y
-                    )
+                snake = entity
+                for position in entity.get_body():
+                    cells[position] = settings.COLOR_SNAKE_BODY
+                cells[entity.get_position()] = settings.COLOR_SNAKE_HEAD
             elif isinstance(entity, Apple):
-                ax, ay = entity.get_position()
-                color = (
+                cells[entity.get_position()] = (
                     settings.COLOR_GREEN_APPLE
                     if entity.is_green()
                     else settings.COLOR_RED_APPLE
                 )
-                self._draw_cell(ax, ay, color, 0, grid_offset_y)
 
-        pygame.display.flip()
+        dirty = []
+
+        if self._full:
+            self.screen.blit(self._background, (0, 0))
+
+        # Cells emptied since the previous frame get their background back
+        for position in self._drawn.keys() - cells.keys():
+            rect = self._cell_rect(*position)
+            self.screen.blit(self._background, rect, rect)
+            dirty.append(rect)
+
+        for position, color in cells.items():
+            if self._drawn.get(position) != color:
+                self._draw_cell(self.screen, *position, color)
+                dirty.append(self._cell_rect(*position))
+
+        self._drawn = cells
+
+        self._draw_line((10, 4), title, dirty)
+        direction = None
+        if snake:
+            direction = f"Direction: {snake.get_last_direction().name}"
+        self._draw_line((10, 22), direction, dirty)
+
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        elif dirty:
+            pygame.display.update(dirty)
 
     @classmethod
     def quit(cls):
@@ -0,0 +1,238 @@
+import numpy as np
+
+# Random numbers drawn at a time by a RandomPool
+POOL_SIZE = 1024
+
+
+def seed_sequence(
+    seed: int | np.random.SeedSequence | None,
+) -> np.random.SeedSequence:
+    """
+    Turns a seed into a NumPy seed sequence.
+
+    Args:
+        seed (int | np.random.SeedSequence | None): The seed, None to draw
+            one from the operating system.
+
+    Returns:
+        np.random.SeedSequence: The seed sequence.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+
+    return np.random.SeedSequence(seed)
+
+
+def spawn_seeds(
+    seed: int | np.random.SeedSequence | None, n: int
+) -> list[np.random.SeedSequence]:
+    """
+    Derives N independent seed sequences from a seed.
+
+    Args:
+        seed (int | np.random.SeedSequence | None): The parent seed.
+        n (int): The number of seed sequences.
+
+    Returns:
+        list[np.random.SeedSequence]: The child seed sequences.
+    """
+    return seed_sequence(seed).spawn(n)
+
+
+class RandomPool:
+    """
+    Seeded random generator handing out numbers from pre-drawn batches.
+
+    Uniform floats are drawn POOL_SIZE at a time by a NumPy generator and
+    served one by one, so a draw costs a list lookup instead of a call into
+    NumPy or the `random` module.
+
+    Attributes:
+        __generator (np.random.Generator): The generator filling the pool.
+        __seed (np.random.SeedSequence): The seed sequence of the generator.
+        __size (int): The number of floats drawn at a time.
+        __pool (list[float]): The pre-drawn floats, in [0, 1). Replaced,
+            never modified, when refilled, so snapshots can share it.
+        __next (int): Index of the next float to hand out.
+        __generator_state (dict): State of the generator since the last
+            refill, kept so that taking a snapshot costs nothing.
+        __pool_state (dict): State of the generator before the last refill,
+            from which the pre-drawn floats can be drawn again.
+    """
+
+    def __init__(
+        self,
+        seed: int | np.random.SeedSequence | None = None,
+        size: int = POOL_SIZE,
+    ):
+        """
+        Initializes a generator.
+
+        Args:
+            seed (int | np.random.SeedSequence | None, optional): The seed,
+                None to draw one from the operating system. Defaults to None.
+            size (int, optional): The number of floats drawn at a time.
+                Defaults to POOL_SIZE.
+        """
+        if size < 1:
+            raise ValueError("Pool size must be greater than 0")
+
+        self.__size = size
+        self.seed(seed)
+
+    def seed(self, seed: int | np.random.SeedSequence | None) -> None:
+        """
+        Restarts the generator from a seed, dropping the pre-drawn floats.
+
+        Args:
+            seed (int | np.random.SeedSequence | None): The seed, None to
+                draw one from the operating system.
+        """
+        self.__seed = seed_sequence(seed)
+        self.__generator = np.random.default_rng(self.__seed)
+        self.__pool = []
+        self.__next = self.__size
+        self.__generator_state = self.__generator.bit_generator.state
+        self.__pool_state = self.__generator_state
+
+    def random(self) -> float:
+        """
+        Returns a uniform float.
+
+        Returns:
+            float: A float in [0, 1).
+        """
+        i = self.__next
+
+        if i == self.__size:
+            self.__pool_state = self.__generator_state
+            self.__pool = self.__generator.random(self.__size).tolist()
+            self.__generator_state = self.__generator.bit_generator.state
+            i = 0
+
+        self.__next = i + 1
+
+        return self.__pool[i]
+
+    def randrange(self, n: int) -> int:
+        """
+        Returns a uniform integer below N.
+
+        Args:
+            n (int): The exclusive upper bound, greater than 0.
+
+        Returns:
+            int: An integer in [0, n).
+        """
+        return int(self.random() * n)
+
+    def choice(self, seq: list) -> object:
+        """
+        Picks an element of a non-empty sequence uniformly at random.
+
+        Args:
+            seq (list): The sequence.
+
+        Returns:
+            object: The picked element.
+
+        Raises:
+            IndexError: If the sequence is empty.
+        """
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+
+        return seq[self.randrange(len(seq))]
+
+    def get_state(self) -> tuple[list[float], int, dict, dict]:
+        """
+        Returns the state of the generator, to restore it later.
+
+        The state shares the pre-drawn floats instead of copying them, so
+        this runs in constant time.
+
+        Returns:
+            tuple[list[float], int, dict, dict]: The pre-drawn floats, the
+            index of the next one and the state of the NumPy generator after
+            and before drawing them.
+        """
+        return (
+            self.__pool, self.__next, self.__generator_state,
+            self.__pool_state,
+        )
+
+    def set_state(self, state: tuple[list[float], int, dict, dict]) -> None:
+        """
+        Puts the generator back in a state returned by `get_state()`.
+
+        Args:
+            state (tuple[list[float], int, dict, dict]): The state to
+                restore.
+        """
+        pool, i, generator_state, pool_state = state
+
+        if generator_state is not self.__generator_state:
+            self.__generator.bit_generator.state = generator_state
+            self.__generator_state = generator_state
+
+        self.__pool = pool
+        self.__next = i
+        self.__pool_state = pool_state
+
+    def export_state(self) -> dict:
+        """
+        Returns the state of the generator as JSON-serializable data.
+
+        Unlike `get_state()`, the pre-drawn floats are not included: they
+        are drawn again from the state the generator had before drawing
+        them.
+
+        Returns:
+            dict: The state, to pass to `import_state()`.
+        """
+        return {
+            "generator": self.__pool_state,
+            "next": self.__next,
+            "drawn": bool(self.__pool),
+        }
+
+    def import_state(self, state: dict) -> None:
+        """
+        Puts the generator back in a state returned by `export_state()`.
+
+        Args:
+            state (dict): The state to restore.
+
+        Raises:
+            ValueError: If the state is not a valid generator state.
+        """
+        try:
+            self.__generator.bit_generator.state = state["generator"]
+            i = int(state["next"])
+            drawn = bool(state["drawn"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid random generator state")
+
+        if not 0 <= i <= self.__size:
+            raise ValueError("Invalid random generator state")
+
+        self.__pool_state = self.__generator.bit_generator.state
+        self.__pool = []
+        if drawn:
+            self.__pool = self.__generator.random(self.__size).tolist()
+        self.__generator_state = self.__generator.bit_generator.state
+        self.__next = i if drawn else self.__size
+
+    def spawn(self, n: int) -> list["RandomPool"]:
+        """
+        Creates N generators whose streams are independent of this one.
+
+        Args:
+            n (int): The number of generators.
+
+        Returns:
+            list[RandomPool]: The child generators.
+        """
+        return [
+            RandomPool(child, self.__size) for child in self.__seed.spawn(n)
+        ]
@@ -10,9 +10,11 @@ GREEN_APPLE_CHAR = "@"
 WALL_CHAR = "*"
 SNAKE_HEAD_CHAR = "#"
 SNAKE_SEGMENT_CHAR = "o"
+TERMINAL_DISPLAY = True  # Print the snake's vision with the pygame window
 
 #  Pygame Display
 CELL_SIZE = 30
+GRID_MAX_SIZE = 900  # Cells shrink below CELL_SIZE past this many pixels
 COLOR_BG = (0, 0, 0)
 COLOR_WALL = (128, 128, 128)
 COLOR_SNAKE_HEAD = (255, 220, 0)
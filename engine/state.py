@@ -0,0 +1,48 @@
+#  Layout of the 12 booleans returned by `Snake.get_state()`
+#  Bump ENCODER_VERSION whenever it changes: saved Q-tables depend on it
+ENCODER_VERSION = 1
+STATE_SIZE = 12
+STATE_COUNT = 1 << STATE_SIZE
+
+GREEN_APPLE_LEFT = 0
+GREEN_APPLE_UP = 2
+RED_APPLE_LEFT = 4
+RED_APPLE_UP = 6
+DANGER_LEFT = 8
+DANGER_RIGHT = 9
+DANGER_UP = 10
+DANGER_DOWN = 11
+
+
+def pack_state(state: list[bool] | tuple[bool, ...]) -> int:
+    """
+    Packs a 12-boolean state into its integer id.
+
+    Boolean `i` of the state becomes bit `i` of the id.
+
+    Args:
+        state (list[bool] | tuple[bool, ...]): The state to pack.
+
+    Returns:
+        int: The state id, between 0 and STATE_COUNT - 1.
+    """
+    state_id = 0
+
+    for i, value in enumerate(state):
+        if value:
+            state_id |= 1 << i
+
+    return state_id
+
+
+def unpack_state(state_id: int) -> list[bool]:
+    """
+    Unpacks an integer state id into its 12 booleans.
+
+    Args:
+        state_id (int): The state id, between 0 and STATE_COUNT - 1.
+
+    Returns:
+        list[bool]: The state as returned by `Snake.get_state()`.
+    """
+    return [bool(state_id >> i & 1) for i in range(STATE_SIZE)]
@@ -0,0 +1,193 @@
+import sys
+from typing import TextIO
+from engine.entity.snake import Snake
+from engine.world import World
+import engine.settings as settings
+
+# ANSI escape sequences
+CLEAR_SCREEN = "\033[H\033[J"
+CLEAR_LINE_END = "\033[K"
+CLEAR_BELOW = "\033[J"
+
+
+def move_cursor(row: int, column: int) -> str:
+    """
+    Returns the escape sequence moving the cursor.
+
+    Args:
+        row (int): The row, starting at 0.
+        column (int): The column, starting at 0.
+
+    Returns:
+        str: The ANSI escape sequence.
+    """
+    return f"\033[{row + 1};{column + 1}H"
+
+
+def diff_line(row: int, old: str, new: str) -> str:
+    """
+    Returns the output turning a line of the screen into another.
+
+    Only the span between the first and the last differing characters is
+    written.
+
+    Args:
+        row (int): The row of the line, starting at 0.
+        old (str): The line on the screen.
+        new (str): The line to show.
+
+    Returns:
+        str: The escape sequences and characters to write, empty if the
+        lines are equal.
+    """
+    if old == new:
+        return ""
+
+    start = 0
+    end = min(len(old), len(new))
+    while start < end and old[start] == new[start]:
+        start += 1
+
+    if len(old) != len(new):
+        return move_cursor(row, start) + new[start:] + CLEAR_LINE_END
+
+    while old[end - 1] == new[end - 1]:
+        end -= 1
+
+    return move_cursor(row, start) + new[start:end]
+
+
+def vision_lines(snake: Snake, world: World) -> list[str]:
+    """
+    Draws what the snake sees, its row and its column.
+
+    Only the cells in sight are looked up, so the cost follows the width
+    plus the height of the world rather than its area.
+
+    Args:
+        snake (Snake): The snake.
+        world (World): The world of the snake.
+
+    Returns:
+        list[str]: One line per row of the world, walls included, as in
+        `Snake.see()`.
+    """
+    width = world.get_width() + 2
+    height = world.get_height() + 2
+    head_x, head_y = snake.get_position()
+    left = " " * head_x
+    right = " " * (width - head_x - 1)
+
+    lines = [
+        left + (snake.get_state_at(head_x, y) or " ") + right
+        for y in range(height)
+    ]
+    lines[head_y] = "".join(
+        snake.get_state_at(x, head_y) or " " for x in range(width)
+    )
+
+    return lines
+
+
+class TerminalRenderer:
+    """
+    A singleton renderer that prints the snake's vision in the terminal.
+
+    Each frame is built in memory and compared with the previous one: only
+    the changed part of each line is written, in a single write followed
+    by a flush. A new world clears the screen first.
+
+    Attributes:
+        __stream (TextIO): The output, the standard output by default.
+        __enabled (bool): Whether frames are printed.
+        __world (World | None): The world of the previous frame.
+        __lines (list[str]): The lines of the previous frame.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls) -> "TerminalRenderer":
+        """
+        Returns the renderer shared by every world.
+
+        Returns:
+            TerminalRenderer: The renderer.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, stream: TextIO | None = None):
+        """
+        Initializes a renderer with nothing on the screen yet.
+
+        Args:
+            stream (TextIO | None, optional): The output, None for the
+                standard output. Defaults to None.
+        """
+        self.__stream = stream
+        self.__enabled = settings.TERMINAL_DISPLAY
+        self.__world = None
+        self.__lines = []
+
+    def is_enabled(self) -> bool:
+        """
+        Checks whether frames are printed.
+
+        Returns:
+            bool: True if the renderer prints frames.
+        """
+        return self.__enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        """
+        Turns the terminal output on or off, whatever the pygame display.
+
+        Args:
+            enabled (bool): Whether to print frames.
+        """
+        self.__enabled = enabled
+        self.__world = None
+
+    def render(self, world: World, title: str | None = None) -> None:
+        """
+        Prints the title, the direction and the vision of the snake of a
+        world.
+
+        Args:
+            world (World): The world to show.
+            title (str | None, optional): The line printed first. Defaults
+                to None.
+        """
+        if not self.__enabled:
+            return
+
+        snake = next(
+            e for e in world.get_entities() if isinstance(e, Snake)
+        )
+
+        lines = [snake.get_last_direction().name, *vision_lines(snake, world)]
+        if title is not None:
+            lines[:0] = [title, ""]
+
+        if world is not self.__world:
+            self.__world = world
+            output = [CLEAR_SCREEN, "\n".join(lines)]
+        else:
+            previous = self.__lines
+            output = [
+                diff_line(row, previous[row] if row < len(previous) else "",
+                          line)
+                for row, line in enumerate(lines)
+            ]
+            if len(lines) < len(previous):
+                output.append(move_cursor(len(lines), 0) + CLEAR_BELOW)
+
+        # Leave the cursor below the frame, as a full print would
+        output.append(move_cursor(len(lines), 0))
+        self.__lines = lines
+
+        stream = sys.stdout if self.__stream is None else self.__stream
+        stream.write("".join(output))
+        stream.flush()
@@ -0,0 +1,433 @@
+import numpy as np
+import engine.state as state
+from engine.config import Config
+from engine.direction import Direction
+
+EMPTY = 0
+GREEN_APPLE = 1
+RED_APPLE = 2
+
+# Two green apples and one red apple per board, as in `Game.start()`
+APPLE_KINDS = np.array([GREEN_APPLE, GREEN_APPLE, RED_APPLE], dtype=np.int8)
+
+
+class VecGame:
+    """
+    Runs N independent Snake games at once on NumPy arrays.
+
+    Every board follows the rules of `Game`, `Snake.move` and `Snake.eat`
+    and the rewards of a `Config`, but the whole batch is advanced
+    by a single `step()` call. Boards are flattened with the cell (x, y)
+    stored at index `y * (width + 2) + x`, walls included.
+
+    Attributes:
+        __n (int): The number of boards.
+        __config (Config): The grid size and rewards of every board.
+        __height (int): The height of each board (without walls).
+        __width (int): The width of each board (without walls).
+        __rng (np.random.Generator): The generator drawing every random event.
+        __walls (np.ndarray): (cells,) bool mask of the wall cells.
+        __occupancy (np.ndarray): (n, cells) count of snake segments on
+            each cell, head included.
+        __apples (np.ndarray): (n, cells) apple kind on each cell.
+        __apple_cells (np.ndarray): (n, 3) cell of each apple.
+        __ring (np.ndarray): (n, capacity) ring buffer of the snake cells,
+            head first.
+        __start (np.ndarray): (n,) ring index of each head.
+        __length (np.ndarray): (n,) snake sizes, head included.
+        __heads (np.ndarray): (n,) cell of each head.
+        __directions (np.ndarray): (n,) last direction index of each snake.
+        __state_ids (np.ndarray): (n,) current packed state of each board.
+        __last_sizes (np.ndarray): (n,) sizes reached before the last step
+            reset the finished boards.
+    """
+
+    def __init__(
+        self, n: int, seed: int | None = None, config: Config | None = None
+    ):
+        """
+        Initializes and resets N boards.
+
+        Args:
+            n (int): The number of boards to run.
+            seed (int | None, optional): Seed of the random generator.
+                Defaults to None.
+            config (Config | None, optional): The settings of the games,
+                the defaults of `engine.settings` if None. Defaults to None.
+        """
+        config = Config() if config is None else config
+
+        if n < 1:
+            raise ValueError("Number of games must be greater than 0")
+        if config.height < 3 or config.width < 3:
+            raise ValueError("Height and width must be >= 3")
+
+        self.__n = n
+        self.__config = config
+        self.__height = config.height
+        self.__width = config.width
+        self.__rng = np.random.default_rng(seed)
+
+        row = self.__width + 2
+        cells = (self.__height + 2) * row
+        capacity = self.__height * self.__width + 2
+
+        walls = np.ones((self.__height + 2, row), dtype=bool)
+        walls[1:-1, 1:-1] = False
+        self.__walls = walls.ravel()
+        self.__interior = np.flatnonzero(~self.__walls)
+
+        # Cell offsets, in `list(Direction)` order
+        self.__offsets = np.array(
+            [dx + dy * row for dx, dy in (d.value for d in Direction)],
+            dtype=np.int64,
+        )
+
+        self.__occupancy = np.zeros((n, cells), dtype=np.int16)
+        self.__apples = np.zeros((n, cells), dtype=np.int8)
+        self.__apple_cells = np.zeros((n, len(APPLE_KINDS)), dtype=np.int64)
+        self.__ring = np.zeros((n, capacity), dtype=np.int64)
+        self.__start = np.zeros(n, dtype=np.int64)
+        self.__length = np.zeros(n, dtype=np.int64)
+        self.__heads = np.zeros(n, dtype=np.int64)
+        self.__directions = np.zeros(n, dtype=np.int64)
+        self.__last_sizes = np.zeros(n, dtype=np.int64)
+        self.__boards = np.arange(n)
+
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """
+        Resets every board.
+
+        Returns:
+            np.ndarray: (n,) the packed state of each board.
+        """
+        for b in range(self.__n):
+            self.__reset_board(b)
+
+        self.__state_ids = self.__encode()
+
+        return self.__state_ids.copy()
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Moves the snake of every board once.
+
+        Boards whose game ended are reset right away; the returned state is
+        still the one reached by the fatal move, so it can be used as the
+        next state of the Q-learning update, while `get_state_ids()` already
+        holds the state of the new game.
+
+        Args:
+            actions (np.ndarray): (n,) direction index of each snake, in
+                `list(Direction)` order.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The (n,) next state
+            ids, the (n,) rewards and the (n,) done flags.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        boards = self.__boards
+        capacity = self.__ring.shape[1]
+
+        rewards = np.full(self.__n, self.__config.eat_nothing_reward,
+                          dtype=np.int64)
+        targets = self.__heads + self.__offsets[actions]
+        crashed = (
+            self.__walls[targets] | (self.__occupancy[boards, targets] > 0)
+        )
+
+        # Move the snakes that did not crash: new head, drop the tail
+        moving = boards[~crashed]
+        heads = targets[moving]
+        start = (self.__start[moving] - 1) % capacity
+        tails = self.__ring[
+            moving, (start + self.__length[moving]) % capacity
+        ]
+
+        self.__start[moving] = start
+        self.__ring[moving, start] = heads
+        self.__heads[moving] = heads
+        self.__directions[moving] = actions[moving]
+        self.__occupancy[moving, heads] += 1
+        self.__occupancy[moving, tails] -= 1
+
+        kinds = self.__apples[moving, heads]
+        starved = moving[(kinds == RED_APPLE) & (self.__length[moving] == 1)]
+
+        # Green apples: grow behind the tail, in the direction of the move
+        green = moving[kinds == GREEN_APPLE]
+        last = (self.__start[green] + self.__length[green] - 1) % capacity
+        segments = self.__ring[green, last] + self.__offsets[actions[green]]
+        self.__length[green] += 1
+        self.__ring[green, (last + 1) % capacity] = segments
+        self.__occupancy[green, segments] += 1
+
+        rewards[green] = self.__apple_reward(
+            self.__config.green_apple_reward, self.__length[green]
+        )
+
+        # Red apples: lose the last segment
+        red = moving[(kinds == RED_APPLE) & (self.__length[moving] > 1)]
+        last = (self.__start[red] + self.__length[red] - 1) % capacity
+        self.__occupancy[red, self.__ring[red, last]] -= 1
+        self.__length[red] -= 1
+        rewards[red] = self.__apple_reward(
+            self.__config.red_apple_reward, self.__length[red]
+        )
+
+        for b in np.concatenate((green, red)):
+            self.__respawn_apple(b, self.__heads[b])
+
+        done = crashed
+        done[starved] = True
+        rewards[done] = self.__config.gameover_reward
+
+        next_ids = self.__encode()
+        self.__last_sizes = self.__length.copy()
+
+        for b in np.flatnonzero(done):
+            self.__reset_board(b)
+
+        self.__state_ids = next_ids.copy()
+        if done.any():
+            self.__state_ids[done] = self.__encode()[done]
+
+        return next_ids, rewards, done
+
+    def get_state_ids(self) -> np.ndarray:
+        """
+        Returns the current packed state of each board.
+
+        Returns:
+            np.ndarray: (n,) state ids, between 0 and 4095.
+        """
+        return self.__state_ids.copy()
+
+    def get_sizes(self) -> np.ndarray:
+        """
+        Returns the current size of each snake.
+
+        Returns:
+            np.ndarray: (n,) snake sizes, head included.
+        """
+        return self.__length.copy()
+
+    def get_last_sizes(self) -> np.ndarray:
+        """
+        Returns the size of each snake at the end of the last step, before
+        the finished boards were reset.
+
+        Returns:
+            np.ndarray: (n,) snake sizes, head included.
+        """
+        return self.__last_sizes.copy()
+
+    def get_n(self) -> int:
+        """
+        Returns the number of boards.
+
+        Returns:
+            int: The number of boards.
+        """
+        return self.__n
+
+    def get_board(
+        self, b: int
+    ) -> tuple[list[tuple[int, int]], list[tuple[int, int, bool]], Direction]:
+        """
+        Returns the content of a board in the form taken by `Game`.
+
+        Args:
+            b (int): The index of the board.
+
+        Returns:
+            tuple[list[tuple[int, int]], list[tuple[int, int, bool]],
+            Direction]: The snake cells as (x, y), head first, the apples as
+            (x, y, is_green), for `Game.set_snake()` and `Game.set_apples()`,
+            and the last direction of the snake.
+        """
+        row = self.__width + 2
+        capacity = self.__ring.shape[1]
+        start = self.__start[b]
+
+        snake = [
+            (int(cell % row), int(cell // row))
+            for cell in (
+                self.__ring[b, (start + k) % capacity]
+                for k in range(self.__length[b])
+            )
+        ]
+        apples = [
+            (int(cell % row), int(cell // row), bool(kind == GREEN_APPLE))
+            for cell, kind in zip(self.__apple_cells[b], APPLE_KINDS)
+        ]
+
+        return snake, apples, list(Direction)[self.__directions[b]]
+
+    @staticmethod
+    def __apple_reward(reward: int, sizes: np.ndarray) -> np.ndarray:
+        """
+        Returns the rewards of eating an apple, as `Snake.eat()` does.
+
+        A positive reward gets a size bonus; a null or negative one is
+        given as is.
+
+        Args:
+            reward (int): The reward of the apple in the configuration.
+            sizes (np.ndarray): The size of each snake after eating.
+
+        Returns:
+            np.ndarray: The reward of each snake.
+        """
+        if reward <= 0:
+            return np.full(len(sizes), reward, dtype=np.int64)
+
+        bonus = np.where(sizes >= 30, 15, np.where(sizes % 5 != 0, 5, 0))
+
+        return reward + bonus
+
+    def __random_empty_cell(self, b: int) -> int | None:
+        """
+        Picks an empty cell of a board uniformly at random.
+
+        Args:
+            b (int): The board index.
+
+        Returns:
+            int | None: The cell, or None if the board is full.
+        """
+        occupancy = self.__occupancy[b]
+        apples = self.__apples[b]
+
+        # Rejection sampling is O(1) while the board is mostly empty
+        for cell in self.__rng.choice(self.__interior, 8):
+            if occupancy[cell] == 0 and apples[cell] == EMPTY:
+                return int(cell)
+
+        free = self.__interior[
+            (occupancy[self.__interior] == 0)
+            & (apples[self.__interior] == EMPTY)
+        ]
+        if len(free) == 0:
+            return None
+
+        return int(self.__rng.choice(free))
+
+    def __respawn_apple(self, b: int, cell: int) -> None:
+        """
+        Moves the apple eaten on a cell to a random empty cell.
+
+        Args:
+            b (int): The board index.
+            cell (int): The cell of the eaten apple.
+        """
+        slot = int(np.flatnonzero(self.__apple_cells[b] == cell)[0])
+        self.__apples[b, cell] = EMPTY
+
+        new_cell = self.__random_empty_cell(b)
+        if new_cell is None:
+            new_cell = cell
+
+        self.__apples[b, new_cell] = APPLE_KINDS[slot]
+        self.__apple_cells[b, slot] = new_cell
+
+    def __reset_board(self, b: int) -> None:
+        """
+        Starts a new game on a board, as `Game.start()` does.
+
+        Args:
+            b (int): The board index.
+        """
+        offsets = self.__offsets
+        self.__occupancy[b] = 0
+        self.__apples[b] = 0
+
+        direction = int(self.__rng.integers(len(Direction)))
+        head = self.__random_empty_cell(b)
+        cells = [head]
+        cell = head
+
+        # Same random walk as `Snake.teleport()` for the two body segments
+        for _ in range(2):
+            candidates = [d for d in range(len(Direction)) if d != direction]
+
+            while candidates:
+                direction = candidates[
+                    int(self.__rng.integers(len(candidates)))
+                ]
+                target = cell + int(offsets[direction])
+
+                if self.__walls[target] or target in cells:
+                    candidates.remove(direction)
+                    continue
+
+                cells.append(target)
+                cell = target
+                break
+
+        self.__ring[b, :len(cells)] = cells
+        self.__start[b] = 0
+        self.__length[b] = len(cells)
+        self.__heads[b] = head
+        self.__directions[b] = direction
+        self.__occupancy[b, cells] = 1
+
+        for slot, kind in enumerate(APPLE_KINDS):
+            apple = self.__random_empty_cell(b)
+            self.__apples[b, apple] = kind
+            self.__apple_cells[b, slot] = apple
+
+    def __encode(self) -> np.ndarray:
+        """
+        Packs the state of every board, as `Snake.get_state_id()` does.
+
+        Returns:
+            np.ndarray: (n,) state ids.
+        """
+        row = self.__width + 2
+        boards = self.__boards[:, None]
+        heads = self.__heads
+        head_x = (heads % row)[:, None]
+        head_y = (heads // row)[:, None]
+
+        apple_x = self.__apple_cells % row
+        apple_y = self.__apple_cells // row
+        # An apple under a snake segment is hidden by the snake
+        visible = self.__occupancy[boards, self.__apple_cells] == 0
+
+        left = visible & (apple_y == head_y) & (apple_x < head_x)
+        up = visible & (apple_x == head_x) & (apple_y < head_y)
+        green = APPLE_KINDS == GREEN_APPLE
+        red = APPLE_KINDS == RED_APPLE
+
+        state_ids = np.zeros(self.__n, dtype=np.int64)
+        flags = (
+            (left[:, green], state.GREEN_APPLE_LEFT),
+            (up[:, green], state.GREEN_APPLE_UP),
+            (left[:, red], state.RED_APPLE_LEFT),
+            (up[:, red], state.RED_APPLE_UP),
+        )
+
+        for seen, bit in flags:
+            state_ids |= seen.any(axis=1).astype(np.int64) << bit
+
+        neighbours = (
+            (-1, state.DANGER_LEFT),
+            (1, state.DANGER_RIGHT),
+            (-row, state.DANGER_UP),
+            (row, state.DANGER_DOWN),
+        )
+
+        for offset, bit in neighbours:
+            cells = heads + offset
+            blocked = (
+                self.__walls[cells]
+                | (self.__occupancy[self.__boards, cells] > 0)
+            )
+            state_ids |= blocked.astype(np.int64) << bit
+
+        return state_ids
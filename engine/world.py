@@ -1,54 +1,190 @@
+from engine.config import Config
 from engine.map_location import MapLocation
 from engine.entity.entity import Entity
-import random
-import engine.settings as settings
+from engine.rng import RandomPool
 
 
 class World:
     """
     Represents the game world, containing a grid-based map and game entities.
 
+    The grid is stored sparsely: only the cells touched since the world was
+    created or reset are recorded, so creating, resetting and playing in a
+    world cost the same whatever its size.
+
     Attributes:
-        __world (list[list[str]]): The 2D grid representing the game map.
+        __config (Config): The settings of the game played in the world.
         __height (int): The height of the world (number of rows).
         __width (int): The width of the world (number of columns).
         __entities (list[Entity]): A list of all entities present in the world.
+        __cells (dict[int, Entity]): Entity found on each covered cell, by
+            flat index `y * (width + 2) + x`.
+        __stacked (dict[int, list[Entity]]): Occupants of the cells covered
+            more than once (e.g. a freshly grown segment over an apple).
+        __free_size (int): The number of empty, non-wall cells.
+        __free_at (dict[int, int]): Cell index at each position of the
+            free-cell set that differs from the row-major order of a new
+            world. The set is kept in no particular order, so that a cell
+            can be sampled in O(1).
+        __free_slot (dict[int, int]): Position in the free-cell set of each
+            cell whose position differs from the row-major order, or -1 once
+            covered by an entity.
+        __rng (RandomPool): The generator of every random event of the world.
     """
 
-    def __init__(self):
+    def __init__(
+        self, rng: RandomPool | None = None, config: Config | None = None
+    ):
         """
-        Initializes the game world with a specified height and width.
+        Initializes the game world with the height and width of a
+        configuration.
 
         Args:
-            height (int, optional): The height of the world. Defaults to 10.
-            width (int, optional): The width of the world. Defaults to 10.
+            rng (RandomPool | None, optional): The generator to use, a new
+                unseeded one if None. Defaults to None.
+            config (Config | None, optional): The settings of the game,
+                the defaults of `engine.settings` if None. Defaults to None.
+
+        Raises:
+            ValueError: If the height or the width is lower than 3.
         """
-        if settings.HEIGHT < 3 or settings.WIDTH < 3:
+        config = Config() if config is None else config
+        height = config.height
+        width = config.width
+
+        if height < 3 or width < 3:
             raise ValueError("Height and width must be >= 3")
 
-        self.__world: list[list[str]] = []
-        self.__height: int = settings.HEIGHT
-        self.__width: int = settings.WIDTH
+        self.__config: Config = config
+        self.__height: int = height
+        self.__width: int = width
         self.__entities: list[Entity] = []
+        self.__cells: dict[int, Entity] = {}
+        self.__stacked: dict[int, list[Entity]] = {}
+        self.__free_size: int = height * width
+        self.__free_at: dict[int, int] = {}
+        self.__free_slot: dict[int, int] = {}
+        self.__rng: RandomPool = rng if rng is not None else RandomPool()
+
+    def reset(self) -> None:
+        """
+        Removes every entity, giving back the empty world of a new `World`.
+
+        Runs in time proportional to the cells touched since the world was
+        created or last reset.
+        """
+        self.__entities.clear()
+        self.__cells.clear()
+        self.__stacked.clear()
+        self.__free_size = self.__height * self.__width
+        self.__free_at.clear()
+        self.__free_slot.clear()
+
+    def __index(self, x: int, y: int) -> int:
+        """
+        Converts coordinates to their index in the flat occupancy grid.
+
+        Args:
+            x (int): The X-coordinate.
+            y (int): The Y-coordinate.
+
+        Returns:
+            int: The index of the cell in `__cells`.
+        """
+        return y * (self.__width + 2) + x
+
+    def __in_world(self, x: int, y: int) -> bool:
+        """
+        Checks whether a position is on the board or on its walls.
+
+        Args:
+            x (int): The X-coordinate.
+            y (int): The Y-coordinate.
+
+        Returns:
+            bool: True if the position has a cell in the flat grid.
+        """
+        return 0 <= x <= self.__width + 1 and 0 <= y <= self.__height + 1
+
+    def __free_cell(self, slot: int) -> int:
+        """
+        Returns the cell at a position of the free-cell set.
+
+        Args:
+            slot (int): The position, below `__free_size`.
+
+        Returns:
+            int: The index of the cell in the flat grid.
+        """
+        i = self.__free_at.get(slot)
 
-        self.__make_world()
+        if i is None:
+            width = self.__width
+            i = (slot // width + 1) * (width + 2) + slot % width + 1
 
-    def __make_world(self) -> None:
+        return i
+
+    def __slot(self, i: int) -> int:
+        """
+        Returns the position of a cell in the free-cell set.
+
+        Args:
+            i (int): The index of the cell in the flat grid.
+
+        Returns:
+            int: The position of the cell, or -1 if it is a wall or covered
+            by an entity.
+        """
+        slot = self.__free_slot.get(i)
+
+        if slot is None:
+            row = self.__width + 2
+            x, y = i % row - 1, i // row - 1
+
+            if 0 <= x < self.__width and 0 <= y < self.__height:
+                return y * self.__width + x
+            return -1
+
+        return slot
+
+    def __mark_free(self, i: int) -> None:
         """
-        Generates the world grid, adding walls around the edges.
+        Adds a cell to the free-cell set.
+
+        Args:
+            i (int): The index of the cell in the flat grid.
         """
-        for i in range(self.__height + 2):
-            if i == 0 or i == self.__height + 1:
-                self.__world.append(['*' for _ in range(self.__width + 2)])
-                continue
+        slot = self.__free_size
 
-            row: list = ['*']
+        self.__free_slot[i] = slot
+        self.__free_at[slot] = i
+        self.__free_size = slot + 1
 
-            for _ in range(self.__width):
-                row.append(' ')
+    def __mark_taken(self, i: int, slot: int) -> None:
+        """
+        Removes a cell from the free-cell set by swapping it with the last one.
 
-            row.append('*')
-            self.__world.append(row)
+        Args:
+            i (int): The index of the cell in the flat grid.
+            slot (int): The position of the cell in the free-cell set.
+        """
+        self.__free_size -= 1
+        last = self.__free_cell(self.__free_size)
+
+        if last != i:
+            self.__free_at[slot] = last
+            self.__free_slot[last] = slot
+
+        self.__free_slot[i] = -1
+
+    def get_config(self) -> Config:
+        """
+        Returns the settings of the game played in the world.
+
+        Returns:
+            Config: The configuration of the world.
+        """
+        return self.__config
 
     def get_width(self) -> int:
         """
@@ -68,6 +204,15 @@ class World:
         """
         return self.__height
 
+    def get_rng(self) -> RandomPool:
+        """
+        Returns the random generator of the world.
+
+        Returns:
+            RandomPool: The generator shared by the world and its entities.
+        """
+        return self.__rng
+
     def get_location(self, x: int, y: int) -> MapLocation:
         """
         Retrieves a `MapLocation` object representing a given position.
@@ -82,34 +227,95 @@ class World:
         Raises:
             Exception: If the provided coordinates are out of bounds.
         """
-        if y > len(self.__world) or x > len(self.__world[y]):
+        if not self.__in_world(x, y):
             raise Exception('Invalid location')
 
-        is_wall = self.__world[y][x] == '*'
+        is_wall = (
+            x == 0 or y == 0
+            or x == self.__width + 1 or y == self.__height + 1
+        )
+
+        return MapLocation(x, y, is_wall, self.__cells.get(self.__index(x, y)))
+
+    def is_wall(self, x: int, y: int) -> bool:
+        """
+        Checks whether the given position is a wall.
 
-        return MapLocation(x, y, is_wall, self.get_entity_at(x, y))
+        Positions beyond the walls count as walls too, so that their index,
+        which aliases a cell of another row, is never handled as a cell of
+        the board.
+
+        Args:
+            x (int): The X-coordinate.
+            y (int): The Y-coordinate.
+
+        Returns:
+            bool: True if the position is a wall or out of the world, False
+            otherwise.
+        """
+        return not (0 < x <= self.__width and 0 < y <= self.__height)
 
     def get_empty_locations(self) -> list[tuple[int, int]]:
         """
         Retrieves a list of all empty locations in the world.
 
+        Unlike the other queries, this visits every empty cell.
+
         Returns:
             list[tuple[int, int]]: A list of coordinates (x, y) where there
             are no entities.
         """
-        empty_list = []
+        row = self.__width + 2
+        cells = map(self.__free_cell, range(self.__free_size))
 
-        for y in range(len(self.__world)):
-            for x in range(len(self.__world[y])):
-                ceil = self.__world[y][x]
+        return [(i % row, i // row) for i in cells]
 
-                if ceil != ' ':
-                    continue
+    def get_free_order(self) -> tuple:
+        """
+        Returns the order of the free-cell set.
+
+        Random empty locations are picked by position in this order, so it
+        is part of the state of a game. Only the positions that moved since
+        the world was created or reset are copied.
+
+        Returns:
+            tuple: The order, to pass to `set_free_order()`.
+        """
+        return (
+            self.__free_size, dict(self.__free_at), dict(self.__free_slot)
+        )
 
-                if self.get_entity_at(x, y) is None:
-                    empty_list.append((x, y))
+    def set_free_order(self, order: tuple) -> None:
+        """
+        Reorders the free-cell set.
 
-        return empty_list
+        Args:
+            order (tuple): The order returned by `get_free_order()` for the
+                same empty cells as the current set.
+        """
+        size, free_at, free_slot = order
+
+        self.__free_size = size
+        self.__free_at = dict(free_at)
+        self.__free_slot = dict(free_slot)
+
+    def get_random_empty_location(self) -> tuple[int, int]:
+        """
+        Picks an empty location uniformly at random in constant time.
+
+        Returns:
+            tuple[int, int]: The (x, y) coordinates of an empty location.
+
+        Raises:
+            IndexError: If the world has no empty location left.
+        """
+        if not self.__free_size:
+            raise IndexError("Cannot choose from an empty sequence")
+
+        i = self.__free_cell(self.__rng.randrange(self.__free_size))
+        row = self.__width + 2
+
+        return i % row, i // row
 
     def get_entity_at(self, x: int, y: int) -> Entity | None:
         """
@@ -123,10 +329,76 @@ class World:
             object | None: The entity found at the coordinates, or None if
             empty.
         """
-        for entity in self.__entities:
-            if entity.contains_point(x, y):
-                return entity
-        return None
+        return self.__cells.get(y * (self.__width + 2) + x)
+
+    def occupy_cell(self, x: int, y: int, entity: Entity) -> None:
+        """
+        Marks a cell as covered by an entity already present in the world.
+
+        Entities that grow or move (e.g. the snake) call this for every cell
+        they start covering so that lookups stay O(1). Cells beyond the
+        walls are not recorded: their index would alias a cell of another
+        row.
+
+        Args:
+            x (int): The X-coordinate.
+            y (int): The Y-coordinate.
+            entity (Entity): The entity covering the cell.
+        """
+        if not self.__in_world(x, y):
+            return
+
+        i = self.__index(x, y)
+        current = self.__cells.get(i)
+
+        if current is None:
+            self.__cells[i] = entity
+
+            slot = self.__slot(i)
+            if slot != -1:
+                self.__mark_taken(i, slot)
+            return
+
+        stack = self.__stacked.setdefault(i, [current])
+        stack.append(entity)
+        self.__cells[i] = min(stack, key=self.__entities.index)
+
+    def release_cell(self, x: int, y: int, entity: Entity) -> None:
+        """
+        Marks a cell as no longer covered by an entity.
+
+        Nothing changes if the entity does not cover the cell, so that a
+        cell covered by another entity is never made free.
+
+        Args:
+            x (int): The X-coordinate.
+            y (int): The Y-coordinate.
+            entity (Entity): The entity leaving the cell.
+        """
+        if not self.__in_world(x, y):
+            return
+
+        i = self.__index(x, y)
+        stack = self.__stacked.get(i)
+
+        if stack is None:
+            if self.__cells.get(i) is not entity:
+                return
+
+            del self.__cells[i]
+            if not self.is_wall(x, y):
+                self.__mark_free(i)
+            return
+
+        if entity not in stack:
+            return
+        stack.remove(entity)
+
+        if len(stack) == 1:
+            del self.__stacked[i]
+            self.__cells[i] = stack[0]
+        else:
+            self.__cells[i] = min(stack, key=self.__entities.index)
 
     def get_entities(self) -> list[Entity]:
         """
@@ -146,6 +418,9 @@ class World:
         """
         self.__entities.append(entity)
 
+        for x, y in entity.get_cells():
+            self.occupy_cell(x, y, entity)
+
     def spawn_entity(self, entity: Entity) -> None:
         """
         Adds an entity to the world.
@@ -153,7 +428,7 @@ class World:
         Args:
             entity (object): The entity to add.
         """
-        x, y = random.choice(self.get_empty_locations())
+        x, y = self.get_random_empty_location()
 
         entity.teleport(x, y)
 
@@ -166,35 +441,21 @@ class World:
         Args:
             entity (Entity): The entity to remove.
         """
+        for x, y in entity.get_cells():
+            self.release_cell(x, y, entity)
+
         self.__entities.remove(entity)
 
     def render(self, title: str | None = None):
         """
         Renders the game world via pygame and the snake's vision in the
         terminal.
+
+        Each display can be turned off on its own, see
+        `TerminalRenderer.set_enabled()`.
         """
-        import sys
-        from engine.entity.snake import Snake
         from engine.renderer import PygameRenderer
+        from engine.terminal import TerminalRenderer
 
-        renderer = PygameRenderer.get_instance()
-        renderer.render(self, title)
-
-        snake = [e for e in self.__entities if isinstance(e, Snake)][0]
-
-        sys.stdout.write("\033[H")
-        sys.stdout.write("\033[J")
-
-        if title is not None:
-            print(title + "\n")
-
-        print(snake.get_last_direction().name)
-
-        def str_see(it):
-            return ' ' if it is None else it
-
-        vision = snake.see()
-        for i in range(len(vision)):
-            print("".join(str_see(item) for item in vision[i]))
-
-        sys.stdout.flush()
+        PygameRenderer.get_instance().render(self, title)
+        TerminalRenderer.get_instance().render(self, title)
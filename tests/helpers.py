@@ -0,0 +1,68 @@
+from collections.abc import Iterator
+import numpy as np
+from engine.direction import Direction
+from engine.exception.gameover import GameOver
+from engine.game import Game
+
+DIRECTIONS = list(Direction)
+
+
+def safe_directions(game: Game) -> list[Direction]:
+    """
+    Lists the moves that do not end the game at once.
+
+    Args:
+        game (Game): The started game.
+
+    Returns:
+        list[Direction]: The directions leading to a free or apple cell.
+    """
+    snake = game.get_snake()
+    world = game.get_world()
+    head_x, head_y = snake.get_position()
+    body = set(snake.get_body())
+
+    return [
+        direction for direction in DIRECTIONS
+        if not world.is_wall(head_x + direction.value[0],
+                             head_y + direction.value[1])
+        and (head_x + direction.value[0],
+             head_y + direction.value[1]) not in body
+    ]
+
+
+def random_walk(
+    game: Game, seed: int, steps: int, games: int = 1
+) -> Iterator[tuple[Direction, int | None]]:
+    """
+    Plays mostly safe random moves, restarting the game when it ends.
+
+    Args:
+        game (Game): The game to play, started before the first move.
+        seed (int): Seed of the moves.
+        steps (int): The number of moves of each game at most.
+        games (int, optional): The number of games. Defaults to 1.
+
+    Yields:
+        tuple[Direction, int | None]: Each move and its reward, None for
+        the move that ended the game.
+    """
+    generator = np.random.default_rng(seed)
+
+    for _ in range(games):
+        game.start()
+
+        for _ in range(steps):
+            safe = safe_directions(game)
+            if safe and generator.random() < 0.97:
+                direction = safe[generator.integers(len(safe))]
+            else:
+                direction = DIRECTIONS[generator.integers(len(DIRECTIONS))]
+
+            try:
+                reward = game.get_snake().move(direction)
+            except GameOver:
+                yield direction, None
+                break
+
+            yield direction, reward
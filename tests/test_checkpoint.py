@@ -0,0 +1,174 @@
+import json
+import os
+import numpy as np
+import pytest
+import ai.train as train
+from ai.checkpoint import (
+    CHECKPOINT_BASE, CHECKPOINT_LOG, Checkpointer, decode_record,
+    encode_record, load_checkpoint,
+)
+from ai.experience import ExperienceConfig
+from ai.qtable import QTable, load_table
+from ai.replay import load_records
+from ai.stopping import EarlyStopping
+from engine.config import Config
+from engine.state import STATE_COUNT
+
+
+def random_table(seed):
+    generator = np.random.default_rng(seed)
+    table = QTable()
+    rows = generator.choice(STATE_COUNT, 50, replace=False)
+    table.values[rows] = generator.normal(size=(50, 4))
+    table.visited[rows] = generator.random((50, 4)) < 0.5
+    return table
+
+
+def update(table, seed, n=5):
+    generator = np.random.default_rng(seed)
+    rows = generator.choice(STATE_COUNT, n, replace=False)
+    table.values[rows] += 1.0
+    table.visited[rows] = True
+
+
+def assert_same_table(a, b):
+    assert np.array_equal(a.values, b.values)
+    assert np.array_equal(a.visited, b.visited)
+
+
+def test_record_round_trip():
+    table = random_table(0)
+    rows = np.array([3, 17, 4095])
+    record = encode_record(5, {"episode": 9}, rows, table)
+
+    seq, meta, got_rows, values, visited, end = decode_record(
+        b"xx" + record, 2
+    )
+
+    assert (seq, meta, end) == (5, {"episode": 9}, len(record) + 2)
+    assert np.array_equal(got_rows, rows)
+    assert np.array_equal(values, table.values[rows])
+    assert np.array_equal(visited, table.visited[rows])
+
+
+def test_corrupted_record_is_rejected():
+    record = bytearray(encode_record(1, {}, np.arange(4), random_table(1)))
+
+    assert decode_record(bytes(record[:-1]), 0) is None
+    record[20] ^= 0xFF
+    assert decode_record(bytes(record), 0) is None
+
+
+def test_deltas_and_torn_tail(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    table = random_table(2)
+    checkpointer = Checkpointer(path)
+
+    for episode in range(1, 4):
+        update(table, episode)
+        checkpointer.save(table, {"episode": episode})
+
+    # A crash in the middle of a record leaves a partial tail
+    with open(os.path.join(path, CHECKPOINT_LOG), "ab") as file:
+        file.write(encode_record(99, {"episode": 4}, np.arange(9),
+                                 table)[:40])
+
+    checkpoint = load_checkpoint(path)
+    assert checkpoint.meta["episode"] == 3
+    assert_same_table(checkpoint.table, table)
+
+    # Resuming drops the tail and appends after the last complete record
+    checkpointer = Checkpointer(path, checkpoint)
+    assert os.path.getsize(os.path.join(path, CHECKPOINT_LOG)) == (
+        checkpoint.log_size
+    )
+    update(table, 4)
+    checkpointer.save(table, {"episode": 4})
+
+    checkpoint = load_checkpoint(path)
+    assert checkpoint.meta["episode"] == 4
+    assert_same_table(checkpoint.table, table)
+
+
+def test_log_is_compacted(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    table = random_table(3)
+    checkpointer = Checkpointer(path)
+    base = os.path.join(path, CHECKPOINT_BASE)
+    log = os.path.join(path, CHECKPOINT_LOG)
+
+    checkpointer.save(table, {"episode": 0})
+    episode = 0
+    while os.path.getsize(log) > 0 or episode == 0:
+        episode += 1
+        update(table, episode, n=200)
+        checkpointer.save(table, {"episode": episode})
+
+    assert episode > 1
+    assert os.path.getsize(log) <= os.path.getsize(base)
+
+    checkpoint = load_checkpoint(path)
+    assert checkpoint.meta["episode"] == episode
+    assert_same_table(checkpoint.table, table)
+
+
+def train_run(policy, experience_config=None, resume=False):
+    # Plateau checks: best at 40, then stale at 80, 120 and 160
+    stopping = EarlyStopping(plateau=1000, every=40, seed=7)
+    train.train("t", replay_policy=policy, seed=7, resume=resume,
+                experience_config=experience_config,
+                checkpoint_every=50, stopping=stopping,
+                config=Config(width=6, height=6, episodes=300))
+
+
+def run_outputs():
+    with open("data/t_rewards.csv") as file:
+        metrics = [line.rsplit(",", 1)[0] for line in file]
+    with open("data/t_summary.json") as file:
+        summary = json.load(file)
+
+    return (
+        load_table("data/t.csv").to_dict(),
+        metrics,
+        load_records(train.REPLAY_FILE),
+        summary["episodes"],
+        summary["stopped"],
+    )
+
+
+@pytest.mark.parametrize("policy, experience_config", [
+    ("every:7", None),
+    ("last:100", None),
+    ("top:50", None),
+    ("every:7", ExperienceConfig(5000, 16, 2)),
+])
+def test_resume_continues_exactly(tmp_path, monkeypatch, capsys, policy,
+                                  experience_config):
+    (tmp_path / "full").mkdir()
+    (tmp_path / "resumed").mkdir()
+
+    monkeypatch.chdir(tmp_path / "full")
+    train_run(policy, experience_config)
+    expected = run_outputs()
+    # Played past the interruption below
+    assert expected[3] > 130
+
+    monkeypatch.chdir(tmp_path / "resumed")
+    progress_bar = train.progress_bar
+
+    def interrupt(i, total):
+        if i == 130:
+            raise KeyboardInterrupt
+        progress_bar(i, total)
+
+    monkeypatch.setattr(train, "progress_bar", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        train_run(policy, experience_config)
+    monkeypatch.setattr(train, "progress_bar", progress_bar)
+
+    # The held-back episodes are in a side file, not in the checkpoint
+    meta = load_checkpoint(train.checkpoint_path("t")).meta
+    assert set(meta["replay"]) == {"offset", "held"}
+
+    train_run(policy, experience_config, resume=True)
+    assert run_outputs() == expected
@@ -0,0 +1,56 @@
+import numpy as np
+import ai.profiler as profiler_module
+from ai.profiler import PHASES, NullProfiler, Profiler
+from ai.qtable import QTable
+from ai.replay import EpisodeLog
+from ai.train import init_state, run_episode, train
+from engine.config import Config
+
+
+def play(profiler, episodes):
+    for episode in range(1, episodes + 1):
+        profiler.begin_episode(episode)
+        for phase in PHASES:
+            profiler.mark(phase)
+        profiler.end_episode(episode)
+
+
+def test_profile_file_keeps_the_last_episodes(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_module, "PROFILE_EPISODES", 4)
+    profiler = Profiler()
+    play(profiler, 10)
+
+    path = tmp_path / "profile.csv"
+    profiler.write_episodes(str(path))
+    rows = path.read_text().splitlines()
+
+    assert rows[0].split(",") == ["episode", "steps", *PHASES]
+    assert [row.split(",")[0] for row in rows[1:]] == ["7", "8", "9", "10"]
+    # The report still covers the whole run
+    assert "10 episodes, 55 steps" in profiler.report()
+
+
+def test_stopping_and_checkpoints_are_charged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    train("p", replay_policy="off", seed=3, profile=True, verbose=False,
+          checkpoint_every=1, config=Config(width=6, height=6, episodes=5))
+
+    with open("data/p_profile.csv") as file:
+        header, *rows = [line.split(",") for line in file.read().split()]
+
+    assert len(rows) == 5
+    checkpoint = header.index("checkpoint")
+    assert all(int(row[checkpoint]) > 0 for row in rows)
+
+
+def test_disabled_profiler_is_not_called_per_step(monkeypatch):
+    def fail(*_):
+        raise AssertionError("mark() called with profiling off")
+
+    monkeypatch.setattr(NullProfiler, "mark", fail)
+    env, state = init_state(QTable(), np.random.SeedSequence(3),
+                            config=Config(width=6, height=6))
+
+    for _ in range(5):
+        run_episode(state, env, 0.5, EpisodeLog(1))
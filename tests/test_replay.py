@@ -0,0 +1,117 @@
+import json
+import numpy as np
+from ai.replay import EpisodeLog, ReplayPlayer, apply_action, load_records
+from ai.replay_file import ReplayReader, ReplayWriter
+from engine.config import Config
+from engine.game import Game
+from tests.helpers import DIRECTIONS, safe_directions
+
+CONFIG = Config(width=7, height=7)
+
+
+def frame(game):
+    snake = game.get_snake()
+    return (
+        snake.get_position(),
+        list(snake.get_body()),
+        sorted(
+            (e.get_position(), type(e).__name__)
+            for e in game.get_world().get_entities() if e is not snake
+        ),
+    )
+
+
+def record_episode(episode, seed):
+    generator = np.random.default_rng(seed)
+    game = Game(seed, CONFIG)
+    log = EpisodeLog(seed)
+
+    game.start()
+    log.start(game)
+    frames = [frame(game)]
+    done = False
+
+    while not done and len(frames) < 300:
+        safe = safe_directions(game) or DIRECTIONS
+        action = DIRECTIONS.index(safe[generator.integers(len(safe))])
+        reward, done = apply_action(game, action)
+        log.step(game, action, reward)
+        frames.append(frame(game))
+
+    return log.to_dict(episode), frames
+
+
+def replay_frames(record):
+    player = ReplayPlayer(record, keyframe_interval=16)
+
+    for i in range(player.get_frame_count()):
+        player.seek(i)
+        yield frame(player.get_game())
+
+
+def test_replay_file_round_trip(tmp_path):
+    path = str(tmp_path / "run.replay")
+    writer = ReplayWriter(path)
+    truth = {}
+
+    for episode in range(1, 21):
+        record, frames = record_episode(episode, episode)
+        writer.write(record)
+        truth[episode] = (record, frames)
+    writer.close()
+
+    with ReplayReader(path) as reader:
+        assert [entry[0] for entry in reader.get_index()] == list(truth)
+        # Tuples come back as lists
+        assert reader.read(7) == json.loads(json.dumps(truth[7][0]))
+
+    for record in load_records(path):
+        assert list(replay_frames(record)) == truth[record["episode"]][1]
+
+
+def test_player_seeks_backward():
+    record, frames = record_episode(1, 42)
+    player = ReplayPlayer(record, keyframe_interval=8)
+
+    for i in reversed(range(player.get_frame_count())):
+        player.seek(i)
+        assert frame(player.get_game()) == frames[i]
+
+
+def test_truncated_file_keeps_whole_episodes(tmp_path):
+    path = tmp_path / "run.replay"
+    writer = ReplayWriter(str(path))
+    for episode in range(1, 11):
+        writer.write(record_episode(episode, episode)[0])
+    writer.close()
+
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+
+    with ReplayReader(str(path)) as reader:
+        index = reader.get_index()
+        assert 0 < len(index) < 10
+        assert [record["episode"] for record in reader] == [
+            entry[0] for entry in index
+        ]
+
+
+def test_resumed_file_is_indexed_on_close(tmp_path):
+    path = str(tmp_path / "run.replay")
+    writer = ReplayWriter(path)
+    for episode in range(1, 6):
+        writer.write(record_episode(episode, episode)[0])
+    offset = writer.sync()
+    # Written after the checkpoint, then lost by a crash
+    writer.write(record_episode(6, 6)[0])
+
+    writer = ReplayWriter(path, offset)
+    for episode in range(6, 9):
+        writer.write(record_episode(episode, episode + 10)[0])
+    writer.close()
+
+    with ReplayReader(path) as reader:
+        index = reader.get_index()
+        assert [entry[0] for entry in index] == list(range(1, 9))
+        assert [record["episode"] for record in reader] == list(range(1, 9))
+        assert reader.read(6)["seed"] == 16
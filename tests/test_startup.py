@@ -0,0 +1,10 @@
+from benchmarks.startup import forbidden_imports, measure_imports
+
+
+def test_headless_startup_skips_the_renderer():
+    # The time budget is checked by benchmarks/startup.py only, as timings
+    # are not reliable on shared runners
+    imports = measure_imports()
+
+    assert "ai.train" in {name.strip() for name in imports}
+    assert forbidden_imports(imports) == []
@@ -0,0 +1,54 @@
+import pytest
+import engine.settings as settings
+import engine.state as state
+from engine.config import Config
+from engine.game import Game
+from tests.helpers import random_walk
+
+
+def ray_state(snake):
+    # The rays of the original encoder, cast over `Snake.see()`
+    see = snake.see()
+    head_x, head_y = snake.get_position()
+    flags = [False] * state.STATE_SIZE
+
+    for x in range(head_x):
+        if see[head_y][x] == settings.GREEN_APPLE_CHAR:
+            flags[state.GREEN_APPLE_LEFT] = True
+        elif see[head_y][x] == settings.RED_APPLE_CHAR:
+            flags[state.RED_APPLE_LEFT] = True
+
+    for y in range(head_y):
+        if see[y][head_x] == settings.GREEN_APPLE_CHAR:
+            flags[state.GREEN_APPLE_UP] = True
+        elif see[y][head_x] == settings.RED_APPLE_CHAR:
+            flags[state.RED_APPLE_UP] = True
+
+    blocked = (settings.WALL_CHAR, settings.SNAKE_SEGMENT_CHAR)
+    flags[state.DANGER_LEFT] = see[head_y][head_x - 1] in blocked
+    flags[state.DANGER_RIGHT] = see[head_y][head_x + 1] in blocked
+    flags[state.DANGER_UP] = see[head_y - 1][head_x] in blocked
+    flags[state.DANGER_DOWN] = see[head_y + 1][head_x] in blocked
+
+    return flags
+
+
+def test_pack_unpack_round_trip():
+    for state_id in range(state.STATE_COUNT):
+        flags = state.unpack_state(state_id)
+
+        assert len(flags) == state.STATE_SIZE
+        assert state.pack_state(flags) == state_id
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_state_id_matches_rays(seed):
+    game = Game(seed, Config(width=6, height=6))
+
+    for _, reward in random_walk(game, seed, steps=300, games=10):
+        if reward is None:
+            continue
+
+        snake = game.get_snake()
+        assert snake.get_state() == ray_state(snake)
+        assert snake.get_state_id() == state.pack_state(ray_state(snake))
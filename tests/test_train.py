@@ -0,0 +1,76 @@
+import json
+import numpy as np
+from ai.experience import ExperienceConfig
+from ai.qtable import load_table
+from ai.replay import load_records
+from ai.stopping import EarlyStopping
+from ai.sweep import sweep
+from ai.train import REPLAY_FILE, train
+from engine.config import Config
+
+CONFIG = Config(width=6, height=6, episodes=60)
+
+
+def run(filename, **kwargs):
+    kwargs.setdefault("config", CONFIG)
+    summary = train(filename, replay_policy="off", seed=3, verbose=False,
+                    **kwargs)
+    del summary["seconds"]
+    return summary, load_table(f"data/{filename}.csv")
+
+
+def test_runs_in_one_process_are_independent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    first, table = run("a")
+    run("other", config=CONFIG._replace(alpha=0.5),
+        experience_config=ExperienceConfig(100, 8, 2))
+    second, again = run("b")
+
+    assert first == second
+    assert np.array_equal(table.values, again.values)
+    with open("data/a_summary.json") as file:
+        assert json.load(file)["episodes"] == 60
+
+
+def test_sweep_trains_with_the_learning_settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    # A target of 0 is met by the first check
+    stopping = EarlyStopping(target=0, every=20)
+    rows = sweep("s", ["alpha=0.1,0.5"], seed=1, base=CONFIG,
+                 stopping=stopping,
+                 experience_config=ExperienceConfig(100, 8, 2))
+
+    assert [row["episodes"] for row in rows] == [20, 20]
+    for row in rows:
+        with open(f"data/s_trial{row['trial']}_summary.json") as file:
+            summary = json.load(file)
+        assert summary["stopped"]
+        assert summary["experience"]["batch_size"] == 8
+
+    # The same seed gives the same sweep
+    again = sweep("s", ["alpha=0.1,0.5"], seed=1, base=CONFIG,
+                  stopping=stopping,
+                  experience_config=ExperienceConfig(100, 8, 2))
+    assert [row["score"] for row in again] == [row["score"] for row in rows]
+
+
+def test_last_episodes_survive_an_early_stop(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    summary = train("t", replay_policy="last:3", seed=3, profile=True,
+                    stopping=EarlyStopping(target=0, every=20),
+                    config=CONFIG, verbose=False)
+    assert summary["episodes"] == 20
+
+    assert [record["episode"] for record in load_records(REPLAY_FILE)] == [
+        18, 19, 20,
+    ]
+
+    with open("data/t_trace.json") as file:
+        events = json.load(file)["traceEvents"]
+    assert sorted({event["name"] for event in events
+                   if event["tid"] == 0}) == [
+        f"episode {episode}" for episode in range(16, 21)
+    ]
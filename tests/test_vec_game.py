@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from engine.config import Config
+from engine.entity.apple import Apple
+from engine.exception.gameover import GameOver
+from engine.game import Game
+from engine.vec_game import VecGame
+from tests.helpers import DIRECTIONS, safe_directions
+
+
+def board_game(vec, b, config):
+    snake, apples, direction = vec.get_board(b)
+    game = Game(0, config)
+
+    game.set_snake(snake[0], snake[1:])
+    game.set_apples(apples)
+    game.get_snake().set_last_direction(direction)
+
+    return game
+
+
+def sync_apples(vec, b, game):
+    # Respawned apples come from the generator of the batch
+    world = game.get_world()
+    for entity in [e for e in world.get_entities() if isinstance(e, Apple)]:
+        world.remove_entity(entity)
+
+    game.set_apples(vec.get_board(b)[1])
+
+
+def run_lockstep(config, seed, n=8, steps=1000):
+    generator = np.random.default_rng(seed)
+    vec = VecGame(n, seed, config)
+    games = [board_game(vec, b, config) for b in range(n)]
+    finished = 0
+
+    for _ in range(steps):
+        ids = vec.get_state_ids()
+        actions = generator.integers(len(DIRECTIONS), size=n)
+
+        for b, game in enumerate(games):
+            assert ids[b] == game.get_snake().get_state_id()
+
+            safe = safe_directions(game)
+            if safe and generator.random() < 0.98:
+                actions[b] = DIRECTIONS.index(
+                    safe[generator.integers(len(safe))]
+                )
+
+        next_ids, rewards, done = vec.step(actions)
+
+        for b, game in enumerate(games):
+            snake = game.get_snake()
+            try:
+                reward = snake.move(DIRECTIONS[actions[b]])
+                over = False
+            except GameOver:
+                reward = config.gameover_reward
+                over = True
+
+            if not over:
+                sync_apples(vec, b, game)
+                assert snake.get_size() == vec.get_sizes()[b]
+
+            assert over == bool(done[b])
+            assert reward == rewards[b]
+            assert snake.get_state_id() == next_ids[b]
+
+            if over:
+                finished += 1
+                games[b] = board_game(vec, b, config)
+
+    return finished
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_lockstep_with_game(seed):
+    assert run_lockstep(Config(width=6, height=6), seed) > 0
+
+
+def test_lockstep_on_a_wide_board():
+    assert run_lockstep(Config(width=12, height=4), 2) > 0
+
+
+@pytest.mark.parametrize("green, red", [(0, -10), (-5, 5), (20, 15)])
+def test_lockstep_with_other_apple_rewards(green, red):
+    config = Config(width=6, height=6, green_apple_reward=green,
+                    red_apple_reward=red)
+
+    assert run_lockstep(config, 3) > 0
@@ -0,0 +1,110 @@
+import pytest
+from engine.config import Config
+from engine.game import Game
+from tests.helpers import random_walk
+
+
+def brute_entity_at(world, x, y):
+    return next(
+        (e for e in world.get_entities() if e.contains_point(x, y)), None
+    )
+
+
+def brute_empty_cells(world):
+    return {
+        (x, y)
+        for y in range(1, world.get_height() + 1)
+        for x in range(1, world.get_width() + 1)
+        if brute_entity_at(world, x, y) is None
+    }
+
+
+def assert_occupancy(world):
+    for y in range(world.get_height() + 2):
+        for x in range(world.get_width() + 2):
+            assert world.get_entity_at(x, y) is brute_entity_at(world, x, y)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_entity_at_matches_entities(seed):
+    game = Game(seed, Config(width=8, height=6))
+
+    for _ in random_walk(game, seed, steps=300, games=5):
+        assert_occupancy(game.get_world())
+
+
+def test_reset_empties_the_grid():
+    game = Game(0, Config(width=6, height=6))
+    for _ in random_walk(game, 0, steps=200):
+        pass
+
+    world = game.get_world()
+    world.reset()
+
+    assert world.get_entities() == []
+    assert_occupancy(world)
+    assert len(world.get_empty_locations()) == 36
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_free_cells_match_grid(seed):
+    game = Game(seed, Config(width=7, height=5))
+
+    for _ in random_walk(game, seed, steps=300, games=5):
+        world = game.get_world()
+        empty = world.get_empty_locations()
+
+        assert len(empty) == len(set(empty))
+        assert set(empty) == brute_empty_cells(world)
+        if empty:
+            assert world.get_random_empty_location() in empty
+
+
+def test_free_order_round_trip():
+    game = Game(1, Config(width=6, height=4))
+    for _ in random_walk(game, 1, steps=40):
+        pass
+
+    world = game.get_world()
+    order = world.get_free_order()
+    empty = world.get_empty_locations()
+    x, y = empty[0]
+
+    # Taking and releasing a cell keeps the same cells in another order
+    world.occupy_cell(x, y, game.get_snake())
+    world.release_cell(x, y, game.get_snake())
+    assert world.get_empty_locations() != empty
+
+    world.set_free_order(order)
+    assert world.get_empty_locations() == empty
+
+
+def test_release_keeps_cells_of_other_entities():
+    game = Game(1, Config(width=6, height=4))
+    game.start()
+
+    world = game.get_world()
+    snake = game.get_snake()
+    apple = next(e for e in world.get_entities() if e is not snake)
+    x, y = apple.get_position()
+    empty = brute_empty_cells(world)
+
+    world.release_cell(x, y, snake)
+    assert world.get_entity_at(x, y) is apple
+    assert set(world.get_empty_locations()) == empty
+
+    # Beyond the right wall, the index aliases a cell of the next row
+    x, y = min(empty, key=lambda cell: cell[1])
+    alias = (x + world.get_width() + 2, y - 1)
+    world.occupy_cell(*alias, snake)
+    assert world.get_entity_at(x, y) is None
+    world.release_cell(*alias, snake)
+    assert set(world.get_empty_locations()) == empty
+
+
+@pytest.mark.parametrize("x, y", [
+    (-1, 2), (2, -1), (8, 2), (2, 6), (0, 2), (7, 2), (2, 0), (2, 5),
+])
+def test_outside_the_board_is_wall(x, y):
+    world = Game(1, Config(width=6, height=4)).get_world()
+    assert world.is_wall(x, y)